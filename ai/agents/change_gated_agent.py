@@ -0,0 +1,159 @@
+"""
+Change-Gated Analysis Agent
+Sits in front of TradeAnalysisAgent. When the snapshot the data agent
+collected has not moved materially since the one behind the last stored
+recommendation for that ticker, it answers with that recommendation and a
+short delta note instead of paying for a new gpt-4o analysis. Thresholds
+are GATE_THRESHOLDS in utils/change_detection.py (GATE_PRICE_CHANGE,
+GATE_VOLUME_CHANGE, GATE_FUNDAMENTALS_CHANGE); new statements or a
+recommendation older than MAX_RECOMMENDATION_AGE_HOURS always re-run.
+Full analyses are recorded in the recommendation store shared with the
+watchlist.
+"""
+
+import time
+from typing import Any, AsyncGenerator, Dict, Optional, Sequence
+
+from autogen_agentchat.agents import AssistantAgent, BaseChatAgent
+from autogen_agentchat.base import Response
+from autogen_agentchat.messages import (
+    BaseAgentEvent,
+    BaseChatMessage,
+    TextMessage,
+    ToolCallSummaryMessage,
+)
+from autogen_core import CancellationToken
+
+from ai.tools.stock_information_tool import get_cached_snapshot
+from utils.change_detection import (
+    GATE_THRESHOLDS,
+    MAX_RECOMMENDATION_AGE_SECONDS,
+    describe_changes,
+    reanalysis_reason,
+    snapshot_inputs,
+)
+from utils.metrics import analysis_gate_decisions
+from utils.payload_parser import parse_payload
+from utils.recommendation_store import (
+    RecommendationStore,
+    default_store,
+    extract_recommendation,
+)
+
+
+class ChangeGate:
+    """Decides whether a snapshot needs a fresh analysis and records the ones made"""
+
+    def __init__(
+        self,
+        store: Optional[RecommendationStore] = None,
+        thresholds: Dict[str, float] = GATE_THRESHOLDS,
+        max_age_seconds: float = MAX_RECOMMENDATION_AGE_SECONDS,
+    ):
+        self._store = store
+        self.thresholds = thresholds
+        self.max_age_seconds = max_age_seconds
+        self.enabled = True
+
+    @property
+    def store(self) -> RecommendationStore:
+        if self._store is None:
+            self._store = default_store()
+        return self._store
+
+    @store.setter
+    def store(self, store: RecommendationStore):
+        self._store = store
+
+    @staticmethod
+    def snapshot(stock_data: Any) -> Optional[Dict[str, Any]]:
+        """The fetched snapshot behind the collected data (DataFrames while cached)"""
+        payload = parse_payload(stock_data) if stock_data else None
+        if not isinstance(payload, dict) or not isinstance(payload.get("Ticker"), str):
+            return None
+        return get_cached_snapshot(payload["Ticker"]) or payload
+
+    def reuse(self, snapshot: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Stored analysis with a delta note, or None when a fresh one is needed"""
+        if not self.enabled or snapshot is None:
+            return None
+        record = self.store.get(snapshot["Ticker"])
+        current = snapshot_inputs(snapshot)
+        reason = reanalysis_reason(
+            record, current, self.max_age_seconds, thresholds=self.thresholds
+        )
+        if reason or not record.get("analysis"):
+            analysis_gate_decisions.inc(decision="analysed")
+            return None
+        analysis_gate_decisions.inc(decision="reused")
+        analysed_at = time.strftime(
+            "%d %b %H:%M", time.localtime(record["analysed_at"])
+        )
+        delta = describe_changes(record.get("inputs", {}), current)
+        return (
+            f"{record['analysis']}\n\n---\n"
+            f"♻️ Reused the analysis of {analysed_at}: nothing moved past its "
+            f"change thresholds since then ({delta or 'no comparable inputs'}; "
+            "no new statements)."
+        )
+
+    def record(self, snapshot: Optional[Dict[str, Any]], analysis: Optional[str]):
+        """Remember a full analysis and the snapshot inputs it was based on"""
+        recommendation = extract_recommendation(analysis)
+        if not self.enabled or snapshot is None or recommendation is None:
+            return
+        self.store.record(
+            snapshot["Ticker"],
+            recommendation,
+            snapshot_inputs(snapshot),
+            analysis=analysis,
+        )
+
+
+# Global gate used by both team topologies
+change_gate = ChangeGate()
+
+
+class ChangeGatedAgent(BaseChatAgent):
+    """Runs the wrapped analysis agent only when the collected data moved materially"""
+
+    def __init__(self, agent: AssistantAgent, gate: Optional[ChangeGate] = None):
+        super().__init__(agent.name, agent.description)
+        self.agent = agent
+        self.gate = gate or change_gate
+
+    @property
+    def produced_message_types(self) -> Sequence[type[BaseChatMessage]]:
+        return self.agent.produced_message_types
+
+    async def on_messages(
+        self, messages: Sequence[BaseChatMessage], cancellation_token: CancellationToken
+    ) -> Response:
+        async for item in self.on_messages_stream(messages, cancellation_token):
+            if isinstance(item, Response):
+                return item
+        raise AssertionError("The stream should have returned the final result.")
+
+    async def on_messages_stream(
+        self, messages: Sequence[BaseChatMessage], cancellation_token: CancellationToken
+    ) -> AsyncGenerator[BaseAgentEvent | BaseChatMessage | Response, None]:
+        stock_data = None
+        for message in messages:
+            if isinstance(message, ToolCallSummaryMessage):
+                stock_data = message.content
+        snapshot = self.gate.snapshot(stock_data)
+
+        reused = self.gate.reuse(snapshot)
+        if reused is not None:
+            yield Response(chat_message=TextMessage(content=reused, source=self.name))
+            return
+
+        async for item in self.agent.on_messages_stream(messages, cancellation_token):
+            if isinstance(item, Response) and isinstance(
+                item.chat_message, TextMessage
+            ):
+                self.gate.record(snapshot, item.chat_message.content)
+            yield item
+
+    async def on_reset(self, cancellation_token: CancellationToken) -> None:
+        await self.agent.on_reset(cancellation_token)
@@ -0,0 +1,78 @@
+import os
+from autogen_agentchat.agents import AssistantAgent
+from ai.models import gtp_model_client
+
+# Specialists answer short, focused questions; the cheaper model is enough
+SPECIALIST_MODEL_STRATEGY = os.getenv("SPECIALIST_MODEL_STRATEGY", "economic-task")
+# The aggregator makes the call; it reads findings, not the raw data
+AGGREGATOR_MODEL_STRATEGY = os.getenv("AGGREGATOR_MODEL_STRATEGY", "deapth-analysis")
+
+# Specialist name -> what it analyses
+SPECIALIST_FOCUS = {
+    "PriceActionAnalyst": "technical analysis: price trend, momentum, distance from "
+    "52-week and all-time highs/lows, volatility (beta) and volume",
+    "FundamentalsAnalyst": "fundamental analysis: valuation (P/E, PEG, P/B), "
+    "profitability, revenue and earnings growth, and balance sheet health",
+    "CashFlowAnalyst": "cash flow strength: operating and free cash flow, capital "
+    "expenditure, dividends, liquidity and debt servicing",
+    "OwnershipAnalyst": "ownership and sentiment: institutional, mutual fund and "
+    "promoter holdings and what their changes say about market confidence",
+}
+
+SPECIALIST_PROMPT = """
+You are the {name} of a stock analysis team for the Indian stock market.
+Your focus is {focus}.
+You receive only the slice of the collected stock data relevant to your focus.
+
+Write at most 3 short sentences with the key numbers behind your view, then end with exactly one line:
+Signal: POSITIVE, NEUTRAL or NEGATIVE
+
+Note : Only use the data provided, never make assumptions. If the data is missing or insufficient, say so and give a NEUTRAL signal.
+"""
+
+AGGREGATOR_PROMPT = """
+You are a Stock Trade Analysis Agent specializing in the Indian stock market. Specialist analysts have each reviewed one part of the collected stock data (price action, fundamentals, cash flow, ownership) and reported their findings with a signal.
+
+Combine their findings into a recommendation: MUST BUY, BUY, SELL, or HOLD.
+
+Decision Logic:
+   - If fundamentals are solid, cash flow strong, sentiment positive + growth is strong → MUST BUY.
+   - If fundamentals are solid, cash flow strong, sentiment positive → BUY.
+   - If fundamentals are strong but ownership/sentiment signals are negative → HOLD or SELL until clarity.
+   - If both fundamentals & sentiment are negative → SELL.
+   - If the signals conflict or the findings are thin, state that more information is needed and lean HOLD.
+
+Output Format (this is shown to the user, be very clear and concise), max 5 sentences:
+   - Stock's current valuation/price trend.
+   - The fundamentals factor that played the major role.
+   - Cash flow and ownership in one sentence.
+   - Key risks; earnings calls, news and regulatory events are not in the collected data, so mention them only as unknowns.
+   - End with: Final recommendation: MUST BUY, BUY, SELL, or HOLD.
+
+Note : Always stick to the specialists' findings and avoid making any assumptions.
+"""
+
+
+def get_specialist_agent(name: str, model_strategy: str = None) -> AssistantAgent:
+    agent = AssistantAgent(
+        name=name,
+        model_client=gtp_model_client.get_budgeted_client(
+            model_strategy or SPECIALIST_MODEL_STRATEGY, stage=name
+        ),
+        system_message=SPECIALIST_PROMPT.format(
+            name=name, focus=SPECIALIST_FOCUS[name]
+        ),
+    )
+    return agent
+
+
+def get_aggregator_agent(model_strategy: str = None) -> AssistantAgent:
+    # Named like the single analysis agent: its message is the final analysis
+    agent = AssistantAgent(
+        name="TradeAnalysisAgent",
+        model_client=gtp_model_client.get_budgeted_client(
+            model_strategy or AGGREGATOR_MODEL_STRATEGY, stage="TradeAnalysisAgent"
+        ),
+        system_message=AGGREGATOR_PROMPT,
+    )
+    return agent
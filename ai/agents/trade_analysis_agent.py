@@ -1,6 +1,10 @@
+import os
 from autogen_agentchat.agents import AssistantAgent
 from ai.models import gtp_model_client
 
+# "deapth-analysis" (gpt-4o), "economic-task" (gpt-4o-mini) or "adaptive"
+DEFAULT_MODEL_STRATEGY = os.getenv("ANALYSIS_MODEL_STRATEGY", "deapth-analysis")
+
 SYSTEM_PROMPT = """
         You are a Stock Trade Analysis Agent specializing in the Indian stock market. Your goal is to analyze a given stock comprehensively and produce a clear recommendation: BUY, SELL, or HOLD.
       Your input will be provided by the previous agent which collects all the necessary data about the stock.
@@ -39,10 +43,12 @@ Instructions tp follow for trade analysis agent:
    """
 
 
-def get_trade_analyst_agent() -> AssistantAgent:
+def get_trade_analyst_agent(model_strategy: str = None) -> AssistantAgent:
     agent = AssistantAgent(
         name="TradeAnalysisAgent",
-        model_client=gtp_model_client.get_openai_client("deapth-analysis"),
+        model_client=gtp_model_client.get_budgeted_client(
+            model_strategy or DEFAULT_MODEL_STRATEGY, stage="TradeAnalysisAgent"
+        ),
         system_message=SYSTEM_PROMPT,
     )
     return agent
@@ -46,7 +46,9 @@ Steps to follow:
 def get_trade_data_collection_agent() -> AssistantAgent:
     agent = AssistantAgent(
         name="TradedataCollectionAgent",
-        model_client=gtp_model_client.get_openai_client("economic-task"),
+        model_client=gtp_model_client.get_budgeted_client(
+            "economic-task", stage="TradedataCollectionAgent"
+        ),
         system_message=SYSTEM_PROMPT,
         tools=[get_full_stock_info],
     )
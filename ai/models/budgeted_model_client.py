@@ -0,0 +1,202 @@
+"""
+Budget-enforcing model client wrapper
+Checks every model call against the session budget in utils.cost_tracker,
+downgrading to the fallback client, shrinking the context or aborting
+"""
+
+import time
+from typing import Any, AsyncGenerator, Mapping, Optional, Sequence, Union
+
+from autogen_core import CancellationToken
+from autogen_core.models import (
+    ChatCompletionClient,
+    CreateResult,
+    FunctionExecutionResultMessage,
+    LLMMessage,
+    ModelCapabilities,
+    ModelInfo,
+    RequestUsage,
+)
+from autogen_core.tools import Tool, ToolSchema
+
+from utils.cost_tracker import BudgetExceededError, check_budget, track_usage
+from utils.tracing import span
+
+TRUNCATION_NOTE = "\n...[truncated to fit the session budget]"
+
+
+def get_model_name(client: ChatCompletionClient) -> str:
+    """Model name a client sends requests to"""
+    return client.model_info.get("model", "default")
+
+
+def shrink_messages(
+    messages: Sequence[LLMMessage], target_tokens: int, prompt_tokens: int
+) -> list:
+    """
+    Cut the longest message contents until the prompt roughly fits
+    Uses the same 4-characters-per-token ratio as the team tracker
+    """
+    excess_chars = max(prompt_tokens - target_tokens, 0) * 4
+    shrunk = list(messages)
+
+    while excess_chars > 0:
+        # Find the longest text payload (tool results are usually the culprit)
+        longest = None
+        for i, message in enumerate(shrunk):
+            if isinstance(message, FunctionExecutionResultMessage):
+                for j, result in enumerate(message.content):
+                    if longest is None or len(result.content) > longest[2]:
+                        longest = (i, j, len(result.content))
+            elif isinstance(message.content, str):
+                if longest is None or len(message.content) > longest[2]:
+                    longest = (i, None, len(message.content))
+
+        if longest is None or longest[2] <= len(TRUNCATION_NOTE):
+            break
+
+        i, j, length = longest
+        keep = max(length - excess_chars - len(TRUNCATION_NOTE), 0)
+        message = shrunk[i]
+        if j is None:
+            shrunk[i] = message.model_copy(
+                update={"content": message.content[:keep] + TRUNCATION_NOTE}
+            )
+        else:
+            results = list(message.content)
+            results[j] = results[j].model_copy(
+                update={"content": results[j].content[:keep] + TRUNCATION_NOTE}
+            )
+            shrunk[i] = message.model_copy(update={"content": results})
+        excess_chars -= length - keep - len(TRUNCATION_NOTE)
+
+    return shrunk
+
+
+class BudgetedChatCompletionClient(ChatCompletionClient):
+    """Wrap a model client with per-session budget checks and exact usage tracking"""
+
+    def __init__(
+        self,
+        client: ChatCompletionClient,
+        fallback_client: Optional[ChatCompletionClient] = None,
+        stage: str = "",
+    ):
+        self._client = client
+        self._fallback_client = fallback_client
+        self.stage = stage
+
+    def _prepare(self, messages: Sequence[LLMMessage], tools):
+        """Run the budget check and pick the client and messages to send"""
+        prompt_tokens = self._client.count_tokens(messages, tools=tools)
+        fallback_model = (
+            get_model_name(self._fallback_client) if self._fallback_client else None
+        )
+        decision = check_budget(
+            get_model_name(self._client), prompt_tokens, self.stage, fallback_model
+        )
+
+        if decision.action == "abort":
+            raise BudgetExceededError(
+                f"{self.stage or 'Model call'} aborted: {decision.reason}"
+            )
+
+        client = self._client
+        if self._fallback_client and decision.model_name == fallback_model:
+            client = self._fallback_client
+        if decision.action == "shrink":
+            messages = shrink_messages(
+                messages, decision.target_prompt_tokens, prompt_tokens
+            )
+        return client, messages
+
+    def _track(
+        self, client: ChatCompletionClient, result: CreateResult, started: float
+    ):
+        track_usage(
+            get_model_name(client),
+            result.usage.prompt_tokens,
+            result.usage.completion_tokens,
+            stage=self.stage,
+            latency_seconds=time.perf_counter() - started,
+        )
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        tool_choice: Any = "auto",
+        json_output: Optional[Any] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        client, messages = self._prepare(messages, tools)
+        model_name = get_model_name(client)
+        started = time.perf_counter()
+        with span(f"llm.{model_name}", stage=self.stage, model=model_name) as llm_span:
+            result = await client.create(
+                messages,
+                tools=tools,
+                tool_choice=tool_choice,
+                json_output=json_output,
+                extra_create_args=extra_create_args,
+                cancellation_token=cancellation_token,
+            )
+            llm_span.set_attribute("prompt_tokens", result.usage.prompt_tokens)
+            llm_span.set_attribute("completion_tokens", result.usage.completion_tokens)
+        self._track(client, result, started)
+        return result
+
+    async def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        tool_choice: Any = "auto",
+        json_output: Optional[Any] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        client, messages = self._prepare(messages, tools)
+        started = time.perf_counter()
+        async for chunk in client.create_stream(
+            messages,
+            tools=tools,
+            tool_choice=tool_choice,
+            json_output=json_output,
+            extra_create_args=extra_create_args,
+            cancellation_token=cancellation_token,
+        ):
+            if isinstance(chunk, CreateResult):
+                self._track(client, chunk, started)
+            yield chunk
+
+    async def close(self) -> None:
+        await self._client.close()
+        if self._fallback_client:
+            await self._fallback_client.close()
+
+    def actual_usage(self) -> RequestUsage:
+        return self._client.actual_usage()
+
+    def total_usage(self) -> RequestUsage:
+        return self._client.total_usage()
+
+    def count_tokens(
+        self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []
+    ) -> int:
+        return self._client.count_tokens(messages, tools=tools)
+
+    def remaining_tokens(
+        self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []
+    ) -> int:
+        return self._client.remaining_tokens(messages, tools=tools)
+
+    @property
+    def capabilities(self) -> ModelCapabilities:  # type: ignore
+        return self._client.capabilities
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return self._client.model_info
@@ -1,35 +1,65 @@
-from autogen_ext.models.openai import OpenAIChatCompletionClient
-import os
-from dotenv import load_dotenv
+from utils.config import get_openai_api_key, model_provider
 
-load_dotenv()
-openai_api_key = os.getenv("OPENAI_API_KEY")
-if not openai_api_key:
-    raise ValueError("Please set the OPENAI_API_KEY environment variable.")
+# Fixed strategies and the model each one uses
+STRATEGY_MODELS = {
+    "economic-task": "gpt-4o-mini",
+    "deapth-analysis": "gpt-4o",
+}
+
+# Strategy that picks a model per request (see ai/models/model_router.py)
+ADAPTIVE_STRATEGY = "adaptive"
 
 
 def get_openai_client(strategy_name: str):
-    if strategy_name == "economic-task":
-        model_info = {
-            "model": "gpt-4o-mini",
-            "vision": False,
-            "function_calling": True,
-            "json_output": False,
-            "family": "gpt-4o",
-            "structured_output": False,
-        }
-        return OpenAIChatCompletionClient(
-            model="gpt-4o-mini", api_key=openai_api_key, model_info=model_info
+    if strategy_name == ADAPTIVE_STRATEGY:
+        from ai.models.model_router import build_routing_client
+
+        return build_routing_client(get_openai_client)
+
+    if strategy_name not in STRATEGY_MODELS:
+        raise ValueError(
+            f"Unknown model strategy '{strategy_name}'. Choose one of: "
+            f"{', '.join(list(STRATEGY_MODELS) + [ADAPTIVE_STRATEGY])}"
         )
-    elif strategy_name == "deapth-analysis":
-        model_info = {
-            "model": "gpt-4o",
-            "vision": False,
-            "function_calling": True,
-            "json_output": False,
-            "family": "gpt-4o",
-            "structured_output": False,
-        }
-        return OpenAIChatCompletionClient(
-            model="gpt-4o", api_key=openai_api_key, model_info=model_info
+
+    model = STRATEGY_MODELS[strategy_name]
+    model_info = {
+        "model": model,
+        "vision": False,
+        "function_calling": True,
+        "json_output": False,
+        "family": "gpt-4o",
+        "structured_output": False,
+    }
+    if model_provider() == "stub":
+        from ai.models.stub_model_client import StubChatCompletionClient
+
+        return StubChatCompletionClient(model=model, model_info=model_info)
+    # The OpenAI SDK is slow to import; only load it for real clients
+    from autogen_ext.models.openai import OpenAIChatCompletionClient
+
+    return OpenAIChatCompletionClient(
+        model=model, api_key=get_openai_api_key(), model_info=model_info
+    )
+
+
+def get_budgeted_client(
+    strategy_name: str, stage: str = "", fallback_strategy: str = "economic-task"
+):
+    """Model client whose calls are checked against the session budget"""
+    from ai.models.budgeted_model_client import BudgetedChatCompletionClient
+
+    if strategy_name == ADAPTIVE_STRATEGY:
+        # Budget-check whichever route the router picks for each request
+        from ai.models.model_router import build_routing_client
+
+        return build_routing_client(
+            lambda route: get_budgeted_client(route, stage, fallback_strategy)
         )
+
+    fallback_client = None
+    if fallback_strategy and fallback_strategy != strategy_name:
+        fallback_client = get_openai_client(fallback_strategy)
+    return BudgetedChatCompletionClient(
+        get_openai_client(strategy_name), fallback_client=fallback_client, stage=stage
+    )
@@ -0,0 +1,343 @@
+"""
+Adaptive model routing
+Chooses the model for each request from the measured prompt size, how hard
+the stock in the payload is to call (volatility, valuation, margins, fresh
+statements), recent per-model latency and the user's tier. Routing rules
+live in config/model_routing.json.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, AsyncGenerator, Callable, Dict, List, Mapping, Optional
+from typing import Sequence, Union
+
+from autogen_core import CancellationToken
+from autogen_core.models import (
+    ChatCompletionClient,
+    CreateResult,
+    FunctionExecutionResultMessage,
+    LLMMessage,
+    ModelCapabilities,
+    ModelInfo,
+    RequestUsage,
+)
+from autogen_core.tools import Tool, ToolSchema
+
+DEFAULT_CONFIG_PATH = os.getenv(
+    "MODEL_ROUTING_CONFIG",
+    os.path.join(os.path.dirname(__file__), "..", "..", "config", "model_routing.json"),
+)
+
+# Tier of the user the current request runs for (set per task by the apps)
+current_user_tier: ContextVar[Optional[str]] = ContextVar(
+    "current_user_tier", default=os.getenv("USER_TIER")
+)
+
+
+def set_user_tier(tier: Optional[str]):
+    """Set the routing tier for the current task"""
+    current_user_tier.set(tier)
+
+
+@dataclass
+class RoutingConfig:
+    """Routing rules loaded from the JSON config file"""
+
+    routes: Dict[str, str] = field(
+        default_factory=lambda: {"fast": "economic-task", "strong": "deapth-analysis"}
+    )
+    default_tier: str = "standard"
+    tiers: Dict[str, Dict[str, bool]] = field(default_factory=dict)
+    thresholds: Dict[str, float] = field(default_factory=dict)
+    # payload metric -> {"above" or "below": bound, "weight": score added}
+    complexity_signals: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    latency_smoothing: float = 0.3
+
+    @classmethod
+    def load(cls, filepath: str = DEFAULT_CONFIG_PATH) -> "RoutingConfig":
+        """Load routing rules, falling back to defaults if the file is missing"""
+        try:
+            with open(filepath) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {}
+        return cls(**data)
+
+    def threshold(self, name: str, default: float) -> float:
+        return float(self.thresholds.get(name, default))
+
+    def tier_rules(self, tier: Optional[str]) -> Dict[str, bool]:
+        return self.tiers.get(tier or self.default_tier) or self.tiers.get(
+            self.default_tier, {}
+        )
+
+
+@dataclass
+class RoutingDecision:
+    """Why a request was sent to a route"""
+
+    route: str
+    strategy: str
+    prompt_tokens: int
+    complexity: float
+    tier: str
+    reason: str
+    timestamp: datetime = field(default_factory=datetime.now)
+
+
+class ModelLatencyTracker:
+    """Exponentially smoothed request latency per strategy, shared process-wide"""
+
+    def __init__(self, smoothing: float = 0.3):
+        self.smoothing = smoothing
+        self._latency: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, strategy: str, seconds: float):
+        with self._lock:
+            previous = self._latency.get(strategy)
+            if previous is None:
+                self._latency[strategy] = seconds
+            else:
+                self._latency[strategy] = (
+                    self.smoothing * seconds + (1 - self.smoothing) * previous
+                )
+
+    def get(self, strategy: str) -> Optional[float]:
+        return self._latency.get(strategy)
+
+
+latency_tracker = ModelLatencyTracker()
+
+# Most recent routing decisions for display and debugging
+routing_log: List[RoutingDecision] = []
+MAX_ROUTING_LOG = 200
+
+
+def _message_text(messages: Sequence[LLMMessage]) -> str:
+    parts = []
+    for message in messages:
+        if isinstance(message, FunctionExecutionResultMessage):
+            parts.extend(result.content for result in message.content)
+        elif isinstance(message.content, str):
+            parts.append(message.content)
+    return "\n".join(parts)
+
+
+# "'Beta': 1.03" in a payload dict, "Fundamentals / Beta: 1.03" in a data slice
+_NUMBER_FIELD = re.compile(
+    r"(?:['\"]([^'\"\n]+)['\"]|(?:^|/ )([A-Z](?:[^:\n/]|/(?! ))*?))\s*:\s*"
+    r"(-?\d+(?:\.\d+)?(?:e[+-]?\d+)?)(?![\w.-])",
+    re.MULTILINE,
+)
+# First column header of a statement frame, its newest period end
+_STATEMENT_PERIOD = re.compile(
+    r"['\"]?(?:Income Statement|Balance Sheet|Cash Flow)['\"]?:\s+(\d{4}-\d{2}-\d{2})"
+)
+
+
+def payload_metrics(text: str, today: Optional[date] = None) -> Dict[str, float]:
+    """
+    Numeric fields of a stock payload plus the metrics derived from them
+    "52-Week Range" (range width over price), "Drawdown" (below the all-time
+    high) and "Statement Age Days" (since the newest statement period end).
+    """
+    metrics = {}
+    for quoted, plain, value in _NUMBER_FIELD.findall(text):
+        metrics.setdefault(quoted or plain, float(value))
+    price = metrics.get("Current Price")
+    if price:
+        if "52-Week High" in metrics and "52-Week Low" in metrics:
+            metrics["52-Week Range"] = (
+                metrics["52-Week High"] - metrics["52-Week Low"]
+            ) / price
+        if metrics.get("All-Time High"):
+            metrics["Drawdown"] = 1 - price / metrics["All-Time High"]
+    periods = _STATEMENT_PERIOD.findall(text)
+    if periods:
+        newest = date.fromisoformat(max(periods))
+        metrics["Statement Age Days"] = ((today or date.today()) - newest).days
+    return metrics
+
+
+def score_complexity(
+    text: str, signals: Dict[str, Dict[str, float]], today: Optional[date] = None
+) -> float:
+    """
+    Sum the weights of the signals whose payload metric crosses its bound
+    A missing metric never counts, so sparse payloads stay routine.
+    """
+    metrics = payload_metrics(text, today)
+    score = 0.0
+    for name, rule in signals.items():
+        value = metrics.get(name)
+        if value is None:
+            continue
+        if ("above" in rule and value > rule["above"]) or (
+            "below" in rule and value < rule["below"]
+        ):
+            score += rule.get("weight", 1)
+    return score
+
+
+class RoutingChatCompletionClient(ChatCompletionClient):
+    """Model client that routes each request to the fast or strong strategy"""
+
+    def __init__(
+        self,
+        client_factory: Callable[[str], ChatCompletionClient],
+        config: Optional[RoutingConfig] = None,
+    ):
+        self.config = config or RoutingConfig.load()
+        self._client_factory = client_factory
+        self._clients: Dict[str, ChatCompletionClient] = {}
+        latency_tracker.smoothing = self.config.latency_smoothing
+
+    def _client(self, route: str) -> ChatCompletionClient:
+        strategy = self.config.routes[route]
+        if strategy not in self._clients:
+            self._clients[strategy] = self._client_factory(strategy)
+        return self._clients[strategy]
+
+    def choose_route(self, messages: Sequence[LLMMessage], tools=()) -> RoutingDecision:
+        """Pick the route for a request"""
+        prompt_tokens = self._client("fast").count_tokens(messages, tools=tools)
+        complexity = score_complexity(
+            _message_text(messages), self.config.complexity_signals
+        )
+        tier = current_user_tier.get() or self.config.default_tier
+        rules = self.config.tier_rules(tier)
+
+        strong_latency = latency_tracker.get(self.config.routes["strong"])
+        max_latency = self.config.threshold("max_strong_latency_seconds", 25.0)
+        hard = complexity >= self.config.threshold("hard_complexity", 5)
+        needs_strong = hard or (
+            prompt_tokens >= self.config.threshold("strong_prompt_tokens", 6000)
+            or complexity >= self.config.threshold("strong_complexity", 3)
+        )
+
+        if not rules.get("allow_strong", True):
+            route, reason = "fast", f"tier '{tier}' is limited to the fast model"
+        elif rules.get("always_strong", False):
+            route, reason = "strong", f"tier '{tier}' always uses the strong model"
+        elif not needs_strong:
+            route, reason = "fast", "routine request: small prompt, few hard signals"
+        elif not hard and strong_latency is not None and strong_latency > max_latency:
+            route = "fast"
+            reason = f"strong model degraded ({strong_latency:.1f}s recent latency)"
+        else:
+            route = "strong"
+            reason = "hard case" if hard else "large prompt or several hard signals"
+
+        decision = RoutingDecision(
+            route=route,
+            strategy=self.config.routes[route],
+            prompt_tokens=prompt_tokens,
+            complexity=complexity,
+            tier=tier,
+            reason=reason,
+        )
+        routing_log.append(decision)
+        del routing_log[:-MAX_ROUTING_LOG]
+        return decision
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        tool_choice: Any = "auto",
+        json_output: Optional[Any] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        decision = self.choose_route(messages, tools)
+        started = time.perf_counter()
+        result = await self._client(decision.route).create(
+            messages,
+            tools=tools,
+            tool_choice=tool_choice,
+            json_output=json_output,
+            extra_create_args=extra_create_args,
+            cancellation_token=cancellation_token,
+        )
+        latency_tracker.observe(decision.strategy, time.perf_counter() - started)
+        return result
+
+    async def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        tool_choice: Any = "auto",
+        json_output: Optional[Any] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        decision = self.choose_route(messages, tools)
+        started = time.perf_counter()
+        async for chunk in self._client(decision.route).create_stream(
+            messages,
+            tools=tools,
+            tool_choice=tool_choice,
+            json_output=json_output,
+            extra_create_args=extra_create_args,
+            cancellation_token=cancellation_token,
+        ):
+            if isinstance(chunk, CreateResult):
+                latency_tracker.observe(
+                    decision.strategy, time.perf_counter() - started
+                )
+            yield chunk
+
+    async def close(self) -> None:
+        for client in self._clients.values():
+            await client.close()
+
+    def actual_usage(self) -> RequestUsage:
+        usages = [client.actual_usage() for client in self._clients.values()]
+        return RequestUsage(
+            prompt_tokens=sum(u.prompt_tokens for u in usages),
+            completion_tokens=sum(u.completion_tokens for u in usages),
+        )
+
+    def total_usage(self) -> RequestUsage:
+        usages = [client.total_usage() for client in self._clients.values()]
+        return RequestUsage(
+            prompt_tokens=sum(u.prompt_tokens for u in usages),
+            completion_tokens=sum(u.completion_tokens for u in usages),
+        )
+
+    def count_tokens(
+        self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []
+    ) -> int:
+        return self._client("fast").count_tokens(messages, tools=tools)
+
+    def remaining_tokens(
+        self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []
+    ) -> int:
+        return self._client("fast").remaining_tokens(messages, tools=tools)
+
+    @property
+    def capabilities(self) -> ModelCapabilities:  # type: ignore
+        return self._client("strong").capabilities
+
+    @property
+    def model_info(self) -> ModelInfo:
+        # Both routes must support what the agent asks of the model
+        return self._client("strong").model_info
+
+
+def build_routing_client(
+    client_factory: Callable[[str], ChatCompletionClient],
+    config_path: Optional[str] = None,
+) -> RoutingChatCompletionClient:
+    """Create a routing client over clients built by client_factory(strategy)"""
+    config = RoutingConfig.load(config_path or DEFAULT_CONFIG_PATH)
+    return RoutingChatCompletionClient(client_factory, config)
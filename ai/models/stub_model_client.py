@@ -0,0 +1,165 @@
+"""
+Stub model client for local runs and tests
+Plays both agents of the team without network access: it calls the first
+tool it is offered with the ticker from the task, and answers everything
+else with a short canned analysis ending in a deterministic verdict.
+Selected with MODEL_PROVIDER=stub (see ai/models/gtp_model_client.py).
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import uuid
+from typing import Any, AsyncGenerator, Callable, Mapping, Optional, Sequence, Union
+
+from autogen_core import CancellationToken, FunctionCall
+from autogen_core.models import (
+    ChatCompletionClient,
+    CreateResult,
+    FunctionExecutionResultMessage,
+    LLMMessage,
+    ModelCapabilities,
+    ModelInfo,
+    RequestUsage,
+)
+from autogen_core.tools import Tool, ToolSchema
+
+# Simulated model latency per call: seconds, or a callable sampling them
+STUB_LATENCY_SECONDS = float(os.getenv("STUB_MODEL_LATENCY_SECONDS", "0"))
+
+_TASK = re.compile(r"stock name\s*:\s*(.+)", re.IGNORECASE)
+_VERDICTS = ("BUY", "HOLD", "SELL")
+
+
+def _message_text(message: LLMMessage) -> str:
+    if isinstance(message, FunctionExecutionResultMessage):
+        return "\n".join(result.content for result in message.content)
+    return message.content if isinstance(message.content, str) else str(message.content)
+
+
+def _tool_schema(tool: Union[Tool, ToolSchema]) -> ToolSchema:
+    return tool.schema if isinstance(tool, Tool) else tool
+
+
+class StubChatCompletionClient(ChatCompletionClient):
+    """Deterministic offline stand-in for the OpenAI client"""
+
+    def __init__(
+        self,
+        model: str,
+        model_info: ModelInfo,
+        latency_seconds: Union[float, Callable[[], float]] = None,
+    ):
+        self._model_info = model_info
+        self._model_info.setdefault("model", model)
+        self.latency_seconds = (
+            STUB_LATENCY_SECONDS if latency_seconds is None else latency_seconds
+        )
+        self._total_usage = RequestUsage(prompt_tokens=0, completion_tokens=0)
+        self._last_usage = RequestUsage(prompt_tokens=0, completion_tokens=0)
+
+    def _reply(self, messages: Sequence[LLMMessage], tools) -> Union[str, list]:
+        texts = [_message_text(message) for message in messages]
+        task = next((m for t in reversed(texts) if (m := _TASK.search(t))), None)
+        ticker = task.group(1).strip() if task else "UNKNOWN"
+        has_results = any(
+            isinstance(message, FunctionExecutionResultMessage) for message in messages
+        )
+
+        if tools and not has_results:
+            schema = _tool_schema(tools[0])
+            parameter = next(iter(schema.get("parameters", {}).get("properties", {})))
+            return [
+                FunctionCall(
+                    id=f"call_{uuid.uuid4().hex[:12]}",
+                    name=schema["name"],
+                    arguments=json.dumps({parameter: ticker}),
+                )
+            ]
+
+        digest = hashlib.blake2b(ticker.upper().encode(), digest_size=1).digest()
+        verdict = _VERDICTS[digest[0] % len(_VERDICTS)]
+        return (
+            f"## {ticker.upper()} analysis (stub model)\n\n"
+            f"Reviewed {sum(len(text) for text in texts):,} characters of collected "
+            "data covering price action, fundamentals, statements and holders.\n\n"
+            f"**Final recommendation: {verdict}**"
+        )
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        tool_choice: Any = "auto",
+        json_output: Optional[Any] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        latency = self.latency_seconds
+        if callable(latency):
+            latency = latency()
+        if latency:
+            await asyncio.sleep(latency)
+        content = self._reply(messages, tools)
+        usage = RequestUsage(
+            prompt_tokens=self.count_tokens(messages, tools=tools),
+            completion_tokens=max(len(str(content)) // 4, 1),
+        )
+        self._last_usage = usage
+        self._total_usage = RequestUsage(
+            prompt_tokens=self._total_usage.prompt_tokens + usage.prompt_tokens,
+            completion_tokens=self._total_usage.completion_tokens
+            + usage.completion_tokens,
+        )
+        return CreateResult(
+            finish_reason="function_calls" if isinstance(content, list) else "stop",
+            content=content,
+            usage=usage,
+            cached=False,
+        )
+
+    async def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        tool_choice: Any = "auto",
+        json_output: Optional[Any] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        result = await self.create(messages, tools=tools)
+        if isinstance(result.content, str):
+            yield result.content
+        yield result
+
+    async def close(self) -> None:
+        pass
+
+    def actual_usage(self) -> RequestUsage:
+        return self._last_usage
+
+    def total_usage(self) -> RequestUsage:
+        return self._total_usage
+
+    def count_tokens(
+        self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []
+    ) -> int:
+        # Same 4-characters-per-token estimate the team tracker uses
+        return sum(len(_message_text(message)) for message in messages) // 4
+
+    def remaining_tokens(
+        self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []
+    ) -> int:
+        return 128000 - self.count_tokens(messages, tools=tools)
+
+    @property
+    def capabilities(self) -> ModelCapabilities:  # type: ignore
+        return self._model_info
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return self._model_info
@@ -0,0 +1,179 @@
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import pandas as pd
+from autogen_agentchat.base import TaskResult
+from autogen_agentchat.messages import (
+    TextMessage,
+    ToolCallExecutionEvent,
+    ToolCallSummaryMessage,
+)
+
+from ai.tools.speculative_prefetch import prefetcher
+from ai.tools.stock_information_tool import get_cached_snapshot
+from ai.teams.team_pool import TeamPool
+from ai.teams.trade_recommendation_team import trade_recommendation_team
+from utils.autogen_tracker import get_team_summary, track_autogen_result
+from utils.cost_tracker import (
+    cost_tracker,
+    end_tracking,
+    get_session_summary,
+    start_tracking,
+)
+from utils.payload_parser import parse_payload
+from utils.recommendation_store import extract_recommendation
+from utils.serialization import to_jsonable
+from utils.stock_data_view import extract_tables
+from utils.tracing import span
+
+
+@dataclass
+class AnalysisResult:
+    """Outputs of one stock analysis run"""
+
+    stock_symbol: str
+    final_analysis: Optional[str]
+    stock_data: Optional[str]
+    session_summary: str
+    team_summary: Dict[str, Any]
+    analysed_at: float = field(default_factory=time.time)
+    # Typed statement / holder tables of the fetched snapshot, for rendering
+    tables: Dict[str, pd.DataFrame] = field(default_factory=dict)
+    # Structured cost session summary (tokens, cost, models)
+    usage: Dict[str, Any] = field(default_factory=dict)
+    # Seconds until the stock data arrived and until the run finished
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def recommendation(self) -> Optional[str]:
+        return extract_recommendation(self.final_analysis)
+
+    def to_record(self) -> Dict[str, Any]:
+        """JSON-ready summary of the run (data snapshot, verdict, usage, timings)"""
+        payload = parse_payload(self.stock_data) if self.stock_data else None
+        return to_jsonable(
+            {
+                "ticker": self.stock_symbol,
+                "resolved_ticker": (payload or {}).get("Ticker"),
+                "recommendation": self.recommendation,
+                "final_analysis": self.final_analysis,
+                "stock_data": payload if payload is not None else self.stock_data,
+                "usage": self.usage,
+                "team": self.team_summary,
+                "timings": self.timings,
+                "analysed_at": time.strftime(
+                    "%Y-%m-%dT%H:%M:%S", time.localtime(self.analysed_at)
+                ),
+            }
+        )
+
+
+def extract_team_outputs(
+    messages: Sequence[Any],
+) -> Tuple[Optional[str], Optional[str]]:
+    """Final analysis text and collected stock data from a team conversation"""
+    trade_final_analysis = None
+    trade_data_collection = None
+
+    for message in messages:
+        # Get the final analysis from TradeAnalysisAgent
+        if isinstance(message, TextMessage) and message.source == "TradeAnalysisAgent":
+            trade_final_analysis = message.content
+        # Get the tool execution result (stock data)
+        elif (
+            isinstance(message, ToolCallExecutionEvent)
+            and message.source == "TradedataCollectionAgent"
+        ):
+            # Extract the actual function result content
+            if message.content and len(message.content) > 0:
+                trade_data_collection = message.content[0].content
+        elif (
+            isinstance(message, ToolCallSummaryMessage)
+            and message.source == "TradedataCollectionAgent"
+        ):
+            trade_data_collection = message.content
+
+    return trade_final_analysis, trade_data_collection
+
+
+def snapshot_tables(stock_data: Optional[str]) -> Dict[str, pd.DataFrame]:
+    """Statement and holder DataFrames behind the collected data, while cached"""
+    payload = parse_payload(stock_data) if stock_data else None
+    ticker = payload.get("Ticker") if isinstance(payload, dict) else None
+    if not isinstance(ticker, str):
+        return {}
+    return extract_tables(get_cached_snapshot(ticker))
+
+
+async def _run_team(
+    team, task: TextMessage, on_update, timings: Dict[str, float]
+) -> TaskResult:
+    """Consume the team's event stream, reporting outputs as soon as they arrive"""
+    started = time.perf_counter()
+    result = None
+    async for item in team.run_stream(task=task):
+        if isinstance(item, TaskResult):
+            result = item
+            continue
+        final_analysis, stock_data = extract_team_outputs([item])
+        # The tool result arrives twice (execution event and summary message)
+        if stock_data and "data_seconds" not in timings:
+            timings["data_seconds"] = time.perf_counter() - started
+            if on_update is not None:
+                on_update(stock_data=stock_data, tables=snapshot_tables(stock_data))
+        if final_analysis and on_update is not None:
+            on_update(final_analysis=final_analysis)
+    return result
+
+
+async def run_stock_analysis(
+    stock_symbol: str,
+    app_type: str = "console",
+    team_pool: Optional[TeamPool] = None,
+    on_update: Optional[Callable[..., None]] = None,
+    topology: Optional[str] = None,
+) -> AnalysisResult:
+    """
+    Run the agent team for one stock with its own cost session and team tracker
+    on_update(stock_data=...) / on_update(final_analysis=...) is called the
+    moment each output appears in the team's event stream.
+    topology picks the team when no team_pool is given (default TEAM_TOPOLOGY);
+    a pool builds teams with its own factory.
+    The likely snapshots are prefetched while the data agent picks its tool call.
+    Safe to run concurrently in separate asyncio tasks
+    """
+    start_tracking(stock_symbol, app_type=app_type)
+    prefetch = prefetcher.start(stock_symbol)
+    started = time.perf_counter()
+    timings: Dict[str, float] = {}
+    try:
+        task = TextMessage(content=f"stock name : {stock_symbol}", source="user")
+        with span("team.run", stock_name=stock_symbol):
+            if team_pool is not None:
+                async with team_pool.team() as team:
+                    result = await _run_team(team, task, on_update, timings)
+            else:
+                result = await _run_team(
+                    trade_recommendation_team(topology), task, on_update, timings
+                )
+
+        # Track AutoGen team conversation
+        track_autogen_result(result)
+        final_analysis, stock_data = extract_team_outputs(result.messages)
+        timings["total_seconds"] = time.perf_counter() - started
+
+        return AnalysisResult(
+            stock_symbol=stock_symbol,
+            final_analysis=final_analysis,
+            stock_data=stock_data,
+            session_summary=get_session_summary(),
+            team_summary=get_team_summary(),
+            tables=snapshot_tables(stock_data),
+            usage=cost_tracker.get_session_summary(),
+            timings=timings,
+        )
+    finally:
+        prefetch.finish()
+        # Close the session so its usage is appended to the usage ledger
+        end_tracking()
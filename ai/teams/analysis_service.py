@@ -0,0 +1,211 @@
+"""
+Queued Analysis Service
+A fixed pool of worker tasks pulling analyses from a bounded queue on one
+event loop. Requests for a ticker that is already queued or running join
+that run, finished analyses are served from a TTL cache, and every run
+publishes events (queued, started, stock_data, final_analysis, result or
+error) that any number of listeners can stream.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from ai.teams.analysis_runner import run_stock_analysis
+from ai.teams.team_pool import TeamPool
+from utils.metrics import api_queue_depth, api_rejections
+from utils.ttl_cache import TTLCache
+
+API_WORKERS = int(os.getenv("API_WORKERS", "4"))
+API_QUEUE_SIZE = int(os.getenv("API_QUEUE_SIZE", "32"))
+API_RESULT_TTL_SECONDS = float(os.getenv("API_RESULT_TTL_SECONDS", "900"))
+
+# Events after which a ticket publishes nothing more
+TERMINAL_EVENTS = ("result", "error")
+
+
+class QueueFullError(Exception):
+    """Raised when an analysis can't be queued; clients should retry later"""
+
+
+class AnalysisTicket:
+    """One analysis run and the events it has published so far"""
+
+    def __init__(self, ticker: str):
+        self.ticker = ticker
+        self.created_at = time.time()
+        self.events: List[Tuple[str, Dict[str, Any]]] = []
+        self._listeners: List[asyncio.Queue] = []
+        self._done = asyncio.get_running_loop().create_future()
+
+    @property
+    def finished(self) -> bool:
+        return self._done.done()
+
+    @property
+    def failed(self) -> bool:
+        return self.finished and self.events[-1][0] == "error"
+
+    def publish(self, event: str, data: Dict[str, Any]):
+        self.events.append((event, data))
+        for listener in self._listeners:
+            listener.put_nowait((event, data))
+        if event in TERMINAL_EVENTS and not self._done.done():
+            self._done.set_result(data)
+
+    async def wait(self) -> Dict[str, Any]:
+        """Data of the terminal event (the result record or the error)"""
+        return await asyncio.shield(self._done)
+
+    async def stream(self) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Every event of the run, starting with those already published"""
+        listener: asyncio.Queue = asyncio.Queue()
+        for item in self.events:
+            listener.put_nowait(item)
+        self._listeners.append(listener)
+        try:
+            while True:
+                event, data = await listener.get()
+                yield event, data
+                if event in TERMINAL_EVENTS:
+                    return
+        finally:
+            self._listeners.remove(listener)
+
+
+class AnalysisService:
+    """Bounded worker pool running analyses for every request of the process"""
+
+    def __init__(
+        self,
+        workers: int = API_WORKERS,
+        queue_size: int = API_QUEUE_SIZE,
+        result_ttl_seconds: float = API_RESULT_TTL_SECONDS,
+        team_pool: Optional[TeamPool] = None,
+        app_type: str = "api",
+    ):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.team_pool = team_pool or TeamPool(max_idle=workers)
+        self.results = TTLCache("api_analysis", result_ttl_seconds, maxsize=256)
+        self.app_type = app_type
+        self._queue: Optional[asyncio.Queue] = None
+        self._in_flight: Dict[str, AnalysisTicket] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.running = 0
+
+    async def start(self):
+        """Start the workers on the running loop"""
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"analysis-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def free_slots(self) -> int:
+        return self.queue_size - self.queued
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "queued": self.queued,
+            "queue_size": self.queue_size,
+            "cached_results": len(self.results),
+        }
+
+    def needs_slot(self, ticker: str) -> bool:
+        """Whether submitting ticker would take a queue slot"""
+        ticker = ticker.strip().upper()
+        return ticker not in self._in_flight and self.results.get(ticker) is None
+
+    def submit(self, ticker: str) -> AnalysisTicket:
+        """
+        Ticket for ticker: a cached result, the run already in flight, or a new
+        queued run. Raises QueueFullError when the queue is full.
+        """
+        ticker = ticker.strip().upper()
+        cached = self.results.get(ticker)
+        if cached is not None:
+            ticket = AnalysisTicket(ticker)
+            ticket.publish("result", {**cached, "cached": True})
+            return ticket
+        if ticker in self._in_flight:
+            return self._in_flight[ticker]
+
+        ticket = AnalysisTicket(ticker)
+        try:
+            self._queue.put_nowait(ticket)
+        except asyncio.QueueFull:
+            api_rejections.inc()
+            raise QueueFullError(
+                f"Analysis queue is full ({self.queue_size} waiting); retry later"
+            ) from None
+        self._in_flight[ticker] = ticket
+        api_queue_depth.set(self.queued)
+        ticket.publish("queued", {"ticker": ticker, "position": self.queued})
+        return ticket
+
+    async def _worker(self):
+        while True:
+            ticket = await self._queue.get()
+            api_queue_depth.set(self.queued)
+            self.running += 1
+            try:
+                await self._run(ticket)
+            finally:
+                self.running -= 1
+                self._in_flight.pop(ticket.ticker, None)
+                self._queue.task_done()
+
+    async def _run(self, ticket: AnalysisTicket):
+        ticket.publish(
+            "started",
+            {
+                "ticker": ticket.ticker,
+                "waited_seconds": time.time() - ticket.created_at,
+            },
+        )
+
+        def on_update(stock_data=None, final_analysis=None, **_):
+            if stock_data:
+                ticket.publish(
+                    "stock_data", {"ticker": ticket.ticker, "stock_data": stock_data}
+                )
+            if final_analysis:
+                ticket.publish(
+                    "final_analysis",
+                    {"ticker": ticket.ticker, "final_analysis": final_analysis},
+                )
+
+        try:
+            result = await run_stock_analysis(
+                ticket.ticker,
+                app_type=self.app_type,
+                team_pool=self.team_pool,
+                on_update=on_update,
+            )
+        except asyncio.CancelledError:
+            ticket.publish("error", {"ticker": ticket.ticker, "error": "cancelled"})
+            raise
+        except Exception as e:
+            ticket.publish(
+                "error", {"ticker": ticket.ticker, "error": f"{type(e).__name__}: {e}"}
+            )
+            return
+
+        record = result.to_record()
+        if result.stock_data or result.final_analysis:
+            self.results.set(ticket.ticker, record)
+        ticket.publish("result", record)
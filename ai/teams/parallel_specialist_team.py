@@ -0,0 +1,218 @@
+"""
+Parallel Specialist Team
+An alternative to the round-robin team: the data collection agent fetches
+the stock data as before, then specialist agents analyse their own slice of
+it concurrently on the cheaper model, and a short aggregation agent turns
+their findings into the final recommendation. The analysis latency becomes
+that of the slowest specialist plus a short generation, instead of one
+long gpt-4o generation over the whole payload.
+
+The team streams the same kinds of messages as RoundRobinGroupChat and
+ends with a TaskResult, so run_stock_analysis and TeamPool use either
+topology unchanged.
+"""
+
+import asyncio
+from typing import AsyncGenerator, Dict, List, Optional, Sequence, Tuple, Union
+
+from autogen_agentchat.agents import AssistantAgent
+from autogen_agentchat.base import Response, TaskResult
+from autogen_agentchat.messages import (
+    TextMessage,
+    ToolCallExecutionEvent,
+    ToolCallSummaryMessage,
+)
+from autogen_core import CancellationToken
+
+from ai.agents.change_gated_agent import ChangeGate, change_gate
+from ai.agents.specialist_agents import (
+    SPECIALIST_FOCUS,
+    get_aggregator_agent,
+    get_specialist_agent,
+)
+from ai.agents.trade_data_collection_agent import get_trade_data_collection_agent
+from utils.number_formatter import format_value_for_console
+from utils.payload_parser import parse_payload
+
+# Specialist -> payload sections it reads (("Financials", "Cash Flow") is nested)
+SPECIALIST_DATA: Dict[str, Tuple[Tuple[str, ...], ...]] = {
+    "PriceActionAnalyst": (
+        ("Ticker",),
+        ("Current Price",),
+        ("Open",),
+        ("Day High",),
+        ("Day Low",),
+        ("Volume",),
+        ("52-Week High",),
+        ("52-Week Low",),
+        ("All-Time High",),
+        ("All-Time Low",),
+        ("Fundamentals", "Beta"),
+        ("Fundamentals", "52 Week Change"),
+    ),
+    "FundamentalsAnalyst": (
+        ("Ticker",),
+        ("Current Price",),
+        ("Fundamentals",),
+        ("Company Info", "Sector"),
+        ("Company Info", "Industry"),
+        ("Financials", "Income Statement"),
+        ("Financials", "Balance Sheet"),
+    ),
+    "CashFlowAnalyst": (
+        ("Ticker",),
+        ("Fundamentals", "Market Cap"),
+        ("Fundamentals", "Dividend Yield"),
+        ("Financials", "Cash Flow"),
+        ("Financials", "Balance Sheet"),
+    ),
+    "OwnershipAnalyst": (
+        ("Ticker",),
+        ("Company Info", "Name"),
+        ("Company Info", "Sector"),
+        ("Holders", "Institutional Holders"),
+        ("Holders", "Mutual Fund Holders"),
+        ("Holders", "Major Holders"),
+    ),
+}
+
+
+def data_slice(payload: dict, paths: Sequence[Tuple[str, ...]]) -> str:
+    """The payload sections at paths as compact "Section: value" lines"""
+    lines = []
+    for path in paths:
+        value = payload
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        if value is None:
+            continue
+        lines.append(f"{' / '.join(path)}: {format_value_for_console(value)}")
+    return "\n".join(lines)
+
+
+class ParallelSpecialistTeam:
+    """Data agent, then specialists in parallel, then the aggregation agent"""
+
+    def __init__(
+        self,
+        data_agent: AssistantAgent,
+        specialists: Dict[str, AssistantAgent],
+        aggregator: AssistantAgent,
+        gate: Optional[ChangeGate] = None,
+    ):
+        self.data_agent = data_agent
+        self.specialists = specialists
+        self.aggregator = aggregator
+        self.gate = gate or change_gate
+
+    @property
+    def participants(self) -> List[AssistantAgent]:
+        return [self.data_agent, *self.specialists.values(), self.aggregator]
+
+    async def reset(self):
+        token = CancellationToken()
+        for agent in self.participants:
+            await agent.on_reset(token)
+
+    async def _agent_stream(
+        self, agent: AssistantAgent, message: TextMessage, token: CancellationToken
+    ):
+        """The agent's inner events and its final chat message"""
+        async for item in agent.on_messages_stream([message], token):
+            yield item.chat_message if isinstance(item, Response) else item
+
+    async def _consult(
+        self, name: str, text: str, token: CancellationToken
+    ) -> Tuple[str, List]:
+        agent = self.specialists[name]
+        response = await agent.on_messages(
+            [TextMessage(content=text, source="user")], token
+        )
+        return name, [*(response.inner_messages or []), response.chat_message]
+
+    async def run_stream(
+        self,
+        *,
+        task: Union[str, TextMessage],
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> AsyncGenerator[Union[object, TaskResult], None]:
+        token = cancellation_token or CancellationToken()
+        if isinstance(task, str):
+            task = TextMessage(content=task, source="user")
+        messages = [task]
+        yield task
+
+        # 1. Data collection: the same agent and tool call as the round-robin team
+        stock_data = None
+        async for message in self._agent_stream(self.data_agent, task, token):
+            messages.append(message)
+            yield message
+            if isinstance(message, ToolCallSummaryMessage):
+                stock_data = message.content
+            elif isinstance(message, ToolCallExecutionEvent) and message.content:
+                stock_data = message.content[0].content
+
+        payload = parse_payload(stock_data) if stock_data else None
+        if not isinstance(payload, dict):
+            yield TaskResult(messages=messages, stop_reason="No stock data collected")
+            return
+
+        # Unchanged data: the last recommendation stands, no specialist runs
+        snapshot = self.gate.snapshot(stock_data)
+        reused = self.gate.reuse(snapshot)
+        if reused is not None:
+            message = TextMessage(content=reused, source=self.aggregator.name)
+            messages.append(message)
+            yield message
+            yield TaskResult(messages=messages, stop_reason="No material change")
+            return
+
+        # 2. Specialists on their own slices, concurrently; findings stream as they land
+        consultations = [
+            asyncio.create_task(
+                self._consult(
+                    name,
+                    f"{task.content}\n\n{data_slice(payload, SPECIALIST_DATA[name])}",
+                    token,
+                )
+            )
+            for name in self.specialists
+        ]
+        findings: Dict[str, str] = {}
+        try:
+            for finished in asyncio.as_completed(consultations):
+                name, produced = await finished
+                findings[name] = produced[-1].content
+                for message in produced:
+                    messages.append(message)
+                    yield message
+        finally:
+            for consultation in consultations:
+                consultation.cancel()
+
+        # 3. Short aggregation over the findings, in a fixed order
+        report = "\n\n".join(
+            f"### {name}\n{findings[name]}" for name in self.specialists
+        )
+        aggregation = TextMessage(
+            content=f"{task.content}\n\nSpecialist findings:\n\n{report}",
+            source="user",
+        )
+        async for message in self._agent_stream(self.aggregator, aggregation, token):
+            messages.append(message)
+            yield message
+            if (
+                isinstance(message, TextMessage)
+                and message.source == self.aggregator.name
+            ):
+                self.gate.record(snapshot, message.content)
+
+        yield TaskResult(messages=messages, stop_reason="Aggregation finished")
+
+
+def parallel_specialist_team() -> ParallelSpecialistTeam:
+    return ParallelSpecialistTeam(
+        data_agent=get_trade_data_collection_agent(),
+        specialists={name: get_specialist_agent(name) for name in SPECIALIST_FOCUS},
+        aggregator=get_aggregator_agent(),
+    )
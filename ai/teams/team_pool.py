@@ -0,0 +1,68 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+from utils.metrics import record_cache_lookup
+
+if TYPE_CHECKING:
+    from autogen_agentchat.teams import BaseGroupChat
+
+
+class TeamPool:
+    """
+    Reusable teams (and the model clients inside them) for repeated runs
+    Teams hold asyncio queues and HTTP connections bound to the event loop
+    they ran on, so idle teams are kept per loop and only reused there.
+    """
+
+    def __init__(
+        self,
+        team_factory: Optional[Callable[[], "BaseGroupChat"]] = None,
+        max_idle: int = 4,
+    ):
+        if team_factory is None:
+            # Agents and autogen load with the first team, not with the pool
+            from ai.teams.trade_recommendation_team import trade_recommendation_team
+
+            team_factory = trade_recommendation_team
+        self.team_factory = team_factory
+        self.max_idle = max_idle
+        # event loop -> idle teams
+        self._idle: Dict[asyncio.AbstractEventLoop, List["BaseGroupChat"]] = {}
+        self._lock = threading.Lock()
+
+    def _acquire(self, loop: asyncio.AbstractEventLoop) -> "BaseGroupChat":
+        with self._lock:
+            # Teams of finished loops can never run again
+            for closed in [other for other in self._idle if other.is_closed()]:
+                del self._idle[closed]
+            idle = self._idle.get(loop)
+            team = idle.pop() if idle else None
+        record_cache_lookup("team_pool", team is not None)
+        return team if team is not None else self.team_factory()
+
+    async def _release(self, loop: asyncio.AbstractEventLoop, team: "BaseGroupChat"):
+        try:
+            # Clear the agents' conversation state before the next run
+            await team.reset()
+        except Exception:
+            return
+        with self._lock:
+            idle = self._idle.setdefault(loop, [])
+            if len(idle) < self.max_idle:
+                idle.append(team)
+
+    @asynccontextmanager
+    async def team(self):
+        """Borrow a team for one run: `async with pool.team() as team:`"""
+        loop = asyncio.get_running_loop()
+        team = self._acquire(loop)
+        yield team
+        # Only reached when the run finished; a failed run's team is dropped
+        await self._release(loop, team)
+
+    def clear(self):
+        """Drop every idle team so the next runs build fresh ones"""
+        with self._lock:
+            self._idle.clear()
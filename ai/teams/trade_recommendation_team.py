@@ -1,13 +1,34 @@
+import os
 from autogen_agentchat.teams import RoundRobinGroupChat
 from autogen_agentchat.messages import TextMessage
 from ai.agents.trade_data_collection_agent import get_trade_data_collection_agent
 from ai.agents.trade_analysis_agent import get_trade_analyst_agent
+from ai.agents.change_gated_agent import ChangeGatedAgent
 
+# "round_robin": data agent, then one analysis agent over all the data
+# "parallel": specialists analyse slices concurrently, then a short aggregation
+#             (see ai/teams/parallel_specialist_team.py)
+TEAM_TOPOLOGY = os.getenv("TEAM_TOPOLOGY", "round_robin")
+TEAM_TOPOLOGIES = ("round_robin", "parallel")
+
+
+def trade_recommendation_team(topology: str = None):
+    topology = topology or TEAM_TOPOLOGY
+    if topology == "parallel":
+        from ai.teams.parallel_specialist_team import parallel_specialist_team
+
+        return parallel_specialist_team()
+    if topology != "round_robin":
+        raise ValueError(
+            f"Unknown team topology '{topology}'. Choose one of: "
+            f"{', '.join(TEAM_TOPOLOGIES)}"
+        )
 
-def trade_recommendation_team():
     # Create agent instances, not function references
     data_agent = get_trade_data_collection_agent()  # This function takes no parameters
     analysis_agent = get_trade_analyst_agent()  # This function also takes no parameters
+    # Reuses the last recommendation when the data has not moved materially
+    analysis_agent = ChangeGatedAgent(analysis_agent)
 
     team = RoundRobinGroupChat(
         participants=[data_agent, analysis_agent],
@@ -0,0 +1,323 @@
+"""
+Market-Hours Snapshot Warmer
+Keeps the snapshots users are about to ask for in the snapshot cache, so
+a first click is served at cache speed. Demand is what the UIs register
+with watch() (sidebar sample stocks, watchlists) plus the tickers analysed
+in the most sessions of the last WARM_LOOKBACK_HOURS of the usage ledger,
+up to WARM_TICKERS in all. Refreshes follow the NSE calendar
+(utils/market_calendar.py):
+  - pre-open: one full refresh per trading day, every snapshot refetched,
+  - market hours: every WARM_QUOTE_INTERVAL_MINUTES the quotes of all warm
+    tickers come from one bulk download and are patched into the cached
+    snapshots; tickers not cached yet are fetched in full,
+  - after the close: a last quote refresh, kept until the next pre-open.
+Fetches run on WARM_WORKERS threads and wait while interactive fetches
+(tool calls, speculative prefetches) run. A fetch in flight is registered
+with the prefetcher, so a tool call for it joins it instead of fetching
+again. Set WARM_TICKERS=0 to turn the warmer off.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ai.tools import stock_information_tool as tool
+from ai.tools.speculative_prefetch import prefetcher, resolve_candidates
+from utils.cost_tracker import DEFAULT_LEDGER_PATH
+from utils.market_calendar import (
+    PHASE_CLOSED,
+    PHASE_OPEN,
+    MarketCalendar,
+    market_calendar,
+)
+from utils.metrics import warm_fetches, warm_refreshes, warm_yields
+from utils.tracing import span
+
+# Most tickers kept warm; 0 turns the warmer off
+WARM_TICKERS = int(os.getenv("WARM_TICKERS", "24"))
+# Most-requested tickers of the usage ledger kept warm besides the watched ones
+WARM_TOP_REQUESTED = int(os.getenv("WARM_TOP_REQUESTED", "10"))
+WARM_LOOKBACK_HOURS = float(os.getenv("WARM_LOOKBACK_HOURS", "24"))
+WARM_QUOTE_INTERVAL_MINUTES = float(os.getenv("WARM_QUOTE_INTERVAL_MINUTES", "5"))
+WARM_WORKERS = int(os.getenv("WARM_WORKERS", "2"))
+# The ledger ranking is recomputed at most this often
+REQUESTED_REFRESH_SECONDS = 3600
+# How often a waiting fetch checks whether the interactive fetches finished
+YIELD_POLL_SECONDS = 0.25
+
+# Snapshot fields a quote replaces
+QUOTE_FIELDS = {
+    "Current Price": "Price",
+    "Open": "Open",
+    "Day High": "Day High",
+    "Day Low": "Day Low",
+    "Volume": "Volume",
+}
+
+
+def patch_snapshot(snapshot: Dict[str, Any], quote: Dict[str, Any]) -> Dict[str, Any]:
+    """Snapshot with the price fields of a fresher quote"""
+    patched = dict(snapshot)
+    for field, quote_field in QUOTE_FIELDS.items():
+        if quote.get(quote_field) is not None:
+            patched[field] = quote[quote_field]
+    price = patched.get("Current Price")
+    if price is not None:
+        for field, pick in (
+            ("All-Time High", max),
+            ("52-Week High", max),
+            ("All-Time Low", min),
+            ("52-Week Low", min),
+        ):
+            if patched.get(field) is not None:
+                patched[field] = pick(patched[field], price)
+    return patched
+
+
+class SnapshotWarmer:
+    """Background thread keeping the snapshots of popular tickers cached"""
+
+    def __init__(
+        self,
+        max_tickers: int = WARM_TICKERS,
+        top_requested: int = WARM_TOP_REQUESTED,
+        quote_interval_seconds: float = WARM_QUOTE_INTERVAL_MINUTES * 60,
+        workers: int = WARM_WORKERS,
+        ledger_path: Optional[str] = DEFAULT_LEDGER_PATH,
+        calendar: MarketCalendar = market_calendar,
+    ):
+        self.max_tickers = max_tickers
+        self.top_requested = top_requested
+        self.quote_interval_seconds = quote_interval_seconds
+        self.workers = workers
+        self.ledger_path = ledger_path
+        self.lookback_seconds = WARM_LOOKBACK_HOURS * 3600
+        self.calendar = calendar
+        # query -> when a UI last showed it
+        self._watched: Dict[str, float] = {}
+        self._requested: List[str] = []
+        self._requested_at = 0.0
+        self._full_refresh_day: Optional[date] = None
+        self._settled_close: Optional[datetime] = None
+        self._last_refresh: Optional[Tuple[str, float]] = None
+        self._last_error: Optional[Tuple[str, float]] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_tickers > 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def watch(self, queries: Iterable[str]):
+        """Keep what a UI shows warm for the next WARM_LOOKBACK_HOURS"""
+        now = time.time()
+        with self._lock:
+            for query in queries:
+                if query.strip():
+                    self._watched[query.strip()] = now
+
+    def requested(self) -> List[str]:
+        """Tickers analysed in the most sessions of the lookback window"""
+        if not self.ledger_path or self.top_requested <= 0:
+            return []
+        if time.time() - self._requested_at < REQUESTED_REFRESH_SECONDS:
+            return self._requested
+        import pandas as pd
+
+        from utils.usage_analytics import load_usage_frame, most_requested
+
+        try:
+            df = load_usage_frame(self.ledger_path)
+        except (OSError, ValueError):
+            # No ledger yet
+            df = None
+        since = pd.Timestamp.now() - pd.Timedelta(seconds=self.lookback_seconds)
+        self._requested = (
+            most_requested(df, since, self.top_requested) if df is not None else []
+        )
+        self._requested_at = time.time()
+        return self._requested
+
+    def targets(self) -> List[Tuple[str, ...]]:
+        """(symbol to fetch, other keys it answers) per warm ticker, watched first"""
+        cutoff = time.time() - self.lookback_seconds
+        with self._lock:
+            for query in [q for q, at in self._watched.items() if at < cutoff]:
+                del self._watched[query]
+            queries = list(self._watched)
+        targets, keys = [], set()
+        for query in queries + self.requested():
+            # The snapshot a speculative prefetch would start with
+            candidates = resolve_candidates(query, prefetcher.aliases)
+            # "HDFC Bank" and "HDFCBANK" both answer HDFCBANK.NS
+            if candidates and keys.isdisjoint(candidates[0]):
+                targets.append(candidates[0])
+                keys.update(candidates[0])
+        return targets[: self.max_tickers]
+
+    def start(self) -> bool:
+        """Start the background thread (idempotent); False when disabled"""
+        if not self.enabled:
+            return False
+        with self._lock:
+            if not self.running:
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="snapshot-warmer", daemon=True
+                )
+                self._thread.start()
+        return True
+
+    def stop(self):
+        """Stop after the fetches already running"""
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                # Retried at the next round; counted and reported by status()
+                warm_refreshes.inc(kind="failed")
+                self._last_error = (f"{type(e).__name__}: {e}"[:200], time.time())
+            now = self.calendar.now()
+            until_change = (self.calendar.next_change(now) - now).total_seconds()
+            self._stop.wait(max(1.0, min(self.quote_interval_seconds, until_change)))
+
+    def tick(self, now: Optional[datetime] = None) -> Optional[str]:
+        """Run the refresh due at now and return its kind (full/quotes), if any"""
+        now = now or self.calendar.now()
+        phase = self.calendar.phase(now)
+        if phase == PHASE_CLOSED:
+            # Closing prices hold until the next pre-open
+            last_close = self.calendar.last_close(now)
+            if self._settled_close == last_close:
+                return None
+            self._settled_close = last_close
+            kind = "quotes"
+        elif self._full_refresh_day != now.date():
+            self._full_refresh_day = now.date()
+            kind = "full"
+        elif phase == PHASE_OPEN:
+            kind = "quotes"
+        else:
+            return None
+
+        targets = self.targets()
+        ttl = self._ttl(now, phase)
+        with span(f"warmer.{kind}", tickers=len(targets)):
+            if kind == "full":
+                self._fetch_all(targets, ttl)
+            else:
+                self._refresh_quotes(targets, ttl)
+        warm_refreshes.inc(kind=kind)
+        self._last_refresh = (kind, time.time())
+        return kind
+
+    def _ttl(self, now: datetime, phase: str) -> float:
+        # Outlives one missed round; outside market hours, until the next phase
+        margin = 2 * self.quote_interval_seconds
+        if phase == PHASE_OPEN:
+            return margin
+        return (self.calendar.next_change(now) - now).total_seconds() + margin
+
+    def _refresh_quotes(self, targets: List[Tuple[str, ...]], ttl: float):
+        from ai.tools.watchlist_data import fetch_quotes
+
+        cached, missing = {}, []
+        for target in targets:
+            snapshot = tool.snapshot_cache.peek(target[0])
+            if snapshot is None:
+                missing.append(target)
+            else:
+                cached[target[0]] = snapshot
+        if cached:
+            self._wait_for_interactive()
+            try:
+                quotes = fetch_quotes({s["Ticker"] for s in cached.values()})
+            except Exception:
+                # Retried next round; the snapshots stay as they are
+                quotes = {}
+            for symbol, snapshot in cached.items():
+                quote = quotes.get(snapshot["Ticker"])
+                if quote is None:
+                    warm_fetches.inc(result="failed")
+                    continue
+                patched = patch_snapshot(snapshot, quote)
+                for key in {symbol, snapshot["Ticker"]}:
+                    tool.snapshot_cache.set(key, patched, ttl)
+                warm_fetches.inc(result="patched")
+        self._fetch_all(missing, ttl)
+
+    def _fetch_all(self, targets: List[Tuple[str, ...]], ttl: float):
+        if not targets:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="warmer"
+            )
+        wait([self._executor.submit(self._warm, target, ttl) for target in targets])
+
+    def _warm(self, target: Tuple[str, ...], ttl: float):
+        symbol = target[0]
+        self._wait_for_interactive()
+        if self._stop.is_set():
+            return
+        prefetch = prefetcher.register(symbol, target)
+        if prefetch is None:
+            # A speculative prefetch is fetching it already
+            warm_fetches.inc(result="skipped")
+            return
+        try:
+            with span("warmer.fetch", ticker=symbol):
+                data = tool._fetch_and_index(symbol)
+            for key in {symbol, data["Ticker"]}:
+                tool.snapshot_cache.set(key, data, ttl)
+            prefetch.future.set_result(data)
+            warm_fetches.inc(result="fetched")
+        except Exception as e:
+            # A tool call that joined this fetch falls back to its own
+            prefetch.future.set_exception(e)
+            warm_fetches.inc(result="failed")
+        finally:
+            prefetcher.unregister(prefetch)
+
+    def _wait_for_interactive(self):
+        """Let tool calls and speculative prefetches fetch first"""
+        waited = False
+        while (tool.interactive_calls() or prefetcher.fetching) and (
+            not self._stop.is_set()
+        ):
+            if not waited:
+                warm_yields.inc()
+                waited = True
+            self._stop.wait(YIELD_POLL_SECONDS)
+
+    def status(self) -> Dict[str, Any]:
+        """Whether the warmer runs, the market phase, its last refresh and error"""
+        status = {
+            "enabled": self.enabled,
+            "running": self.running,
+            "phase": self.calendar.phase(),
+            "watched": len(self._watched),
+        }
+        if self._last_refresh:
+            kind, at = self._last_refresh
+            status["last_refresh"] = {"kind": kind, "seconds_ago": time.time() - at}
+        if self._last_error:
+            error, at = self._last_error
+            status["last_error"] = {"error": error, "seconds_ago": time.time() - at}
+        return status
+
+
+# Global warmer started by the Streamlit app and the API server
+snapshot_warmer = SnapshotWarmer()
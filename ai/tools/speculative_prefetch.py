@@ -0,0 +1,284 @@
+"""
+Speculative Snapshot Prefetch
+When an analysis starts, the stock the user typed is resolved locally
+(config/ticker_aliases.json, then the text as a symbol) and the likely
+snapshots are fetched on background threads while the data collection
+agent is still deciding on its tool call. get_full_stock_info then claims
+a finished prefetch (hit) or waits for one still in flight (joined)
+instead of fetching again. Candidates nobody claimed are cancelled as
+soon as a sibling is claimed or the analysis ends; a running fetch stops
+at its next yfinance call.
+
+Outcomes are published as prefetch_requests_total{result} and
+prefetch_wasted_total{reason}; prefetch_stats() summarises the hit rate.
+Set PREFETCH_CANDIDATES=0 to turn speculation off.
+"""
+
+import difflib
+import json
+import os
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from ai.tools import stock_information_tool as tool
+from utils.metrics import prefetch_requests, prefetch_wasted, prefetches_started
+from utils.tracing import span
+
+# Fetches started per analysis; 0 disables speculative prefetch
+PREFETCH_CANDIDATES = int(os.getenv("PREFETCH_CANDIDATES", "2"))
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "4"))
+DEFAULT_ALIASES_PATH = os.getenv(
+    "TICKER_ALIASES_PATH",
+    os.path.join(
+        os.path.dirname(__file__), "..", "..", "config", "ticker_aliases.json"
+    ),
+)
+# Closest alias a misspelt name may resolve to ("relaince" -> "reliance")
+ALIAS_MATCH_CUTOFF = 0.85
+
+# Words users add around a company name that never identify it
+_FILLER = re.compile(r"\b(?:ltd|limited|share|shares|stock|stocks|price|nse|bse)\b")
+_SYMBOL = re.compile(r"^[A-Z0-9&^.-]{1,20}$")
+
+
+def load_aliases(filepath: str = DEFAULT_ALIASES_PATH) -> Dict[str, str]:
+    """Company name -> yfinance symbol, empty if the file is missing"""
+    try:
+        with open(filepath) as f:
+            aliases = json.load(f).get("aliases", {})
+    except FileNotFoundError:
+        return {}
+    return {normalize_name(name): symbol.upper() for name, symbol in aliases.items()}
+
+
+def normalize_name(text: str) -> str:
+    text = _FILLER.sub(" ", text.lower().replace(".", " ").replace(",", " "))
+    return " ".join(text.split())
+
+
+def resolve_candidates(query: str, aliases: Dict[str, str]) -> List[Tuple[str, ...]]:
+    """
+    Likely tool calls for a user query, most likely first
+    Each candidate is (symbol to fetch, other cache keys the fetch may answer):
+    fetching a bare symbol through the tool's NSE fallback also answers the
+    .NS form the agent is prompted to use.
+    """
+    name = normalize_name(query)
+    target = aliases.get(name)
+    if target is None and name:
+        close = difflib.get_close_matches(name, aliases, n=1, cutoff=ALIAS_MATCH_CUTOFF)
+        target = aliases[close[0]] if close else None
+
+    symbol = query.strip().upper()
+    if not _SYMBOL.match(symbol):
+        return [(target,)] if target else []
+    bare = (symbol,) if "." in symbol else (symbol, symbol + ".NS")
+    if target is None or target in bare:
+        return [bare]
+    return [(target,), bare]
+
+
+@dataclass
+class Prefetch:
+    """One speculative fetch and the cache keys it may answer"""
+
+    symbol: str
+    keys: Tuple[str, ...]
+    session: "PrefetchSession"
+    cancelled: threading.Event = field(default_factory=threading.Event)
+    future: Optional[Future] = None
+    claimed: bool = False
+
+    def answers(self, key: str, data: Dict[str, Any]) -> bool:
+        # A bare symbol may resolve elsewhere than its .NS form (INFY is also a NYSE ADR)
+        return key == self.symbol or data.get("Ticker") == key
+
+
+class PrefetchSession:
+    """The prefetches started for one analysis"""
+
+    def __init__(self, prefetcher: "Prefetcher", query: str):
+        self.prefetcher = prefetcher
+        self.query = query
+        self.prefetches: List[Prefetch] = []
+
+    def finish(self):
+        """Cancel what the analysis never claimed"""
+        self.prefetcher._finish(self)
+
+
+class Prefetcher:
+    """Starts speculative fetches and hands them to the tool calls that want them"""
+
+    def __init__(
+        self,
+        max_candidates: int = PREFETCH_CANDIDATES,
+        workers: int = PREFETCH_WORKERS,
+        aliases_path: str = DEFAULT_ALIASES_PATH,
+    ):
+        self.max_candidates = max_candidates
+        self.workers = workers
+        self.aliases_path = aliases_path
+        self._aliases: Optional[Dict[str, str]] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # cache key -> unclaimed prefetch that may answer it
+        self._pending: Dict[str, Prefetch] = {}
+        self._sessions = 0
+        self._running = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_candidates > 0
+
+    @property
+    def fetching(self) -> int:
+        """Speculative fetches running now"""
+        return self._running
+
+    @property
+    def aliases(self) -> Dict[str, str]:
+        if self._aliases is None:
+            self._aliases = load_aliases(self.aliases_path)
+        return self._aliases
+
+    def start(self, query: str) -> PrefetchSession:
+        """Start fetching the likely snapshots for a query in the background"""
+        session = PrefetchSession(self, query)
+        with self._lock:
+            self._sessions += 1
+        if not self.enabled:
+            return session
+        for symbol, *others in resolve_candidates(query, self.aliases)[
+            : self.max_candidates
+        ]:
+            with self._lock:
+                if symbol in self._pending or symbol in tool.snapshot_cache:
+                    continue
+                prefetch = Prefetch(symbol, (symbol, *others), session)
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="prefetch"
+                    )
+                prefetch.future = self._executor.submit(self._fetch, prefetch)
+                for key in prefetch.keys:
+                    self._pending.setdefault(key, prefetch)
+            session.prefetches.append(prefetch)
+            prefetches_started.inc()
+        return session
+
+    def _fetch(self, prefetch: Prefetch) -> Dict[str, Any]:
+        tool._fetch_state.cancelled = prefetch.cancelled
+        with self._lock:
+            self._running += 1
+        try:
+            with span("prefetch", ticker=prefetch.symbol):
+                data = tool._fetch_and_index(prefetch.symbol)
+            tool.snapshot_cache.set(prefetch.symbol, data)
+            return data
+        finally:
+            tool._fetch_state.cancelled = None
+            with self._lock:
+                self._running -= 1
+
+    def register(self, symbol: str, keys: Tuple[str, ...]) -> Optional[Prefetch]:
+        """
+        Let tool calls for keys join a fetch running outside the prefetcher
+        Returns None when a fetch for one of the keys is already pending;
+        otherwise the caller resolves prefetch.future and then unregisters it.
+        """
+        with self._lock:
+            if any(key in self._pending for key in keys):
+                return None
+            prefetch = Prefetch(symbol, keys, PrefetchSession(self, symbol))
+            prefetch.future = Future()
+            prefetch.session.prefetches.append(prefetch)
+            for key in keys:
+                self._pending[key] = prefetch
+        return prefetch
+
+    def unregister(self, prefetch: Prefetch):
+        with self._lock:
+            for key in prefetch.keys:
+                if self._pending.get(key) is prefetch:
+                    del self._pending[key]
+
+    def claim(self, key: str) -> Optional[Dict[str, Any]]:
+        """Snapshot of the prefetch answering key, waiting if it is in flight"""
+        with self._lock:
+            prefetch = self._pending.pop(key, None)
+        if prefetch is None:
+            return None
+        finished = prefetch.future.done()
+        try:
+            data = prefetch.future.result()
+        except Exception:
+            # Failed or cancelled: the tool fetches for itself
+            return None
+        if not prefetch.answers(key, data):
+            return None
+        prefetch.claimed = True
+        prefetch_requests.inc(result="hit" if finished else "joined")
+        # The agent settled on a ticker: the other guesses are wasted
+        self._cancel(
+            [other for other in prefetch.session.prefetches if other is not prefetch]
+        )
+        return data
+
+    def record_miss(self):
+        """A tool fetch during an analysis that no prefetch answered"""
+        if self.enabled and self._sessions:
+            prefetch_requests.inc(result="miss")
+
+    def _cancel(self, prefetches: List[Prefetch]):
+        with self._lock:
+            for prefetch in prefetches:
+                for key in prefetch.keys:
+                    if self._pending.get(key) is prefetch:
+                        del self._pending[key]
+        for prefetch in prefetches:
+            if prefetch.claimed or prefetch.cancelled.is_set():
+                continue
+            prefetch.cancelled.set()
+            if prefetch.future.cancel() or not prefetch.future.done():
+                prefetch_wasted.inc(reason="cancelled")
+            elif prefetch.future.exception() is not None:
+                prefetch_wasted.inc(reason="failed")
+            else:
+                # Fetched but never asked for; it stays in the snapshot cache
+                prefetch_wasted.inc(reason="unused")
+
+    def _finish(self, session: PrefetchSession):
+        self._cancel(session.prefetches)
+        with self._lock:
+            self._sessions -= 1
+
+
+def prefetch_stats() -> Dict[str, Any]:
+    """Prefetch outcomes of this process and the share of tool fetches they answered"""
+    stats = {
+        "started": int(prefetches_started.value()),
+        **{
+            result: int(prefetch_requests.value(result=result))
+            for result in ("hit", "joined", "miss")
+        },
+        **{
+            reason: int(prefetch_wasted.value(reason=reason))
+            for reason in ("cancelled", "unused", "failed")
+        },
+    }
+    stats["hit_rate"] = hit_rate(stats)
+    return stats
+
+
+def hit_rate(stats: Dict[str, Any]) -> Optional[float]:
+    """Share of tool fetches during analyses that a prefetch answered"""
+    fetches = stats["hit"] + stats["joined"] + stats["miss"]
+    return round((stats["hit"] + stats["joined"]) / fetches, 4) if fetches else None
+
+
+# Global prefetcher used by run_stock_analysis and get_full_stock_info
+prefetcher = Prefetcher()
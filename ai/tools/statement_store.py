@@ -0,0 +1,260 @@
+"""
+Versioned Financial Statement Store
+Income statement, balance sheet and cash flow only change when a company
+reports, so they are kept per ticker, versioned by period end, together
+with the next earnings date from ticker.calendar (one JSON file per ticker
+in STATEMENT_STORE_DIR). get_full_stock_info serves them from here and
+refetches only when:
+  - the earnings date has passed (then rechecked every
+    STATEMENT_RECHECK_HOURS until the new period is published),
+  - no earnings date is known and the copy is older than
+    STATEMENT_MAX_AGE_DAYS, or
+  - invalidate() asked for a refresh (Streamlit cache button,
+    main.py --refresh-statements, GET /snapshot/{ticker}?refresh=1).
+"""
+
+import json
+import math
+import os
+import re
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+
+from utils.metrics import record_cache_lookup
+
+STATEMENT_STORE_DIR = os.getenv("STATEMENT_STORE_DIR", "statement_store")
+STATEMENT_MAX_AGE_DAYS = float(os.getenv("STATEMENT_MAX_AGE_DAYS", "7"))
+STATEMENT_RECHECK_HOURS = float(os.getenv("STATEMENT_RECHECK_HOURS", "12"))
+# Period ends served per statement, newest first (yfinance returns four years)
+STATEMENT_PERIODS = int(os.getenv("STATEMENT_PERIODS", "4"))
+
+# Payload name -> yfinance Ticker attribute
+STATEMENTS = {
+    "Income Statement": "financials",
+    "Balance Sheet": "balance_sheet",
+    "Cash Flow": "cashflow",
+}
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) else number
+
+
+def next_earnings_date(calendar: Any) -> Optional[str]:
+    """Earliest "Earnings Date" of a ticker.calendar dict (ISO date), if any"""
+    if not isinstance(calendar, dict):
+        return None
+    dates = []
+    for value in calendar.get("Earnings Date") or []:
+        try:
+            dates.append(pd.Timestamp(value).date())
+        except (TypeError, ValueError):
+            continue
+    return min(dates).isoformat() if dates else None
+
+
+def encode_statement(frame: Any) -> Dict[str, Any]:
+    """Statement DataFrame -> {"rows": [...], "periods": {period end: {row: value}}}"""
+    if not isinstance(frame, pd.DataFrame) or frame.empty:
+        return {"rows": [], "periods": {}}
+    periods = {}
+    for column in frame.columns:
+        period = pd.Timestamp(column).strftime("%Y-%m-%d")
+        periods[period] = {
+            str(row): _number(value) for row, value in frame[column].items()
+        }
+    return {"rows": [str(row) for row in frame.index], "periods": periods}
+
+
+def merge_statement(stored: Dict[str, Any], fetched: Dict[str, Any]) -> Dict[str, Any]:
+    """Fetched periods replace stored ones with the same end; older ones are kept"""
+    rows = list(fetched["rows"])
+    rows += [row for row in stored.get("rows", []) if row not in rows]
+    return {
+        "rows": rows,
+        "periods": {**stored.get("periods", {}), **fetched["periods"]},
+    }
+
+
+def decode_statement(stored: Dict[str, Any], periods: int = STATEMENT_PERIODS):
+    """The newest periods of a stored statement as a yfinance-shaped DataFrame"""
+    ends = sorted(stored.get("periods", {}), reverse=True)[:periods]
+    if not ends:
+        return pd.DataFrame()
+    return pd.DataFrame(
+        {
+            pd.Timestamp(end): [
+                stored["periods"][end].get(row) for row in stored["rows"]
+            ]
+            for end in ends
+        },
+        index=stored["rows"],
+        dtype=float,
+    )
+
+
+class StatementStore:
+    """Per-ticker statements and earnings dates, persisted as JSON files"""
+
+    def __init__(self, directory: Optional[str] = STATEMENT_STORE_DIR):
+        self.directory = directory
+        self.max_age_seconds = STATEMENT_MAX_AGE_DAYS * 86400
+        self.recheck_seconds = STATEMENT_RECHECK_HOURS * 3600
+        self._records: Dict[str, Dict[str, Any]] = {}
+        # symbol (None: every symbol) -> records fetched before this are stale
+        self._refresh_before: Dict[Optional[str], float] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, symbol: str) -> str:
+        return os.path.join(
+            self.directory, re.sub(r"[^A-Z0-9&^.-]", "_", symbol) + ".json"
+        )
+
+    def _load(self, symbol: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if symbol in self._records:
+                return self._records[symbol]
+        record = None
+        if self.directory and os.path.exists(self._path(symbol)):
+            try:
+                with open(self._path(symbol)) as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                record = None
+        with self._lock:
+            return self._records.setdefault(symbol, record)
+
+    def _save(self, symbol: str, record: Dict[str, Any]):
+        with self._lock:
+            self._records[symbol] = record
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write then rename so a crash never leaves a truncated file
+            temp_path = f"{self._path(symbol)}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(record, f)
+            os.replace(temp_path, self._path(symbol))
+        except OSError:
+            # Persistence is best-effort; the record stays in memory
+            pass
+
+    def refetch_reason(
+        self, symbol: str, record: Optional[Dict[str, Any]], now: Optional[float] = None
+    ) -> Optional[str]:
+        """Why the stored statements of symbol must be refetched, or None"""
+        if record is None:
+            return "not stored"
+        now = time.time() if now is None else now
+        fetched_at = record.get("fetched_at", 0)
+        refresh_before = max(
+            self._refresh_before.get(None, 0),
+            self._refresh_before.get(symbol, 0),
+            self._refresh_before.get(symbol.split(".")[0], 0),
+        )
+        if fetched_at < refresh_before:
+            return "refresh requested"
+        earnings = record.get("next_earnings")
+        if earnings:
+            reported = datetime.fromisoformat(earnings).timestamp()
+            if now < reported:
+                return None
+            if fetched_at < reported or now - fetched_at >= self.recheck_seconds:
+                return f"reported on {earnings}"
+            return None
+        if now - fetched_at >= self.max_age_seconds:
+            return "expired"
+        return None
+
+    def statements(
+        self,
+        symbol: str,
+        fetch: Callable[[str], Any],
+        fetch_calendar: Callable[[], Any],
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Statements of symbol by payload name, refetched only when due
+        fetch(attribute) returns one yfinance statement DataFrame and
+        fetch_calendar() the ticker's calendar.
+        """
+        symbol = symbol.strip().upper()
+        record = self._load(symbol)
+        due = self.refetch_reason(symbol, record)
+        record_cache_lookup("statement_store", due is None)
+        if due is not None:
+            try:
+                record = self._refetch(symbol, record, fetch, fetch_calendar)
+            except Exception:
+                # A stored copy beats no statements while the provider is failing
+                if record is None:
+                    raise
+        return {
+            name: decode_statement(record["statements"].get(name, {}))
+            for name in STATEMENTS
+        }
+
+    def _refetch(self, symbol, record, fetch, fetch_calendar) -> Dict[str, Any]:
+        stored = (record or {}).get("statements", {})
+        previous_latest = latest_period(stored)
+        statements = {
+            name: merge_statement(stored.get(name, {}), encode_statement(fetch(attr)))
+            for name, attr in STATEMENTS.items()
+        }
+        try:
+            earnings = next_earnings_date(fetch_calendar())
+        except Exception:
+            # No calendar: fall back to STATEMENT_MAX_AGE_DAYS
+            earnings = None
+        today = date.today().isoformat()
+        if (
+            earnings
+            and earnings <= today
+            and previous_latest
+            and latest_period(statements) > previous_latest
+        ):
+            # The report is in but the calendar still shows it; wait for its update
+            earnings = None
+        record = {
+            "symbol": symbol,
+            "fetched_at": time.time(),
+            "next_earnings": earnings,
+            "statements": statements,
+        }
+        self._save(symbol, record)
+        return record
+
+    def invalidate(self, symbol: Optional[str] = None):
+        """Refetch statements of symbol (every symbol if None) on their next use"""
+        key = symbol.strip().upper() if symbol else None
+        with self._lock:
+            self._refresh_before[key] = time.time()
+
+    def clear(self):
+        """Forget the records held in memory (files stay on disk)"""
+        with self._lock:
+            self._records.clear()
+
+    def next_earnings(self, symbol: str) -> Optional[str]:
+        record = self._load(symbol.strip().upper())
+        return (record or {}).get("next_earnings")
+
+
+def latest_period(statements: Dict[str, Dict[str, Any]]) -> str:
+    """Newest period end across stored statements ("" when none)"""
+    return max(
+        (end for stored in statements.values() for end in stored.get("periods", {})),
+        default="",
+    )
+
+
+# Global store used by get_full_stock_info
+statement_store = StatementStore()
@@ -1,16 +1,114 @@
-import yfinance as yf
-from autogen_core.tools import FunctionTool
-from typing import Dict, Any
+import os
+import threading
+from typing import Dict, Any, Optional
+from utils.metrics import yfinance_calls, yfinance_failures
+from utils.tracing import span
+from utils.ttl_cache import TTLCache
+
+# "yfinance", or "stub" for the offline provider in ai/tools/stub_ticker.py
+STOCK_DATA_PROVIDER = os.getenv("STOCK_DATA_PROVIDER", "yfinance")
+
+# Fetched snapshots are reused per ticker for a few minutes
+SNAPSHOT_TTL_SECONDS = float(os.getenv("STOCK_SNAPSHOT_TTL_SECONDS", "300"))
+# The snapshot warmer keeps WARM_TICKERS tickers under their query and resolved
+# symbol each; 64 entries on top keep interactive lookups from evicting them
+SNAPSHOT_CACHE_SIZE = 64 + 2 * max(0, int(os.getenv("WARM_TICKERS", "24")))
+snapshot_cache = TTLCache(
+    "stock_snapshot", SNAPSHOT_TTL_SECONDS, maxsize=SNAPSHOT_CACHE_SIZE
+)
+
+# Cancellation event of the fetch running on this thread (set by prefetch workers)
+_fetch_state = threading.local()
+
+# get_full_stock_info calls running now; background refreshes wait for them
+_interactive_lock = threading.Lock()
+_interactive_calls = 0
+
+
+class FetchCancelled(Exception):
+    """Raised by yf_call inside a fetch whose result is no longer wanted"""
 
 
 def get_full_stock_info(ticker_symbol: str) -> Dict[str, Any]:
+    from ai.tools.speculative_prefetch import prefetcher
+
+    global _interactive_calls
+    key = ticker_symbol.strip().upper()
+    with _interactive_lock:
+        _interactive_calls += 1
+    try:
+        with span("get_full_stock_info", ticker=ticker_symbol):
+            # A speculative prefetch started when the analysis began, finished or not
+            prefetched = prefetcher.claim(key)
+            if prefetched is not None:
+                return prefetched
+            return snapshot_cache.get_or_compute(
+                key, lambda: _fetch_on_demand(ticker_symbol)
+            )
+    finally:
+        with _interactive_lock:
+            _interactive_calls -= 1
+
+
+def interactive_calls() -> int:
+    """Number of get_full_stock_info calls in progress"""
+    return _interactive_calls
+
+
+def get_cached_snapshot(ticker_symbol: str) -> Optional[Dict[str, Any]]:
+    """Recently fetched snapshot for a requested or resolved ticker, if cached"""
+    return snapshot_cache.get(ticker_symbol.strip().upper())
+
+
+def _fetch_on_demand(ticker_symbol: str) -> Dict[str, Any]:
+    from ai.tools.speculative_prefetch import prefetcher
+
+    prefetcher.record_miss()
+    return _fetch_and_index(ticker_symbol)
+
+
+def _fetch_and_index(ticker_symbol: str) -> Dict[str, Any]:
+    full_data = _fetch_full_stock_info(ticker_symbol)
+    # Also index under the resolved symbol ("TCS" -> "TCS.NS") used in the payload
+    snapshot_cache.set(full_data["Ticker"], full_data)
+    return full_data
+
+
+def make_ticker(ticker_symbol: str):
+    """Ticker object of the configured market data provider"""
+    if STOCK_DATA_PROVIDER == "stub":
+        from ai.tools.stub_ticker import StubTicker
+
+        return StubTicker(ticker_symbol)
+    import yfinance as yf
+
+    return yf.Ticker(ticker_symbol)
+
+
+def yf_call(call_name: str, ticker_symbol: str, fetch):
+    """Run one yfinance call inside a span and publish call/failure counts"""
+    cancelled = getattr(_fetch_state, "cancelled", None)
+    if cancelled is not None and cancelled.is_set():
+        raise FetchCancelled(f"{call_name} for {ticker_symbol}")
+    yfinance_calls.inc(call=call_name)
+    with span(f"yfinance.{call_name}", ticker=ticker_symbol):
+        try:
+            return fetch()
+        except Exception:
+            yfinance_failures.inc(call=call_name)
+            raise
+
+
+def _fetch_full_stock_info(ticker_symbol: str) -> Dict[str, Any]:
+    from ai.tools.statement_store import statement_store
+
     # Try to fetch ticker info, and if it fails for Indian stocks, try with .NS suffix
     original_ticker = ticker_symbol.upper()
-    ticker = yf.Ticker(original_ticker)
+    ticker = make_ticker(original_ticker)
 
     # Check if this is likely an Indian stock (no dots in ticker and data not available)
     try:
-        info = ticker.info
+        info = yf_call("symbol_resolution", original_ticker, lambda: ticker.info)
         # If we get minimal info, this might be an invalid ticker
         if (
             not info.get("currentPrice")
@@ -19,7 +117,7 @@ def get_full_stock_info(ticker_symbol: str) -> Dict[str, Any]:
         ):
             # Try with .NS suffix for NSE stocks
             nse_ticker = original_ticker + ".NS"
-            ticker = yf.Ticker(nse_ticker)
+            ticker = make_ticker(nse_ticker)
             ticker_symbol = nse_ticker
         else:
             ticker_symbol = original_ticker
@@ -27,13 +125,13 @@ def get_full_stock_info(ticker_symbol: str) -> Dict[str, Any]:
         # If there's an error, try with .NS suffix
         if "." not in original_ticker:
             nse_ticker = original_ticker + ".NS"
-            ticker = yf.Ticker(nse_ticker)
+            ticker = make_ticker(nse_ticker)
             ticker_symbol = nse_ticker
         else:
             ticker_symbol = original_ticker
 
     # Current market info
-    info = ticker.info
+    info = yf_call("info", ticker_symbol, lambda: ticker.info)
     current_price = info.get("currentPrice")
     open_price = info.get("open")
     day_high = info.get("dayHigh")
@@ -45,7 +143,7 @@ def get_full_stock_info(ticker_symbol: str) -> Dict[str, Any]:
     fifty_two_week_low = info.get("fiftyTwoWeekLow")
 
     # All-time high and low from history
-    hist = ticker.history(period="max")
+    hist = yf_call("history", ticker_symbol, lambda: ticker.history(period="max"))
     all_time_high = hist["Close"].max()
     all_time_low = hist["Close"].min()
 
@@ -72,18 +170,29 @@ def get_full_stock_info(ticker_symbol: str) -> Dict[str, Any]:
         "Description": info.get("longBusinessSummary"),
     }
 
-    # Financial statements
-    financials = {
-        "Income Statement": ticker.financials,
-        "Balance Sheet": ticker.balance_sheet,
-        "Cash Flow": ticker.cashflow,
-    }
+    # Financial statements: stored per period end, refetched after earnings
+    financials = statement_store.statements(
+        ticker_symbol,
+        lambda attribute: yf_call(
+            attribute, ticker_symbol, lambda: getattr(ticker, attribute)
+        ),
+        lambda: yf_call("calendar", ticker_symbol, lambda: ticker.calendar),
+    )
 
     # Major holders
+    institutional_holders = yf_call(
+        "institutional_holders", ticker_symbol, lambda: ticker.institutional_holders
+    )
+    mutualfund_holders = yf_call(
+        "mutualfund_holders", ticker_symbol, lambda: ticker.mutualfund_holders
+    )
+    major_holders = yf_call(
+        "major_holders", ticker_symbol, lambda: ticker.major_holders
+    )
     holders = {
-        "Institutional Holders": ticker.institutional_holders,
-        "Mutual Fund Holders": ticker.mutualfund_holders,
-        "Major Holders": ticker.major_holders,
+        "Institutional Holders": institutional_holders,
+        "Mutual Fund Holders": mutualfund_holders,
+        "Major Holders": major_holders,
     }
 
     # Combine everything
@@ -106,7 +215,15 @@ def get_full_stock_info(ticker_symbol: str) -> Dict[str, Any]:
     return full_data
 
 
-ticker_tool = FunctionTool(
-    get_full_stock_info,
-    description="This tool provide information of stock",
-)
+def __getattr__(name: str):
+    # ticker_tool is built on first access so importing the tool stays light
+    if name == "ticker_tool":
+        from autogen_core.tools import FunctionTool
+
+        global ticker_tool
+        ticker_tool = FunctionTool(
+            get_full_stock_info,
+            description="This tool provide information of stock",
+        )
+        return ticker_tool
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
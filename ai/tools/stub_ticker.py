@@ -0,0 +1,191 @@
+"""
+Stub market data provider for local runs and tests
+A yfinance.Ticker look-alike that builds deterministic synthetic data from
+the symbol, so the data collection tool works without network access.
+Selected with STOCK_DATA_PROVIDER=stub (see ai/tools/stock_information_tool.py).
+"""
+
+import hashlib
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# Simulated latency per provider call: seconds, or a callable sampling them
+STUB_LATENCY_SECONDS = float(os.getenv("STUB_DATA_LATENCY_SECONDS", "0"))
+
+STATEMENT_PERIODS = pd.to_datetime(
+    ["2025-03-31", "2024-03-31", "2023-03-31", "2022-03-31"]
+)
+STATEMENT_ROWS = {
+    "financials": [
+        "Total Revenue",
+        "Gross Profit",
+        "Operating Income",
+        "Net Income",
+        "EBITDA",
+        "Basic EPS",
+    ],
+    "balance_sheet": [
+        "Total Assets",
+        "Total Liabilities Net Minority Interest",
+        "Stockholders Equity",
+        "Cash And Cash Equivalents",
+        "Total Debt",
+    ],
+    "cashflow": [
+        "Operating Cash Flow",
+        "Capital Expenditure",
+        "Free Cash Flow",
+        "Cash Dividends Paid",
+    ],
+}
+
+
+class StubTicker:
+    """Synthetic ticker whose numbers depend only on the symbol"""
+
+    def __init__(self, ticker: str):
+        self.ticker = ticker.upper()
+        self._price = float(self._rng("price").uniform(50, 5000))
+        # Like yfinance, plain NSE symbols only resolve with the .NS suffix
+        self._listed = "." in self.ticker
+
+    def _call(self, name: str) -> np.random.Generator:
+        """Wait like a provider call would, then return the generator for name"""
+        latency = STUB_LATENCY_SECONDS
+        if callable(latency):
+            latency = latency()
+        if latency:
+            time.sleep(latency)
+        return self._rng(name)
+
+    def _rng(self, name: str) -> np.random.Generator:
+        """Generator for one attribute, so repeated reads return the same data"""
+        seed = int.from_bytes(
+            hashlib.blake2b(f"{self.ticker}:{name}".encode(), digest_size=4).digest(),
+            "little",
+        )
+        return np.random.default_rng(seed)
+
+    @property
+    def info(self) -> dict:
+        rng = self._call("info")
+        if not self._listed:
+            return {}
+        price = self._price
+        shares = float(rng.uniform(1e8, 5e9))
+        return {
+            "currentPrice": round(price, 2),
+            "regularMarketPrice": round(price, 2),
+            "open": round(price * 0.99, 2),
+            "dayHigh": round(price * 1.01, 2),
+            "dayLow": round(price * 0.98, 2),
+            "volume": int(rng.integers(1e5, 1e7)),
+            "fiftyTwoWeekHigh": round(price * 1.3, 2),
+            "fiftyTwoWeekLow": round(price * 0.7, 2),
+            "marketCap": price * shares,
+            "trailingPE": round(float(rng.uniform(8, 60)), 2),
+            "forwardPE": round(float(rng.uniform(8, 50)), 2),
+            "priceToBook": round(float(rng.uniform(1, 15)), 2),
+            "dividendYield": round(float(rng.uniform(0, 4)), 2),
+            "beta": round(float(rng.uniform(0.5, 1.5)), 2),
+            "profitMargins": round(float(rng.uniform(0.02, 0.3)), 4),
+            "longName": f"{self.ticker.split('.')[0]} Limited (stub)",
+            "sector": "Technology",
+            "industry": "Information Technology Services",
+            "fullTimeEmployees": int(rng.integers(1000, 500000)),
+            "website": "https://example.com",
+            "longBusinessSummary": "Synthetic company generated by the stub data provider.",
+        }
+
+    def history(self, period: str = "max") -> pd.DataFrame:
+        index = pd.bdate_range(end="2025-10-17", periods=2500)
+        steps = self._call("history").normal(0.0003, 0.015, len(index))
+        close = self._price * np.exp(steps.cumsum() - steps.sum())
+        return pd.DataFrame({"Close": close, "Volume": 1e6}, index=index)
+
+    def _statement(self, kind: str) -> pd.DataFrame:
+        rows = STATEMENT_ROWS[kind]
+        values = self._call(kind).normal(
+            1e11, 3e10, (len(rows), len(STATEMENT_PERIODS))
+        )
+        return pd.DataFrame(values, index=rows, columns=STATEMENT_PERIODS)
+
+    @property
+    def financials(self) -> pd.DataFrame:
+        return self._statement("financials")
+
+    @property
+    def balance_sheet(self) -> pd.DataFrame:
+        return self._statement("balance_sheet")
+
+    @property
+    def cashflow(self) -> pd.DataFrame:
+        return self._statement("cashflow")
+
+    @property
+    def calendar(self) -> dict:
+        # Next results 1-90 days out, like an estimated yfinance earnings window
+        days = int(self._call("calendar").integers(1, 90))
+        return {
+            "Earnings Date": [(pd.Timestamp.today() + pd.Timedelta(days=days)).date()]
+        }
+
+    def _holders(self, names) -> pd.DataFrame:
+        shares = self._call(",".join(names)).integers(1e6, 1e8, len(names))
+        return pd.DataFrame(
+            {
+                "Date Reported": pd.Timestamp("2025-06-30"),
+                "Holder": names,
+                "Shares": shares,
+                "Value": shares * self._price,
+            }
+        )
+
+    @property
+    def institutional_holders(self) -> pd.DataFrame:
+        return self._holders(["Vanguard Group Inc", "BlackRock Inc", "Norges Bank"])
+
+    @property
+    def mutualfund_holders(self) -> pd.DataFrame:
+        return self._holders(["SBI Equity Fund", "HDFC Flexi Cap Fund"])
+
+    @property
+    def major_holders(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {"Value": [0.45, 0.30, 0.55, 1500.0]},
+            index=[
+                "insidersPercentHeld",
+                "institutionsPercentHeld",
+                "institutionsFloatPercentHeld",
+                "institutionsCount",
+            ],
+        )
+
+
+def download(tickers) -> pd.DataFrame:
+    """yf.download look-alike: five daily bars per ticker, the last at its quote"""
+    frames = {}
+    for symbol in tickers:
+        ticker = StubTicker(symbol)
+        if not ticker._listed:
+            continue
+        rng = ticker._call("download")
+        index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=5)
+        close = ticker._price * np.exp(rng.normal(0, 0.01, len(index)))
+        close[-1] = ticker._price
+        frames[ticker.ticker] = pd.DataFrame(
+            {
+                "Open": close * 0.99,
+                "High": close * 1.01,
+                "Low": close * 0.98,
+                "Close": close,
+                "Volume": rng.integers(1e5, 1e7, len(index)).astype(float),
+            },
+            index=index,
+        )
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, axis=1)
@@ -0,0 +1,224 @@
+"""
+Watchlist Market Data
+Quotes for a whole watchlist come from one bulk yf.download call, and
+fundamentals (one .info request per ticker) are fetched on a thread pool
+in the background so a large watchlist renders from whatever is cached.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from ai.tools.stock_information_tool import STOCK_DATA_PROVIDER, make_ticker, yf_call
+from utils.tracing import span
+from utils.ttl_cache import TTLCache
+
+QUOTE_TTL_SECONDS = float(os.getenv("WATCHLIST_QUOTE_TTL_SECONDS", "60"))
+FUNDAMENTALS_TTL_SECONDS = float(
+    os.getenv("WATCHLIST_FUNDAMENTALS_TTL_SECONDS", "3600")
+)
+FUNDAMENTALS_WORKERS = int(os.getenv("WATCHLIST_FUNDAMENTALS_WORKERS", "8"))
+
+# requested symbol -> yfinance symbol ("TCS" -> "TCS.NS"); resolution rarely changes
+symbol_cache = TTLCache("symbol_resolution", 24 * 3600, maxsize=2048)
+# yfinance symbol -> quote / fundamentals row fields
+quote_cache = TTLCache("watchlist_quotes", QUOTE_TTL_SECONDS, maxsize=2048)
+fundamentals_cache = TTLCache(
+    "watchlist_fundamentals", FUNDAMENTALS_TTL_SECONDS, maxsize=2048
+)
+
+# Fundamentals fields shown on the watchlist, keyed by their .info name
+FUNDAMENTAL_FIELDS = {
+    "longName": "Name",
+    "marketCap": "Market Cap",
+    "trailingPE": "Trailing P/E",
+    "priceToBook": "Price to Book",
+    "dividendYield": "Dividend Yield",
+    "fiftyTwoWeekHigh": "52-Week High",
+    "fiftyTwoWeekLow": "52-Week Low",
+}
+
+_executor = ThreadPoolExecutor(
+    max_workers=FUNDAMENTALS_WORKERS, thread_name_prefix="fundamentals"
+)
+_pending_lock = threading.Lock()
+_pending_fundamentals = set()
+
+
+def candidate_symbols(symbol: str) -> List[str]:
+    """yfinance symbols to try for a watchlist entry, mirroring the tool's NSE fallback"""
+    symbol = symbol.strip().upper()
+    if "." in symbol or symbol.startswith("^"):
+        return [symbol]
+    return [symbol, symbol + ".NS"]
+
+
+def resolved_symbol(symbol: str) -> Optional[str]:
+    """yfinance symbol a watchlist entry resolved to, if quotes were loaded for it"""
+    return symbol_cache.peek(symbol.strip().upper())
+
+
+def _latest_closes(data: pd.DataFrame, ticker: str) -> Optional[pd.Series]:
+    """Non-empty close series of one ticker in a yf.download result"""
+    if data is None or data.empty:
+        return None
+    if isinstance(data.columns, pd.MultiIndex):
+        if ticker not in data.columns.get_level_values(0):
+            return None
+        frame = data[ticker]
+    else:
+        frame = data
+    if "Close" not in frame:
+        return None
+    closes = frame["Close"].dropna()
+    return closes if not closes.empty else None
+
+
+def _quote_row(ticker: str, data: pd.DataFrame, closes: pd.Series) -> Dict[str, Any]:
+    frame = data[ticker] if isinstance(data.columns, pd.MultiIndex) else data
+    price = float(closes.iloc[-1])
+    previous = float(closes.iloc[-2]) if len(closes) > 1 else None
+    volume = frame["Volume"].dropna() if "Volume" in frame else pd.Series(dtype=float)
+    latest = frame.loc[closes.index[-1]]
+    return {
+        "Ticker": ticker,
+        "Price": price,
+        "Change %": (price / previous - 1) * 100 if previous else None,
+        "Volume": float(volume.iloc[-1]) if not volume.empty else None,
+        # The day's range, used to patch cached snapshots
+        "Open": _value(latest, "Open"),
+        "Day High": _value(latest, "High"),
+        "Day Low": _value(latest, "Low"),
+    }
+
+
+def _value(row: pd.Series, column: str) -> Optional[float]:
+    value = row.get(column)
+    return None if value is None or pd.isna(value) else float(value)
+
+
+def _download(tickers: List[str]) -> pd.DataFrame:
+    """Last five daily bars of tickers, grouped by ticker"""
+    if STOCK_DATA_PROVIDER == "stub":
+        from ai.tools.stub_ticker import download
+
+        return download(tickers)
+    import yfinance as yf
+
+    return yf.download(
+        tickers,
+        period="5d",
+        interval="1d",
+        group_by="ticker",
+        auto_adjust=False,
+        threads=True,
+        progress=False,
+    )
+
+
+def fetch_quotes(symbols: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Latest quote per requested symbol; uncached symbols share one bulk download
+    Symbols with no market data are left out of the result.
+    """
+    symbols = list(dict.fromkeys(symbol.strip().upper() for symbol in symbols))
+    quotes = {}
+    to_fetch = {}
+    for symbol in symbols:
+        resolved = symbol_cache.get(symbol)
+        quote = quote_cache.get(resolved) if resolved else None
+        if quote is not None:
+            quotes[symbol] = quote
+        else:
+            to_fetch[symbol] = [resolved] if resolved else candidate_symbols(symbol)
+
+    if to_fetch:
+        tickers = sorted({ticker for group in to_fetch.values() for ticker in group})
+        with span("watchlist.download", tickers=len(tickers)):
+            data = yf_call(
+                "download", f"{len(tickers)} tickers", lambda: _download(tickers)
+            )
+        for symbol, group in to_fetch.items():
+            for ticker in group:
+                closes = _latest_closes(data, ticker)
+                if closes is None:
+                    continue
+                quote = _quote_row(ticker, data, closes)
+                symbol_cache.set(symbol, ticker)
+                quote_cache.set(ticker, quote)
+                quotes[symbol] = quote
+                break
+    return quotes
+
+
+def _fetch_fundamentals(ticker: str) -> Dict[str, Any]:
+    try:
+        info = yf_call("info", ticker, lambda: make_ticker(ticker).info) or {}
+        fundamentals = {
+            label: info.get(key) for key, label in FUNDAMENTAL_FIELDS.items()
+        }
+        fundamentals_cache.set(ticker, fundamentals)
+        return fundamentals
+    except Exception:
+        # Retried on a later refresh
+        return {}
+    finally:
+        with _pending_lock:
+            _pending_fundamentals.discard(ticker)
+
+
+def fetch_fundamentals(
+    tickers: Iterable[str], wait: bool = True
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Fundamentals per yfinance ticker, fetching uncached ones on the thread pool
+    With wait=False only cached entries are returned and the missing ones are
+    fetched in the background for the next call.
+    """
+    results = {}
+    futures = {}
+    for ticker in dict.fromkeys(tickers):
+        cached = fundamentals_cache.get(ticker)
+        if cached is not None:
+            results[ticker] = cached
+            continue
+        with _pending_lock:
+            if ticker in _pending_fundamentals and not wait:
+                continue
+            _pending_fundamentals.add(ticker)
+        futures[ticker] = _executor.submit(_fetch_fundamentals, ticker)
+
+    if wait:
+        for ticker, future in futures.items():
+            results[ticker] = future.result()
+    return results
+
+
+def pending_fundamentals() -> int:
+    """Number of fundamentals requests still in flight"""
+    with _pending_lock:
+        return len(_pending_fundamentals)
+
+
+def load_watchlist_rows(symbols: Iterable[str], wait: bool = False) -> pd.DataFrame:
+    """One row per watchlist symbol with its quote and fundamentals"""
+    symbols = list(dict.fromkeys(symbol.strip().upper() for symbol in symbols))
+    quotes = fetch_quotes(symbols)
+    fundamentals = fetch_fundamentals(
+        [quote["Ticker"] for quote in quotes.values()], wait=wait
+    )
+
+    rows = []
+    for symbol in symbols:
+        quote = quotes.get(symbol, {})
+        row = {"Symbol": symbol, "Ticker": quote.get("Ticker")}
+        row.update({key: value for key, value in quote.items() if key != "Ticker"})
+        row.update(fundamentals.get(quote.get("Ticker"), {}))
+        rows.append(row)
+
+    columns = ["Symbol", "Ticker", "Price", "Change %", "Volume"]
+    columns += list(FUNDAMENTAL_FIELDS.values())
+    return pd.DataFrame(rows, columns=columns)
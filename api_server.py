@@ -0,0 +1,227 @@
+"""
+HTTP API for the analysis pipeline
+  GET  /health                service, queue and snapshot warmer status
+  GET  /snapshot/{ticker}     raw stock snapshot from get_full_stock_info
+                              (?refresh=1 refetches it, statements included)
+  POST /analyze               {"ticker": "TCS"}
+  POST /batch                 {"tickers": ["TCS", "INFY"]}
+  GET  /metrics               Prometheus metrics
+
+/analyze and /batch answer with JSON once finished, or stream server-sent
+events when called with ?stream=true or "Accept: text/event-stream". A full
+queue answers 503 with Retry-After.
+
+Run locally without API keys or network access:
+  MODEL_PROVIDER=stub STOCK_DATA_PROVIDER=stub python api_server.py
+"""
+
+from utils.config import load_config
+
+# .env settings must be in the environment before the modules below read them
+load_config()
+
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from ai.teams.analysis_service import AnalysisService, QueueFullError
+from ai.tools.snapshot_warmer import snapshot_warmer
+from ai.tools.statement_store import statement_store
+from ai.tools.stock_information_tool import get_full_stock_info, snapshot_cache
+from utils.metrics import render_prometheus
+from utils.serialization import to_jsonable
+from utils.tracing import span
+
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8000"))
+# Most tickers one /batch request may ask for
+API_MAX_BATCH = int(os.getenv("API_MAX_BATCH", "50"))
+# Comment lines keep idle event streams open through proxies
+SSE_KEEPALIVE_SECONDS = 15.0
+
+# One service (workers, team pool, result cache) for every request
+service = AnalysisService()
+
+
+def wants_stream(request: Request) -> bool:
+    return request.query_params.get("stream", "").lower() in ("1", "true", "yes") or (
+        "text/event-stream" in request.headers.get("accept", "")
+    )
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def with_keepalive(events):
+    """Server-sent event text for events, with keep-alive comments while idle"""
+    iterator = events.__aiter__()
+    next_event = asyncio.ensure_future(iterator.__anext__())
+    try:
+        while True:
+            done, _ = await asyncio.wait({next_event}, timeout=SSE_KEEPALIVE_SECONDS)
+            if not done:
+                yield ": keep-alive\n\n"
+                continue
+            try:
+                event, data = next_event.result()
+            except StopAsyncIteration:
+                return
+            yield sse_event(event, data)
+            next_event = asyncio.ensure_future(iterator.__anext__())
+    finally:
+        # Client went away: stop listening (the analysis itself keeps running)
+        next_event.cancel()
+
+
+def queue_full(error: QueueFullError) -> JSONResponse:
+    return JSONResponse(
+        {"error": str(error)}, status_code=503, headers={"Retry-After": "5"}
+    )
+
+
+async def read_json(request: Request) -> dict:
+    try:
+        body = await request.json()
+    except ValueError:
+        return {}
+    return body if isinstance(body, dict) else {}
+
+
+async def health(request: Request) -> JSONResponse:
+    return JSONResponse(
+        {"status": "ok", **service.status(), "warmer": snapshot_warmer.status()}
+    )
+
+
+async def metrics(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(render_prometheus())
+
+
+async def snapshot(request: Request) -> JSONResponse:
+    ticker = request.path_params["ticker"]
+    if request.query_params.get("refresh", "").lower() in ("1", "true", "yes"):
+        snapshot_cache.invalidate(ticker.strip().upper())
+        statement_store.invalidate(ticker)
+    with span("api.snapshot", ticker=ticker):
+        try:
+            # yfinance is blocking; the snapshot cache is shared with analyses
+            data = await run_in_threadpool(get_full_stock_info, ticker)
+        except Exception as e:
+            return JSONResponse(
+                {"ticker": ticker, "error": f"{type(e).__name__}: {e}"}, status_code=502
+            )
+    return JSONResponse(to_jsonable(data))
+
+
+async def analyze(request: Request):
+    body = await read_json(request)
+    ticker = str(body.get("ticker") or request.query_params.get("ticker", "")).strip()
+    if not ticker:
+        return JSONResponse({"error": "ticker is required"}, status_code=400)
+
+    try:
+        ticket = service.submit(ticker)
+    except QueueFullError as e:
+        return queue_full(e)
+
+    if wants_stream(request):
+        return StreamingResponse(
+            with_keepalive(ticket.stream()), media_type="text/event-stream"
+        )
+    data = await ticket.wait()
+    return JSONResponse(data, status_code=500 if ticket.failed else 200)
+
+
+async def batch(request: Request):
+    body = await read_json(request)
+    tickers = body.get("tickers")
+    if not isinstance(tickers, list) or not tickers:
+        return JSONResponse(
+            {"error": "tickers must be a non-empty list"}, status_code=400
+        )
+    tickers = list(dict.fromkeys(str(ticker).strip().upper() for ticker in tickers))
+    if len(tickers) > API_MAX_BATCH:
+        return JSONResponse(
+            {"error": f"at most {API_MAX_BATCH} tickers per batch"}, status_code=400
+        )
+
+    # All or nothing: don't start part of a batch the queue can't hold
+    if sum(service.needs_slot(ticker) for ticker in tickers) > service.free_slots():
+        return queue_full(
+            QueueFullError(f"Not enough queue space for {len(tickers)} analyses")
+        )
+    try:
+        tickets = [service.submit(ticker) for ticker in tickers]
+    except QueueFullError as e:
+        return queue_full(e)
+
+    if wants_stream(request):
+
+        async def merged_events():
+            # Each ticker's queued/result/error events, as they happen
+            queue: asyncio.Queue = asyncio.Queue()
+
+            async def forward(ticket):
+                async for event, data in ticket.stream():
+                    if event in ("queued", "started", "result", "error"):
+                        await queue.put((event, data))
+                await queue.put(None)
+
+            forwarders = [asyncio.create_task(forward(ticket)) for ticket in tickets]
+            try:
+                remaining = len(forwarders)
+                while remaining:
+                    item = await queue.get()
+                    if item is None:
+                        remaining -= 1
+                    else:
+                        yield item
+                yield "done", {"tickers": tickers}
+            finally:
+                for forwarder in forwarders:
+                    forwarder.cancel()
+
+        return StreamingResponse(
+            with_keepalive(merged_events()), media_type="text/event-stream"
+        )
+
+    results = await asyncio.gather(*(ticket.wait() for ticket in tickets))
+    return JSONResponse({"results": results})
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await service.start()
+    # Popular tickers of the usage ledger, refreshed by market hours
+    snapshot_warmer.start()
+    try:
+        yield
+    finally:
+        snapshot_warmer.stop()
+        await service.stop()
+
+
+app = Starlette(
+    routes=[
+        Route("/health", health),
+        Route("/metrics", metrics),
+        Route("/snapshot/{ticker}", snapshot),
+        Route("/analyze", analyze, methods=["POST"]),
+        Route("/batch", batch, methods=["POST"]),
+    ],
+    lifespan=lifespan,
+)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host=API_HOST, port=API_PORT)
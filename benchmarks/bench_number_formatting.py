@@ -0,0 +1,182 @@
+"""
+Benchmark for format_numbers_in_string on get_full_stock_info reprs
+Builds payloads shaped like the tool output (statements, holders, price
+history) without network access, then compares the previous per-match
+callback implementation with the compiled single-pass scanner and the
+chunked streaming path.
+
+Usage: python -m benchmarks.bench_number_formatting [--repeat N] [--tickers N]
+"""
+
+import argparse
+import io
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.number_formatter import (
+    format_large_number,
+    format_numbers_in_stream,
+    format_numbers_in_string,
+)
+
+STATEMENT_DATES = pd.to_datetime(
+    ["2025-03-31", "2024-03-31", "2023-03-31", "2022-03-31"]
+)
+
+
+def _statement(rng, rows: int) -> pd.DataFrame:
+    values = rng.normal(1e10, 8e9, (rows, len(STATEMENT_DATES)))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    return pd.DataFrame(
+        values, index=[f"Line Item {i}" for i in range(rows)], columns=STATEMENT_DATES
+    )
+
+
+def build_stock_payload(symbol: str, seed: int = 0) -> dict:
+    """Dictionary with the same layout and value ranges as get_full_stock_info"""
+    rng = np.random.default_rng(seed)
+    return {
+        "Ticker": symbol,
+        "Current Price": 1523.45,
+        "Open": 1510.0,
+        "Day High": 1530.1,
+        "Day Low": 1502.3,
+        "Volume": 17051000,
+        "52-Week High": 1790.0,
+        "52-Week Low": 1201.5,
+        "All-Time High": 1790.0,
+        "All-Time Low": 3.2,
+        "Fundamentals": {
+            "Market Cap": 1.05e13,
+            "Trailing P/E": 24.7,
+            "Forward P/E": 21.3,
+            "PEG Ratio": None,
+            "Price to Book": 3.8,
+            "Dividend Yield": 0.0125,
+            "Beta": 0.253,
+            "52 Week Change": 0.114,
+            "Profit Margins": 0.187,
+        },
+        "Company Info": {
+            "Name": f"{symbol} Limited",
+            "Sector": "Financial Services",
+            "Industry": "Banks - Regional",
+            "Full Time Employees": 213527,
+            "Website": "https://www.example.com",
+            "Description": "Provides banking and financial services. " * 20,
+        },
+        "Financials": {
+            "Income Statement": _statement(rng, 40),
+            "Balance Sheet": _statement(rng, 70),
+            "Cash Flow": _statement(rng, 55),
+        },
+        "Holders": {
+            "Institutional Holders": pd.DataFrame(
+                {
+                    "Holder": [f"Fund House {i}" for i in range(10)],
+                    "Shares": rng.integers(1e6, 1e9, 10),
+                    "pctHeld": rng.random(10) / 10,
+                    "Value": rng.normal(5e9, 2e9, 10),
+                }
+            ),
+            "Mutual Fund Holders": pd.DataFrame(
+                {
+                    "Holder": [f"Scheme {i}" for i in range(10)],
+                    "Shares": rng.integers(1e5, 1e8, 10),
+                    "Value": rng.normal(5e8, 2e8, 10),
+                }
+            ),
+            "Major Holders": pd.DataFrame(
+                {"Value": rng.random(4)},
+                index=[
+                    "insidersPercentHeld",
+                    "institutionsPercentHeld",
+                    "institutionsFloatPercentHeld",
+                    "institutionsCount",
+                ],
+            ),
+        },
+    }
+
+
+def build_payload_text(tickers: int) -> str:
+    """str() of several payloads with full DataFrame reprs, as sent to the agents"""
+    with pd.option_context(
+        "display.max_rows", None, "display.float_format", "{:e}".format
+    ):
+        return "\n".join(
+            str(build_stock_payload(f"TICKER{i}", seed=i)) for i in range(tickers)
+        )
+
+
+def format_numbers_in_string_callback(text):
+    """Previous implementation: pattern compiled per call, callback per match"""
+    import re
+
+    pattern = r"(-?\d+\.?\d*e[+-]\d+)"
+
+    def replace_scientific(match):
+        try:
+            num = float(match.group(1))
+            if abs(num) >= 1e6:
+                return format_large_number(num)
+            if abs(num) >= 1:
+                return f"{num:,.2f}".rstrip("0").rstrip(".")
+            formatted = f"{num:.6f}".rstrip("0").rstrip(".")
+            if "." in formatted and len(formatted.split(".")[1]) < 3:
+                formatted = f"{num:.3f}"
+            return formatted
+        except:
+            return match.group(1)
+
+    return re.sub(pattern, replace_scientific, str(text))
+
+
+def _stream(text: str) -> str:
+    target = io.StringIO()
+    format_numbers_in_stream(io.StringIO(text), target, chunk_size=1 << 14)
+    return target.getvalue()
+
+
+def _best_of(func, text: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(text)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tickers", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args(argv)
+
+    print(
+        f"{'payload':>10} {'tokens':>8} {'callback':>10} {'scanner':>10} {'stream':>10}"
+    )
+    for tickers in args.tickers:
+        text = build_payload_text(tickers)
+        expected = format_numbers_in_string_callback(text)
+        if format_numbers_in_string(text) != expected or _stream(text) != expected:
+            print(f"Output mismatch for {tickers} tickers", file=sys.stderr)
+            return 1
+
+        tokens = len(re.findall(r"-?\d+\.?\d*e[+-]\d+", text))
+        callback = _best_of(format_numbers_in_string_callback, text, args.repeat)
+        scanner = _best_of(format_numbers_in_string, text, args.repeat)
+        stream = _best_of(_stream, text, args.repeat)
+        print(
+            f"{len(text) / 1024:>8.0f}KB {tokens:>8} {callback * 1000:>8.1f}ms "
+            f"{scanner * 1000:>8.1f}ms {stream * 1000:>8.1f}ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
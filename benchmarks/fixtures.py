@@ -0,0 +1,138 @@
+"""
+Recorded Market Data Fixtures
+Records what get_full_stock_info reads from a ticker (info, close history,
+statements, holders) into one JSON file per symbol, and replays it through
+a yfinance.Ticker look-alike so benchmarks run offline and repeatably.
+"""
+
+import json
+import os
+from contextlib import contextmanager
+from typing import Dict, Iterable, List
+from unittest import mock
+
+import pandas as pd
+
+from ai.tools import stock_information_tool
+from utils.serialization import to_jsonable
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# Ticker attributes get_full_stock_info reads, besides info and history()
+FRAME_ATTRIBUTES = (
+    "financials",
+    "balance_sheet",
+    "cashflow",
+    "institutional_holders",
+    "mutualfund_holders",
+    "major_holders",
+)
+
+
+def encode_frame(frame) -> dict:
+    if frame is None:
+        return None
+    return {
+        **to_jsonable(frame),
+        "index_dates": isinstance(frame.index, pd.DatetimeIndex),
+        "column_dates": isinstance(frame.columns, pd.DatetimeIndex),
+        "dtypes": {str(column): str(dtype) for column, dtype in frame.dtypes.items()},
+    }
+
+
+def decode_frame(encoded: dict):
+    if encoded is None:
+        return None
+    index, columns = encoded["index"], encoded["columns"]
+    # Positional column labels while restoring dtypes (labels may repeat)
+    frame = pd.DataFrame(encoded["data"], columns=range(len(columns)))
+    for position, dtype in enumerate(encoded["dtypes"].values()):
+        if dtype.startswith("datetime64"):
+            frame[position] = pd.to_datetime(frame[position])
+        elif dtype != "object":
+            frame[position] = frame[position].astype(dtype)
+    frame.index = pd.to_datetime(index) if encoded["index_dates"] else index
+    frame.columns = pd.to_datetime(columns) if encoded["column_dates"] else columns
+    return frame
+
+
+class RecordedTicker:
+    """yfinance.Ticker replacement serving one recorded fixture"""
+
+    def __init__(self, fixture: dict):
+        self.ticker = fixture["symbol"]
+        self.info = fixture["info"]
+        self._history = decode_frame(fixture["history"])
+        self._frames = {name: fixture.get(name) for name in FRAME_ATTRIBUTES}
+
+    def history(self, period: str = "max") -> pd.DataFrame:
+        return self._history
+
+    def __getattr__(self, name: str):
+        if name in FRAME_ATTRIBUTES:
+            # Decoded per access, like yfinance building a fresh frame
+            return decode_frame(self._frames[name])
+        raise AttributeError(name)
+
+
+def _fixture_path(symbol: str, fixture_dir: str) -> str:
+    return os.path.join(fixture_dir, f"{symbol.upper()}.json")
+
+
+def record_fixture(symbol: str, fixture_dir: str = FIXTURE_DIR) -> str:
+    """Fetch symbol with the configured provider and save it as a fixture"""
+    ticker = stock_information_tool.make_ticker(symbol)
+    history = ticker.history(period="max")
+    fixture = {
+        "symbol": symbol.upper(),
+        "info": to_jsonable(ticker.info),
+        "history": encode_frame(history[["Close"]]),
+    }
+    for name in FRAME_ATTRIBUTES:
+        fixture[name] = encode_frame(getattr(ticker, name))
+
+    os.makedirs(fixture_dir, exist_ok=True)
+    path = _fixture_path(symbol, fixture_dir)
+    with open(path, "w") as f:
+        json.dump(fixture, f)
+    return path
+
+
+def load_fixtures(fixture_dir: str = FIXTURE_DIR) -> Dict[str, dict]:
+    """Recorded fixtures by yfinance symbol"""
+    fixtures = {}
+    for name in sorted(os.listdir(fixture_dir)):
+        if name.endswith(".json"):
+            with open(os.path.join(fixture_dir, name)) as f:
+                fixture = json.load(f)
+            fixtures[fixture["symbol"]] = fixture
+    return fixtures
+
+
+def fixture_tickers(fixtures: Dict[str, dict]) -> List[str]:
+    """Names to analyse: NSE fixtures by their bare symbol, like users type them"""
+    return [
+        symbol.split(".")[0] if symbol.endswith(".NS") else symbol
+        for symbol in fixtures
+    ]
+
+
+@contextmanager
+def recorded_market_data(fixtures: Dict[str, dict]):
+    """Serve get_full_stock_info from fixtures; unknown symbols have no data"""
+    empty = {"symbol": "", "info": {}, "history": None}
+
+    def make_ticker(symbol: str):
+        return RecordedTicker(fixtures.get(symbol.upper(), {**empty, "symbol": symbol}))
+
+    with mock.patch.object(stock_information_tool, "make_ticker", make_ticker):
+        stock_information_tool.snapshot_cache.clear()
+        try:
+            yield
+        finally:
+            stock_information_tool.snapshot_cache.clear()
+
+
+def main(symbols: Iterable[str], fixture_dir: str = FIXTURE_DIR):
+    for symbol in symbols:
+        print(f"💾 Recorded {record_fixture(symbol, fixture_dir)}")
@@ -0,0 +1,134 @@
+"""
+Import-Time Budget Check
+Starts each entry point in a fresh interpreter with `python -X importtime`
+and fails when its imports take longer than their budget or pull in a heavy
+dependency that should only load on first use (autogen, the OpenAI SDK,
+yfinance, pandas). The module check is machine independent; the time
+budgets are generous wall-clock limits, scaled with --scale on slow hosts.
+
+Usage:
+  python -m benchmarks.import_time [--repeat N] [--scale 2.0] [--top 10]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded lazily by the agent stack; importing an entry point must not load them
+HEAVY_MODULES = ("autogen_core", "autogen_agentchat", "openai", "yfinance", "pandas")
+
+# name -> (interpreter arguments, import budget in ms, modules it must not import)
+TARGETS: Dict[str, Tuple[List[str], float, Tuple[str, ...]]] = {
+    "main.py --help": (["main.py", "--help"], 250.0, HEAVY_MODULES),
+    "streamlit_app (first paint)": (
+        ["-c", "import streamlit_app"],
+        1200.0,
+        HEAVY_MODULES,
+    ),
+    "stock_information_tool": (
+        ["-c", "import ai.tools.stock_information_tool"],
+        150.0,
+        HEAVY_MODULES,
+    ),
+}
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, float]]:
+    """(module, nesting level, cumulative ms) for every -X importtime line"""
+    imports = []
+    for match in _LINE.finditer(stderr):
+        _, cumulative, indent, module = match.groups()
+        imports.append((module, len(indent) // 2, int(cumulative) / 1000))
+    return imports
+
+
+def measure(args: List[str]) -> List[Tuple[str, int, float]]:
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        timeout=120,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(
+            f"{' '.join(args)} exited with {completed.returncode}:\n"
+            + completed.stderr[-2000:]
+        )
+    return parse_importtime(completed.stderr)
+
+
+def check_target(
+    name: str, repeat: int, scale: float, top: int
+) -> Tuple[bool, float, float, List[str]]:
+    """(passed, import ms, budget ms, heavy modules loaded) for one target"""
+    args, budget, forbidden = TARGETS[name]
+    budget *= scale
+    runs = [measure(args) for _ in range(repeat)]
+    # Fastest run: the others only add scheduler and disk noise
+    totals = [sum(ms for _, level, ms in imports if level == 0) for imports in runs]
+    best = runs[totals.index(min(totals))]
+    loaded = sorted(
+        {
+            module
+            for module, _, _ in best
+            if module.split(".")[0] in forbidden and "." not in module
+        }
+    )
+    passed = min(totals) <= budget and not loaded
+    if not passed and top:
+        print(f"  slowest top-level imports of {name}:")
+        for module, _, ms in sorted(
+            (item for item in best if item[1] == 0), key=lambda item: -item[2]
+        )[:top]:
+            print(f"    {ms:>8.1f} ms  {module}")
+    return passed, min(totals), budget, loaded
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Import-time budget check")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="Multiply every time budget"
+    )
+    parser.add_argument(
+        "--top", type=int, default=10, help="Slowest imports to list on failure"
+    )
+    parser.add_argument("targets", nargs="*", help=f"Subset of: {', '.join(TARGETS)}")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.targets if name not in TARGETS]
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(unknown)}")
+
+    failures = 0
+    print(f"{'target':<32} {'imports ms':>11} {'budget ms':>10}  heavy modules")
+    for name in args.targets or TARGETS:
+        passed, total, budget, loaded = check_target(
+            name, args.repeat, args.scale, args.top
+        )
+        failures += not passed
+        print(
+            f"{name:<32} {total:>11.1f} {budget:>10.0f}  {', '.join(loaded) or '-'}"
+            + ("" if passed else "  ❌")
+        )
+    if failures:
+        print(f"❌ {failures} entry points over their import budget")
+        return 1
+    print("✅ All entry points within their import budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,398 @@
+"""
+Multi-User Load Test
+Drives run_stock_analysis with N simulated users on one event loop, the way
+the Streamlit job runner and the HTTP API share a loop and a team pool.
+Both the model and the market data come from the stub providers, with
+latency drawn from configurable distributions, so the run measures this
+process rather than OpenAI or Yahoo.
+
+Each user loop picks a ticker from the weighted mix, runs one analysis and
+waits a think time. Every user count in --users is run for --duration
+seconds and reports throughput, latency percentiles, event-loop lag and
+memory over time. Capacity is the most users whose p95 latency stays
+within --max-p95 (default: LATENCY_DEGRADATION x the first level's p95)
+without errors.
+
+Latency specs: SECONDS | uniform:LOW:HIGH | normal:MEAN:SD |
+               lognormal:MEDIAN:SIGMA | exp:MEAN
+
+Usage:
+  python -m benchmarks.load_test --users 1 4 16 32 --duration 60 \\
+      --model-latency lognormal:1.5:0.4 --data-latency uniform:0.1:0.5 \\
+      --tickers TCS:3 INFY RELIANCE --output load.json
+  python -m benchmarks.load_test --topology parallel ...   # specialist team
+"""
+
+import os
+
+# Offline by design: stub model and market data providers
+os.environ["MODEL_PROVIDER"] = "stub"
+os.environ["STOCK_DATA_PROVIDER"] = "stub"
+
+import argparse
+import asyncio
+import gc
+import json
+import random
+import resource
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ai.agents.change_gated_agent import change_gate
+from ai.models import stub_model_client
+from ai.teams.analysis_runner import run_stock_analysis
+from ai.teams.team_pool import TeamPool
+from ai.teams.trade_recommendation_team import (
+    TEAM_TOPOLOGIES,
+    trade_recommendation_team,
+)
+from ai.tools import stub_ticker
+from ai.tools.statement_store import statement_store
+from ai.tools.speculative_prefetch import (
+    hit_rate,
+    prefetch_stats,
+    prefetcher,
+)
+from ai.tools.stock_information_tool import snapshot_cache
+from utils.cost_tracker import cost_tracker
+from utils.recommendation_store import RecommendationStore
+
+# Default capacity budget: p95 may grow to this multiple of the first level's
+LATENCY_DEGRADATION = 2.0
+# How often the event-loop lag probe wakes up
+LAG_PROBE_SECONDS = 0.05
+
+_rng = random.Random()
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """Sampler of seconds for a latency spec (see the module docstring)"""
+    kind, _, params = spec.partition(":")
+    try:
+        if not params:
+            seconds = float(kind)
+            return lambda: seconds
+        values = [float(value) for value in params.split(":")]
+        if kind == "uniform":
+            low, high = values
+            return lambda: _rng.uniform(low, high)
+        if kind == "normal":
+            mean, sd = values
+            return lambda: max(0.0, _rng.gauss(mean, sd))
+        if kind == "lognormal":
+            median, sigma = values
+            return lambda: median * _rng.lognormvariate(0.0, sigma)
+        if kind == "exp":
+            (mean,) = values
+            return lambda: _rng.expovariate(1.0 / mean) if mean else 0.0
+    except ValueError:
+        pass
+    raise ValueError(f"invalid latency spec: {spec!r}")
+
+
+def parse_ticker_mix(entries: List[str]) -> Tuple[List[str], List[float]]:
+    """TICKER or TICKER:WEIGHT entries -> (tickers, weights)"""
+    tickers, weights = [], []
+    for entry in entries:
+        ticker, _, weight = entry.partition(":")
+        tickers.append(ticker.strip().upper())
+        weights.append(float(weight) if weight else 1.0)
+    return tickers, weights
+
+
+def rss_mb() -> float:
+    """Current resident set size (peak RSS where /proc isn't available)"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def _percentiles(values: List[float], points=(50, 90, 95, 99)) -> Dict[str, float]:
+    if not values:
+        return {}
+    summary = {f"p{p}": float(np.percentile(values, p)) for p in points}
+    summary["max"] = float(max(values))
+    return {name: round(value, 4) for name, value in summary.items()}
+
+
+class LoadLevel:
+    """One run of a fixed number of users and what it measured"""
+
+    def __init__(
+        self, users: int, args: argparse.Namespace, think_time: Callable[[], float]
+    ):
+        self.users = users
+        self.args = args
+        self.tickers, self.weights = parse_ticker_mix(args.tickers)
+        self.think_time = think_time
+        self.latencies: List[float] = []
+        self.errors: List[str] = []
+        self.loop_lag: List[float] = []
+        self.timeline: List[Dict[str, float]] = []
+        self.in_flight = 0
+        self._stopped = False
+
+    async def _user(self, number: int, pool: TeamPool, deadline: float):
+        rng = random.Random(self.args.seed * 1000 + number)
+        # Stagger starts over the ramp-up so users don't arrive in lockstep
+        await asyncio.sleep(self.args.ramp_up * number / self.users)
+        while time.perf_counter() < deadline:
+            ticker = rng.choices(self.tickers, self.weights)[0]
+            started = time.perf_counter()
+            self.in_flight += 1
+            try:
+                result = await run_stock_analysis(
+                    ticker, app_type="loadtest", team_pool=pool
+                )
+                if not result.final_analysis:
+                    self.errors.append(f"{ticker}: no final analysis")
+            except Exception as e:
+                self.errors.append(f"{ticker}: {type(e).__name__}: {e}")
+            finally:
+                self.in_flight -= 1
+            self.latencies.append(time.perf_counter() - started)
+            think = self.think_time()
+            if think:
+                await asyncio.sleep(think)
+
+    async def _probe_loop_lag(self):
+        """How late a short sleep wakes up: time the loop was blocked"""
+        loop = asyncio.get_running_loop()
+        while not self._stopped:
+            started = loop.time()
+            await asyncio.sleep(LAG_PROBE_SECONDS)
+            self.loop_lag.append(max(0.0, loop.time() - started - LAG_PROBE_SECONDS))
+
+    async def _sample_resources(self, started: float):
+        while not self._stopped:
+            self.timeline.append(
+                {
+                    "elapsed": round(time.perf_counter() - started, 2),
+                    "rss_mb": round(rss_mb(), 1),
+                    "in_flight": self.in_flight,
+                    "completed": len(self.latencies),
+                }
+            )
+            await asyncio.sleep(self.args.sample_interval)
+
+    async def run(self) -> dict:
+        topology = self.args.topology
+        pool = TeamPool(
+            team_factory=lambda: trade_recommendation_team(topology),
+            max_idle=self.users,
+        )
+        prefetch_before = prefetch_stats()
+        started = time.perf_counter()
+        rss_start = rss_mb()
+        probes = [
+            asyncio.create_task(self._probe_loop_lag()),
+            asyncio.create_task(self._sample_resources(started)),
+        ]
+        deadline = started + self.args.duration
+        await asyncio.gather(
+            *(self._user(number, pool, deadline) for number in range(self.users))
+        )
+        elapsed = time.perf_counter() - started
+        self._stopped = True
+        await asyncio.gather(*probes)
+        rss_end = rss_mb()
+        prefetch = {
+            name: value - prefetch_before[name]
+            for name, value in prefetch_stats().items()
+            if name != "hit_rate"
+        }
+        prefetch["hit_rate"] = hit_rate(prefetch)
+
+        completed = len(self.latencies)
+        return {
+            "users": self.users,
+            "elapsed_seconds": round(elapsed, 2),
+            "completed": completed,
+            "errors": len(self.errors),
+            "error_samples": self.errors[:5],
+            "throughput_per_minute": round(completed / elapsed * 60, 2),
+            "latency_seconds": _percentiles(self.latencies),
+            "loop_lag_seconds": _percentiles(self.loop_lag),
+            "rss_start_mb": round(rss_start, 1),
+            "rss_end_mb": round(rss_end, 1),
+            "rss_growth_mb": round(rss_end - rss_start, 1),
+            "prefetch": prefetch,
+            "timeline": self.timeline,
+        }
+
+
+def capacity(levels: List[dict], max_p95: Optional[float]) -> dict:
+    """Most users within the p95 budget and without errors"""
+    budget = max_p95
+    if budget is None:
+        budget = levels[0]["latency_seconds"].get("p95", 0.0) * LATENCY_DEGRADATION
+    within = [
+        level
+        for level in levels
+        if not level["errors"]
+        and level["completed"]
+        and level["latency_seconds"]["p95"] <= budget
+    ]
+    best = max(within, key=lambda level: level["users"], default=None)
+    return {
+        "p95_budget_seconds": round(budget, 4),
+        "users": best["users"] if best else 0,
+        "throughput_per_minute": best["throughput_per_minute"] if best else 0.0,
+    }
+
+
+def _hit_rate(prefetch: dict) -> str:
+    """Prefetch hit rate and the number of wasted prefetches, as in 92% -3"""
+    if prefetch["hit_rate"] is None:
+        return "-"
+    wasted = prefetch["cancelled"] + prefetch["unused"] + prefetch["failed"]
+    return f"{prefetch['hit_rate']:.0%} -{wasted}"
+
+
+def print_report(levels: List[dict], result: dict):
+    print(
+        f"{'users':>5} {'done':>6} {'err':>4} {'per min':>8} {'p50 s':>7} "
+        f"{'p95 s':>7} {'p99 s':>7} {'lag p99':>8} {'lag max':>8} {'rss Δ MB':>9} "
+        f"{'prefetch':>9}"
+    )
+    for level in levels:
+        latency, lag = level["latency_seconds"], level["loop_lag_seconds"]
+        print(
+            f"{level['users']:>5} {level['completed']:>6} {level['errors']:>4} "
+            f"{level['throughput_per_minute']:>8.1f} {latency.get('p50', 0):>7.3f} "
+            f"{latency.get('p95', 0):>7.3f} {latency.get('p99', 0):>7.3f} "
+            f"{lag.get('p99', 0):>8.3f} {lag.get('max', 0):>8.3f} "
+            f"{level['rss_growth_mb']:>+9.1f} {_hit_rate(level['prefetch']):>9}"
+        )
+        for error in level["error_samples"]:
+            print(f"      ⚠️ {error}")
+    print(
+        f"📈 Capacity: {result['users']} concurrent users "
+        f"({result['throughput_per_minute']:.1f} analyses/min) "
+        f"within a p95 of {result['p95_budget_seconds']:.3f}s"
+    )
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Multi-user analysis load test")
+    parser.add_argument(
+        "--users", type=int, nargs="+", default=[1, 4, 16], help="User counts to run"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=30.0, help="Seconds each level runs"
+    )
+    parser.add_argument(
+        "--tickers",
+        nargs="+",
+        default=["TCS", "INFY", "RELIANCE", "HDFCBANK", "ITC"],
+        help="Ticker mix as TICKER or TICKER:WEIGHT",
+    )
+    parser.add_argument(
+        "--model-latency",
+        default="lognormal:1.0:0.5",
+        help="Latency of each model call",
+    )
+    parser.add_argument(
+        "--data-latency",
+        default="uniform:0.05:0.3",
+        help="Latency of each market data call",
+    )
+    parser.add_argument(
+        "--think-time",
+        default="exp:1.0",
+        help="Pause between a user's analyses",
+    )
+    parser.add_argument(
+        "--topology",
+        choices=TEAM_TOPOLOGIES,
+        default="round_robin",
+        help="Team topology the analyses run with",
+    )
+    parser.add_argument(
+        "--ramp-up", type=float, default=2.0, help="Seconds over which users start"
+    )
+    parser.add_argument(
+        "--no-prefetch",
+        action="store_true",
+        help="Turn speculative snapshot prefetch off",
+    )
+    parser.add_argument(
+        "--change-gate",
+        action="store_true",
+        help="Reuse unchanged recommendations (in-memory store) instead of "
+        "analysing every request",
+    )
+    parser.add_argument(
+        "--cold",
+        action="store_true",
+        help="Disable the snapshot cache so every analysis fetches data",
+    )
+    parser.add_argument("--max-p95", type=float, help="p95 budget in seconds")
+    parser.add_argument(
+        "--sample-interval", type=float, default=1.0, help="Memory sample interval"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the full report as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        model_latency, data_latency, think_time = (
+            parse_latency(spec)
+            for spec in (args.model_latency, args.data_latency, args.think_time)
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    _rng.seed(args.seed)
+    stub_model_client.STUB_LATENCY_SECONDS = model_latency
+    stub_ticker.STUB_LATENCY_SECONDS = data_latency
+    if args.no_prefetch:
+        prefetcher.max_candidates = 0
+    if args.cold:
+        snapshot_cache.ttl_seconds = 0
+    # Load test sessions stay out of the usage ledger and the recommendation store
+    cost_tracker.ledger_path = None
+    change_gate.enabled = args.change_gate
+    change_gate.store = RecommendationStore(None)
+    statement_store.directory = None
+
+    levels = []
+    for users in args.users:
+        snapshot_cache.clear()
+        gc.collect()
+        print(f"🚦 {users} users for {args.duration:.0f}s...", file=sys.stderr)
+        levels.append(asyncio.run(LoadLevel(users, args, think_time).run()))
+
+    result = capacity(levels, args.max_p95)
+    print_report(levels, result)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "created_at": datetime.now().isoformat(timespec="seconds"),
+                    "config": {
+                        key: value
+                        for key, value in vars(args).items()
+                        if key != "output"
+                    },
+                    "levels": levels,
+                    "capacity": result,
+                },
+                f,
+                indent=2,
+            )
+        print(f"💾 Report written to {args.output}", file=sys.stderr)
+    return 0 if result["users"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
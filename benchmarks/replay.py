@@ -0,0 +1,108 @@
+"""
+Replayed Model Responses for the Agent Team
+Swaps the OpenAI clients of every agent for autogen's
+ReplayChatCompletionClient: the data collection agent replays a call to
+get_full_stock_info for the ticker, the analysis (or aggregation) agent
+replays a fixed report and specialist agents a short finding. The budget
+wrapper stays in place so per-stage usage is tracked
+as in production, and every prompt the agents sent is kept for counting.
+"""
+
+from contextlib import contextmanager
+from typing import Dict, List
+from unittest import mock
+
+from autogen_core import FunctionCall
+from autogen_core.models import CreateResult, RequestUsage
+from autogen_ext.models.replay import ReplayChatCompletionClient
+
+from ai.models import gtp_model_client
+from ai.models.budgeted_model_client import BudgetedChatCompletionClient
+
+# Roughly the length and shape of a real analysis report
+REPLAYED_ANALYSIS = """## Stock Analysis Report
+
+### Price Action
+The stock trades within its 52-week range, closer to the upper half, with
+volume in line with its recent average.
+
+### Fundamentals
+Trailing and forward P/E are moderate for the sector. Price to book is
+reasonable and profit margins are stable year over year.
+
+### Financial Statements
+Revenue and net income have grown over the last four reported years.
+Operating cash flow covers capital expenditure comfortably and debt levels
+are manageable relative to equity.
+
+### Holders
+Institutional and mutual fund holdings are steady, indicating continued
+confidence from long-term investors.
+
+### Conclusion
+Fundamentals and cash flow are solid; sentiment is neutral to positive.
+
+**Final recommendation: HOLD**
+"""
+
+# A specialist's finding in the parallel topology
+REPLAYED_FINDING = """Valuation and growth are in line with the sector and the
+latest figures show no sharp deterioration.
+Signal: NEUTRAL
+"""
+
+MODEL_INFO = {
+    "vision": False,
+    "function_calling": True,
+    "json_output": False,
+    "family": "gpt-4o",
+    "structured_output": False,
+}
+
+
+def _scripts(ticker: str) -> Dict[str, list]:
+    """Responses each agent (by budget stage) replays, in order; specialists
+    (any other stage) replay REPLAYED_FINDING"""
+    tool_call = CreateResult(
+        finish_reason="function_calls",
+        content=[
+            FunctionCall(
+                id="call_replay",
+                name="get_full_stock_info",
+                arguments=f'{{"ticker_symbol": "{ticker}"}}',
+            )
+        ],
+        usage=RequestUsage(prompt_tokens=0, completion_tokens=20),
+        cached=False,
+    )
+    return {
+        "TradedataCollectionAgent": [tool_call],
+        "TradeAnalysisAgent": [REPLAYED_ANALYSIS],
+    }
+
+
+@contextmanager
+def replayed_models(ticker: str):
+    """
+    Teams built inside this block use replay clients scripted for ticker
+    Yields {stage: [replay clients]} whose create_calls hold the prompts;
+    each client's `script` holds the responses it replays.
+    """
+    clients: Dict[str, List[ReplayChatCompletionClient]] = {}
+    scripts = _scripts(ticker)
+    models = dict(gtp_model_client.STRATEGY_MODELS)
+
+    def get_budgeted_client(strategy_name, stage="", fallback_strategy=""):
+        model = models.get(strategy_name, strategy_name)
+        script = scripts.get(stage, [REPLAYED_FINDING])
+        client = ReplayChatCompletionClient(
+            script, model_info={**MODEL_INFO, "model": model}
+        )
+        client.script = script
+        clients.setdefault(stage, []).append(client)
+        return BudgetedChatCompletionClient(client, stage=stage)
+
+    with mock.patch.object(
+        gtp_model_client, "get_budgeted_client", get_budgeted_client
+    ):
+        yield clients
@@ -0,0 +1,59 @@
+"""
+Model Routing Check
+Routes the analysis prompt of every recorded fixture through the adaptive
+router and fails unless both the fast and the strong model are chosen for
+some of them, so a threshold or signal change can't silently send every
+routine ticker to gpt-4o (or every hard one to gpt-4o-mini).
+
+Usage:
+  python -m benchmarks.routing_check [--config config/model_routing.json]
+"""
+
+import argparse
+import os
+import sys
+from typing import Optional
+
+# Offline by design: stub model clients count the prompt tokens
+os.environ["MODEL_PROVIDER"] = "stub"
+
+from autogen_core.models import UserMessage
+
+from ai.models.gtp_model_client import get_openai_client
+from ai.models.model_router import build_routing_client
+from ai.tools.statement_store import statement_store
+from ai.tools.stock_information_tool import get_full_stock_info
+from benchmarks.fixtures import load_fixtures, recorded_market_data
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Model routing check")
+    parser.add_argument("--config", help="Routing config (default: the app's)")
+    args = parser.parse_args(argv)
+
+    statement_store.directory = None
+    router = build_routing_client(get_openai_client, args.config)
+    fixtures = load_fixtures()
+    routes = set()
+    print(f"{'ticker':<14} {'complexity':>10} {'tokens':>7}  route   reason")
+    with recorded_market_data(fixtures):
+        for symbol in fixtures:
+            payload = str(get_full_stock_info(symbol))
+            decision = router.choose_route(
+                [UserMessage(content=payload, source="user")]
+            )
+            routes.add(decision.route)
+            print(
+                f"{symbol:<14} {decision.complexity:>10.1f} "
+                f"{decision.prompt_tokens:>7}  {decision.route:<6}  {decision.reason}"
+            )
+    missing = {"fast", "strong"} - routes
+    if missing:
+        print(f"❌ No fixture routed to: {', '.join(sorted(missing))}")
+        return 1
+    print("✅ Fixtures reach both the fast and the strong route")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
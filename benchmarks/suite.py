@@ -0,0 +1,331 @@
+"""
+Offline End-to-End Benchmark Suite
+Runs the data tool, payload formatting / parsing and the full agent
+pipeline of each team topology against recorded market data
+(benchmarks/fixtures) and replayed model responses, and writes the results
+as a JSON baseline. Round-robin metrics keep their plain names; the
+parallel specialist team's are prefixed with "parallel.", and cost.* holds
+the estimated model cost of one analysis per topology.
+
+Usage:
+  python -m benchmarks.suite run [--repeat N] [--output results.json] [--compare]
+  python -m benchmarks.suite compare results.json [--baseline PATH]
+  python -m benchmarks.suite run --output benchmarks/baseline.json   # new baseline
+  python -m benchmarks.suite record TCS.NS INFY.NS   # uses the configured provider
+
+Comparisons (against benchmarks/baseline.json by default) exit with status 1
+when a metric regresses beyond its threshold.
+"""
+
+import os
+
+# Offline: no API key is needed, the replay clients answer every call
+os.environ.setdefault("MODEL_PROVIDER", "stub")
+
+import argparse
+import asyncio
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from ai.agents.change_gated_agent import change_gate
+from ai.teams.analysis_runner import run_stock_analysis
+from ai.teams.trade_recommendation_team import TEAM_TOPOLOGIES
+from ai.tools.statement_store import statement_store
+from ai.tools.stock_information_tool import get_full_stock_info, snapshot_cache
+from benchmarks import fixtures
+from benchmarks.replay import replayed_models
+from utils.autogen_tracker import parse_stock_data_for_tracking
+from utils.cost_tracker import calculate_cost, cost_tracker
+from utils.number_formatter import format_data_for_console
+from utils.payload_parser import clear_payload_cache, parse_payload
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Allowed relative increase before compare reports a regression
+DEFAULT_THRESHOLD = 0.25
+# Prompt sizes (and the cost estimated from them) are deterministic, so any
+# real growth is flagged
+DEFAULT_TOKEN_THRESHOLD = 0.02
+DETERMINISTIC_UNITS = ("tokens", "usd")
+# Shortest timed sample; faster calls are looped
+MIN_SAMPLE_SECONDS = 0.02
+
+
+def _timed(func: Callable, repeat: int, setup: Optional[Callable] = None) -> float:
+    """
+    Best seconds per func() call over repeat samples; setup() runs before
+    every call. Each sample loops until it lasts MIN_SAMPLE_SECONDS, so
+    sub-millisecond calls aren't lost in timer noise.
+    """
+
+    def sample(loops: int) -> float:
+        elapsed = 0.0
+        for _ in range(loops):
+            if setup is not None:
+                setup()
+            started = time.perf_counter()
+            func()
+            elapsed += time.perf_counter() - started
+        return elapsed
+
+    loops = 1
+    while (elapsed := sample(loops)) < MIN_SAMPLE_SECONDS:
+        loops *= 2 if elapsed * 10 > MIN_SAMPLE_SECONDS else 10
+    return min(sample(loops) / loops for _ in range(repeat))
+
+
+def _metric(value: float, unit: str) -> Dict[str, object]:
+    return {"value": round(value, 6), "unit": unit}
+
+
+def bench_tool_and_payloads(tickers: List[str], repeat: int) -> Dict[str, dict]:
+    """Data tool latency and formatting / parsing time of its payloads"""
+    tool, stored, formatting, parsing, tracking = [], [], [], [], []
+
+    def cold():
+        snapshot_cache.clear()
+        statement_store.clear()
+
+    for ticker in tickers:
+        tool.append(_timed(lambda: get_full_stock_info(ticker), repeat, cold))
+        # Between earnings the statements come from the statement store
+        stored.append(
+            _timed(lambda: get_full_stock_info(ticker), repeat, snapshot_cache.clear)
+        )
+        payload = str(get_full_stock_info(ticker))
+        formatting.append(
+            _timed(
+                lambda: format_data_for_console(payload), repeat, clear_payload_cache
+            )
+        )
+        parsing.append(
+            _timed(lambda: parse_payload(payload), repeat, clear_payload_cache)
+        )
+        tracking.append(_timed(lambda: parse_stock_data_for_tracking(payload), repeat))
+
+    return {
+        "tool.get_full_stock_info": _metric(statistics.mean(tool), "s"),
+        "tool.get_full_stock_info.stored_statements": _metric(
+            statistics.mean(stored), "s"
+        ),
+        "format.format_data_for_console": _metric(statistics.mean(formatting), "s"),
+        "parse.parse_payload": _metric(statistics.mean(parsing), "s"),
+        "parse.parse_stock_data_for_tracking": _metric(statistics.mean(tracking), "s"),
+    }
+
+
+def _text(content) -> str:
+    if isinstance(content, list):
+        return "".join(str(getattr(c, "content", c)) for c in content)
+    return str(getattr(content, "content", content))
+
+
+def _stage_usage(clients) -> Dict[str, Dict[str, object]]:
+    """Model and estimated prompt / completion tokens per stage (4 chars a token)"""
+    usage = {}
+    for stage, stage_clients in clients.items():
+        prompt_chars = completion_chars = 0
+        for client in stage_clients:
+            for call in client.create_calls:
+                prompt_chars += sum(len(_text(m.content)) for m in call["messages"])
+            replies = client.script[: len(client.create_calls)]
+            completion_chars += sum(len(_text(reply)) for reply in replies)
+        usage[stage] = {
+            "model": stage_clients[0].model_info["model"],
+            "prompt_tokens": prompt_chars // 4,
+            "completion_tokens": completion_chars // 4,
+        }
+    return usage
+
+
+def _prompt_tokens(clients) -> Dict[str, int]:
+    """Estimated prompt tokens each stage sent"""
+    return {
+        stage: usage["prompt_tokens"] for stage, usage in _stage_usage(clients).items()
+    }
+
+
+def _estimated_cost(clients) -> float:
+    """Model cost of the run at MODEL_PRICING, from the estimated tokens"""
+    return sum(
+        calculate_cost(
+            usage["model"], usage["prompt_tokens"], usage["completion_tokens"]
+        )
+        for usage in _stage_usage(clients).values()
+    )
+
+
+async def _run_pipeline(ticker: str, topology: str):
+    with replayed_models(ticker) as clients:
+        result = await run_stock_analysis(
+            ticker, app_type="benchmark", topology=topology
+        )
+    if not result.final_analysis or not result.stock_data:
+        raise RuntimeError(f"Replayed pipeline for {ticker} produced no output")
+    return clients
+
+
+def bench_pipeline(
+    tickers: List[str], repeat: int, topology: str = "round_robin"
+) -> Dict[str, dict]:
+    """Full team run wall time, peak traced memory, prompt tokens and cost"""
+    wall, peaks, costs = [], [], []
+    tokens: Dict[str, List[int]] = {}
+    for ticker in tickers:
+        samples = []
+        for _ in range(repeat):
+            snapshot_cache.clear()
+            clear_payload_cache()
+            started = time.perf_counter()
+            clients = asyncio.run(_run_pipeline(ticker, topology))
+            samples.append(time.perf_counter() - started)
+        wall.append(statistics.median(samples))
+        for stage, count in _prompt_tokens(clients).items():
+            tokens.setdefault(stage, []).append(count)
+        costs.append(_estimated_cost(clients))
+
+        # Separate traced run: tracemalloc slows everything it measures
+        snapshot_cache.clear()
+        clear_payload_cache()
+        gc.collect()
+        tracemalloc.start()
+        asyncio.run(_run_pipeline(ticker, topology))
+        peaks.append(tracemalloc.get_traced_memory()[1] / 1024 / 1024)
+        tracemalloc.stop()
+
+    prefix = "" if topology == "round_robin" else f"{topology}."
+    metrics = {
+        f"{prefix}pipeline.wall_seconds": _metric(statistics.mean(wall), "s"),
+        f"{prefix}pipeline.peak_memory_mb": _metric(max(peaks), "MB"),
+        f"cost.{topology}_usd": _metric(statistics.mean(costs), "usd"),
+    }
+    for stage, counts in sorted(tokens.items()):
+        metrics[f"{prefix}tokens.{stage}"] = _metric(statistics.mean(counts), "tokens")
+    return metrics
+
+
+def run_suite(repeat: int, fixture_dir: str) -> dict:
+    recorded = fixtures.load_fixtures(fixture_dir)
+    if not recorded:
+        raise SystemExit(f"No fixtures in {fixture_dir}; record some first")
+    tickers = fixtures.fixture_tickers(recorded)
+    # Benchmark sessions stay out of the usage ledger, and every run analyses
+    cost_tracker.ledger_path = None
+    change_gate.enabled = False
+    statement_store.directory = None
+
+    with fixtures.recorded_market_data(recorded):
+        metrics = bench_tool_and_payloads(tickers, repeat)
+        for topology in TEAM_TOPOLOGIES:
+            metrics.update(bench_pipeline(tickers, repeat, topology))
+
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "tickers": tickers,
+        "metrics": metrics,
+    }
+
+
+def compare_results(
+    baseline: dict,
+    current: dict,
+    threshold: float = DEFAULT_THRESHOLD,
+    token_threshold: float = DEFAULT_TOKEN_THRESHOLD,
+) -> List[str]:
+    """Print the comparison table; returns the regressed metric names"""
+    regressions = []
+    print(f"{'metric':<40} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, base in sorted(baseline["metrics"].items()):
+        if name not in current["metrics"]:
+            print(f"{name:<40} {base['value']:>12.6g} {'missing':>12}")
+            continue
+        value = current["metrics"][name]["value"]
+        change = (value - base["value"]) / base["value"] if base["value"] else 0.0
+        limit = token_threshold if base["unit"] in DETERMINISTIC_UNITS else threshold
+        regressed = change > limit
+        if regressed:
+            regressions.append(name)
+        print(
+            f"{name:<40} {base['value']:>12.6g} {value:>12.6g} {change:>+8.1%}"
+            + ("  ❌" if regressed else "")
+        )
+    return regressions
+
+
+def _load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the suite and write results")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--fixtures", default=fixtures.FIXTURE_DIR)
+    run_parser.add_argument(
+        "--output", default="benchmark_results.json", help="Results JSON to write"
+    )
+    run_parser.add_argument(
+        "--compare", action="store_true", help="Compare the results with --baseline"
+    )
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="Fail when results regress against a baseline"
+    )
+    compare_parser.add_argument("current")
+    for sub in (run_parser, compare_parser):
+        sub.add_argument("--baseline", default=BASELINE_PATH)
+        sub.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+        sub.add_argument(
+            "--token-threshold", type=float, default=DEFAULT_TOKEN_THRESHOLD
+        )
+
+    record_parser = subparsers.add_parser(
+        "record", help="Record fixtures with the configured market data provider"
+    )
+    record_parser.add_argument("symbols", nargs="+")
+    record_parser.add_argument("--fixtures", default=fixtures.FIXTURE_DIR)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        fixtures.main(args.symbols, args.fixtures)
+        return 0
+
+    if args.command == "run":
+        current = run_suite(args.repeat, args.fixtures)
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+        if not args.compare:
+            for name, metric in current["metrics"].items():
+                print(f"{name:<40} {metric['value']:>12.6g} {metric['unit']}")
+            return 0
+    else:
+        current = _load(args.current)
+    baseline = _load(args.baseline)
+
+    regressions = compare_results(
+        baseline, current, args.threshold, args.token_threshold
+    )
+    if regressions:
+        print(f"❌ {len(regressions)} regressions: {', '.join(regressions)}")
+        return 1
+    print("✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,75 +1,58 @@
-from ai.agents.trade_analysis_agent import get_trade_analyst_agent
-from autogen_agentchat.messages import (
-    TextMessage,
-    ToolCallSummaryMessage,
-    ToolCallExecutionEvent,
-)
-from ai.teams.trade_recommendation_team import trade_recommendation_team
+from utils.config import check_model_config, load_config
+
+# .env settings must be in the environment before the modules below read them
+load_config()
+
+import argparse
 import asyncio
+import json
+import re
+import sys
+import time
 from pprint import pprint
-from utils.number_formatter import format_data_for_console
-from utils.cost_tracker import start_tracking, get_session_summary, format_cost_summary
-from utils.autogen_tracker import (
-    track_autogen_result,
-    get_team_summary,
-    format_team_summary,
-    parse_stock_data_for_tracking,
-)
-
-
-async def main():
-    # Start cost tracking session
-    session_id = start_tracking("console_stock_analysis")
-    print("🔢 Started token usage tracking for this analysis session...")
+from typing import Dict, List, Optional
+from utils.cost_tracker import format_cost_summary
+from utils.autogen_tracker import format_team_summary, parse_stock_data_for_tracking
+from utils.tracing import traced, flush_traces
+from utils.profiling import PROFILE_MODES, enable_profiling, profiled
+from utils.metrics import start_exporters_from_env, dump_metrics
+import os
+
+# Concurrent analyses of a batch run
+DEFAULT_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+
+
+@traced("console.analysis")
+@profiled("console.analysis")
+async def main(stock_name: Optional[str] = None):
+    # autogen, pandas and yfinance load here, not for --help
+    from ai.teams.analysis_runner import run_stock_analysis
+    from utils.stock_data_view import StockDataView
 
     model_strategy = "economic-task"  # Using depth-analysis for better results
-    stock_name = input("Enter stock name or symbol for analysis : ")
-    task = TextMessage(content=f"stock name : {stock_name}", source="user")
-    team = trade_recommendation_team()
+    if not stock_name:
+        stock_name = input("Enter stock name or symbol for analysis : ")
 
+    print("🔢 Started token usage tracking for this analysis session...")
     print(f"📊 Analyzing {stock_name}... (tracking token usage)")
-    result = await team.run(task=task)
-
-    # Track AutoGen team conversation
-    track_autogen_result(result)
-
-    # pprint(f"{result}")
-
-    # Extract and print only the final analysis from agents
-    trade_final_analysis = None
-    trade_data_collection = None
-
-    for message in result.messages:
-        # Get the final analysis from TradeAnalysisAgent
-        if isinstance(message, TextMessage) and message.source == "TradeAnalysisAgent":
-            trade_final_analysis = message.content
-        # Get the tool execution result (stock data) - using correct agent name
-        elif (
-            isinstance(message, ToolCallExecutionEvent)
-            and message.source == "TradedataCollectionAgent"
-        ):
-            # Extract the actual function result content
-            if message.content and len(message.content) > 0:
-                trade_data_collection = message.content[0].content
-        elif (
-            isinstance(message, ToolCallSummaryMessage)
-            and message.source == "TradedataCollectionAgent"
-        ):
-            trade_data_collection = message.content
+    # Runs the team in its own cost tracking session, closed when it finishes
+    result = await run_stock_analysis(stock_name.strip(), app_type="console")
+    trade_final_analysis = result.final_analysis
+    trade_data_collection = result.stock_data
 
     print("\n" + "=" * 60)
     print("📈 DATA CONSIDERED FOR STOCK ANALYSIS")
     print("=" * 60)
 
-    # Format the data before printing and track data parsing
-    formatted_data = format_data_for_console(trade_data_collection)
+    # Lazy formatted view of the collected data; sections format when printed
+    stock_data = StockDataView(trade_data_collection)
 
     # Parse stock data for detailed token tracking
     if trade_data_collection:
         data_sections = parse_stock_data_for_tracking(trade_data_collection)
         print(f"📊 Data sections processed: {list(data_sections.keys())}")
 
-    pprint(formatted_data)
+    pprint(stock_data.formatted)
 
     print("=" * 60)
     print("\n" + "=" * 60)
@@ -84,7 +67,7 @@ async def main():
     print("💰" * 60)
 
     # Session summary (exact usage if available)
-    session_summary = get_session_summary()
+    session_summary = result.session_summary
     if session_summary.strip():
         print(session_summary)
     else:
@@ -93,7 +76,7 @@ async def main():
         )
 
     # Team conversation summary (estimated)
-    team_summary = get_team_summary()
+    team_summary = result.team_summary
     if team_summary and team_summary.get("total_estimated_tokens", 0) > 0:
         print("\n" + format_team_summary(team_summary))
 
@@ -102,5 +85,208 @@ async def main():
     print("💰" * 60)
 
 
+def parse_tickers(text: str) -> List[str]:
+    """Tickers separated by commas / whitespace; '#' starts a comment"""
+    text = re.sub(r"#.*", "", text)
+    return [ticker for ticker in re.split(r"[,\s]+", text) if ticker]
+
+
+def read_tickers(args) -> List[str]:
+    """Tickers from the arguments, --file, or stdin (in that order), de-duplicated"""
+    tickers = []
+    for ticker in args.tickers:
+        if ticker == "-":
+            tickers += parse_tickers(sys.stdin.read())
+        else:
+            tickers += parse_tickers(ticker)
+    if args.file:
+        with open(args.file) as f:
+            tickers += parse_tickers(f.read())
+    if not args.tickers and not args.file and not sys.stdin.isatty():
+        tickers += parse_tickers(sys.stdin.read())
+    return list(dict.fromkeys(ticker.strip().upper() for ticker in tickers))
+
+
+def load_finished(output_path: Optional[str]) -> Dict[str, dict]:
+    """Successful records already written to the output file, by ticker"""
+    finished = {}
+    if not output_path or output_path == "-" or not os.path.exists(output_path):
+        return finished
+    with open(output_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A run killed mid-write can leave a partial last line
+                continue
+            if record.get("status") == "ok":
+                finished[record["ticker"]] = record
+    return finished
+
+
+async def run_batch(
+    tickers: List[str], output, concurrency: int, app_type: str = "batch"
+) -> int:
+    """Analyse tickers concurrently, writing one JSON line per finished ticker"""
+    from ai.teams.analysis_runner import run_stock_analysis
+    from ai.teams.team_pool import TeamPool
+
+    semaphore = asyncio.Semaphore(concurrency)
+    team_pool = TeamPool(max_idle=concurrency)
+    submitted = time.perf_counter()
+    failures = 0
+
+    async def analyse(ticker: str):
+        nonlocal failures
+        async with semaphore:
+            queued_seconds = time.perf_counter() - submitted
+            try:
+                result = await run_stock_analysis(
+                    ticker, app_type=app_type, team_pool=team_pool
+                )
+                record = {"status": "ok", **result.to_record()}
+                record["timings"]["queued_seconds"] = queued_seconds
+                print(
+                    f"✅ {ticker}: {record['recommendation'] or 'no verdict'} "
+                    f"({result.timings.get('total_seconds', 0):.1f}s)",
+                    file=sys.stderr,
+                )
+            except Exception as e:
+                failures += 1
+                record = {
+                    "status": "error",
+                    "ticker": ticker,
+                    "error": f"{type(e).__name__}: {e}",
+                    "timings": {"queued_seconds": queued_seconds},
+                }
+                print(f"❌ {ticker}: {record['error']}", file=sys.stderr)
+        # Written as soon as it finishes so an interrupted run can resume
+        output.write(json.dumps(record) + "\n")
+        output.flush()
+
+    await asyncio.gather(*(analyse(ticker) for ticker in tickers))
+    return failures
+
+
+@traced("console.batch")
+@profiled("console.batch")
+async def batch(args) -> int:
+    tickers = read_tickers(args)
+    if not tickers:
+        print("No tickers given (arguments, --file or stdin)", file=sys.stderr)
+        return 2
+
+    if args.resume:
+        finished = load_finished(args.output)
+        skipped = [ticker for ticker in tickers if ticker in finished]
+        tickers = [ticker for ticker in tickers if ticker not in finished]
+        if skipped:
+            print(
+                f"♻️ Reusing {len(skipped)} results already in {args.output}",
+                file=sys.stderr,
+            )
+
+    print(
+        f"📊 Analyzing {len(tickers)} stocks, {args.concurrency} at a time...",
+        file=sys.stderr,
+    )
+    if args.output == "-":
+        failures = await run_batch(tickers, sys.stdout, args.concurrency)
+    else:
+        with open(args.output, "a" if args.resume else "w") as output:
+            failures = await run_batch(tickers, output, args.concurrency)
+    return 1 if failures else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="AI stock trade analysis")
+    parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        help="Write CPU and memory profiles of the run to DIR (or set PROFILE_DIR)",
+    )
+    parser.add_argument(
+        "--profile-mode",
+        choices=PROFILE_MODES,
+        help="cprofile (default) or sample (all threads, wall clock)",
+    )
+    parser.add_argument(
+        "--refresh-statements",
+        action="store_true",
+        help="Refetch financial statements instead of using the statement store",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    interactive = subparsers.add_parser(
+        "interactive", help="Analyse one stock and print the full report (default)"
+    )
+    interactive.add_argument("ticker", nargs="?", help="Prompted for when omitted")
+
+    batch_parser = subparsers.add_parser(
+        "batch", help="Analyse many stocks and write JSON lines"
+    )
+    batch_parser.add_argument(
+        "tickers",
+        nargs="*",
+        help="Tickers (comma or space separated, '-' reads stdin); "
+        "stdin is read when neither tickers nor --file are given",
+    )
+    batch_parser.add_argument(
+        "--file", "-f", help="File with one or more tickers per line"
+    )
+    batch_parser.add_argument(
+        "--output",
+        "-o",
+        default="-",
+        help="JSONL output file ('-' for stdout, the default)",
+    )
+    batch_parser.add_argument(
+        "--concurrency",
+        "-c",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="Analyses running at the same time",
+    )
+    batch_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Append to --output and skip tickers it already has results for",
+    )
+    return parser
+
+
+def cli(argv: Optional[list] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.profile:
+        enable_profiling(args.profile, args.profile_mode or "")
+    if args.refresh_statements:
+        from ai.tools.statement_store import statement_store
+
+        statement_store.invalidate()
+    try:
+        check_model_config()
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    if args.command == "batch":
+        if args.concurrency < 1:
+            print("--concurrency must be at least 1", file=sys.stderr)
+            return 2
+        if args.resume and args.output == "-":
+            print("--resume needs an --output file", file=sys.stderr)
+            return 2
+        return asyncio.run(batch(args))
+    asyncio.run(main(getattr(args, "ticker", None)))
+    return 0
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    start_exporters_from_env()
+    exit_code = cli()
+    if os.getenv("METRICS_DUMP_PATH"):
+        # Final dump so short console runs still leave metrics for the scraper
+        dump_metrics(os.getenv("METRICS_DUMP_PATH"))
+    trace_path = flush_traces()
+    if trace_path:
+        print(f"🧭 Stage trace written to {trace_path}", file=sys.stderr)
+    sys.exit(exit_code)
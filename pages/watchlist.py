@@ -0,0 +1,187 @@
+from utils.config import load_config
+
+# .env settings must be in the environment before the modules below read them
+load_config()
+
+import os
+import re
+import time
+
+import pandas as pd
+import streamlit as st
+
+from ai.tools.snapshot_warmer import snapshot_warmer
+from ai.tools.watchlist_data import (
+    load_watchlist_rows,
+    pending_fundamentals,
+    resolved_symbol,
+)
+from utils.change_detection import analysis_inputs, reanalysis_reason
+from utils.job_runner import JobRunner
+from utils.recommendation_store import default_store
+from utils.tracing import traced
+
+# Table refresh interval; quotes and fundamentals are served from their caches
+WATCHLIST_REFRESH_SECONDS = float(os.getenv("WATCHLIST_REFRESH_SECONDS", "30"))
+# LLM analyses the watchlist runs at the same time
+WATCHLIST_MAX_ANALYSES = int(os.getenv("WATCHLIST_MAX_ANALYSES", "4"))
+DEFAULT_WATCHLIST = os.getenv(
+    "WATCHLIST", "TCS, HDFCBANK, CDSL, INFY, RELIANCE, ITC, SBIN, ICICIBANK"
+)
+
+st.set_page_config(
+    page_title="📋 Watchlist",
+    page_icon="📋",
+    layout="wide",
+)
+
+
+@st.cache_resource
+def get_watchlist_runner():
+    """Background runner for watchlist re-analyses, shared by every session"""
+    return JobRunner(max_concurrent=WATCHLIST_MAX_ANALYSES)
+
+
+@st.cache_resource
+def get_watchlist_team_pool():
+    from ai.teams.team_pool import TeamPool
+
+    return TeamPool()
+
+
+def get_recommendation_store():
+    # Written by the analysis gate under the resolved ticker; the page only reads
+    return default_store()
+
+
+@traced("watchlist.run_analysis")
+async def run_watchlist_analysis(symbol, team_pool):
+    """Analyse one watchlist row; the analysis gate records its verdict"""
+    from ai.teams.analysis_runner import run_stock_analysis
+
+    return await run_stock_analysis(symbol, app_type="watchlist", team_pool=team_pool)
+
+
+def running_symbols(runner):
+    """Symbols with an unfinished watchlist analysis job"""
+    return {
+        job.name.split(":", 1)[1]
+        for job in list(runner.jobs.values())
+        if job.name.startswith("watchlist:") and not job.finished
+    }
+
+
+def parse_symbols(text):
+    return list(dict.fromkeys(s.upper() for s in re.split(r"[,\s]+", text) if s))
+
+
+@st.fragment(run_every=WATCHLIST_REFRESH_SECONDS)
+def watchlist_panel(symbols):
+    """Watchlist table; reruns on its own so the rest of the page stays idle"""
+    runner = get_watchlist_runner()
+    store = get_recommendation_store()
+    try:
+        rows = load_watchlist_rows(symbols)
+    except Exception as e:
+        st.error(f"Could not load market data: {str(e)[:200]}")
+        return
+
+    running = running_symbols(runner)
+    recommendations, analysed, statuses, stale = [], [], [], []
+    for row in rows.to_dict("records"):
+        symbol = row["Symbol"]
+        ticker = row["Ticker"]
+        # Keyed by the resolved ticker the analysis gate records under
+        record = store.get(ticker) if isinstance(ticker, str) else None
+        recommendations.append(record["recommendation"] if record else None)
+        analysed.append(
+            pd.to_datetime(record["analysed_at"], unit="s") if record else None
+        )
+        if symbol in running:
+            statuses.append("🔄 analysing")
+            continue
+        if pd.isna(row["Price"]):
+            statuses.append("⚠️ no market data")
+            continue
+        reason = reanalysis_reason(record, analysis_inputs(row))
+        statuses.append(f"🟡 {reason}" if reason else "🟢 up to date")
+        if reason:
+            stale.append(symbol)
+
+    rows.insert(2, "Recommendation", recommendations)
+    rows.insert(3, "Status", statuses)
+    rows["Analysed"] = analysed
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Stocks", len(rows))
+    col2.metric("Need analysis", len(stale))
+    col3.metric("Analysing", len(running))
+    col4.metric("Fundamentals loading", pending_fundamentals())
+
+    st.dataframe(
+        rows,
+        hide_index=True,
+        use_container_width=True,
+        height=min(36 * (len(rows) + 1), 720),
+        column_config={
+            "Price": st.column_config.NumberColumn(format="%.2f"),
+            "Change %": st.column_config.NumberColumn(format="%+.2f%%"),
+            "Volume": st.column_config.NumberColumn(format="compact"),
+            "Market Cap": st.column_config.NumberColumn(format="compact"),
+            "Trailing P/E": st.column_config.NumberColumn(format="%.1f"),
+            "Price to Book": st.column_config.NumberColumn(format="%.2f"),
+            "52-Week High": st.column_config.NumberColumn(format="%.2f"),
+            "52-Week Low": st.column_config.NumberColumn(format="%.2f"),
+            "Analysed": st.column_config.DatetimeColumn(format="DD MMM HH:mm"),
+        },
+    )
+    st.caption(
+        f"Refreshed {time.strftime('%H:%M:%S')} • quotes every "
+        f"{WATCHLIST_REFRESH_SECONDS:.0f}s • the LLM only re-runs for rows whose "
+        "price or fundamentals moved materially"
+    )
+
+    if stale and st.button(f"🧠 Re-analyse {len(stale)} changed rows", type="primary"):
+        team_pool = get_watchlist_team_pool()
+        for symbol in stale:
+            runner.submit(
+                lambda symbol=symbol: run_watchlist_analysis(symbol, team_pool),
+                name=f"watchlist:{symbol}",
+            )
+        st.rerun(scope="fragment")
+
+
+st.markdown("## 📋 Watchlist")
+watchlist_text = st.text_area(
+    "Symbols (comma or newline separated)",
+    value=DEFAULT_WATCHLIST,
+    key="watchlist_symbols",
+    height=80,
+)
+symbols = parse_symbols(watchlist_text)
+
+if symbols:
+    # Analyses of watchlist rows then start from warm snapshots
+    snapshot_warmer.watch(symbols)
+    snapshot_warmer.start()
+    watchlist_panel(symbols)
+
+    # Full text of the stored analyses
+    store = get_recommendation_store()
+    records = {}
+    for symbol in symbols:
+        ticker = resolved_symbol(symbol)
+        record = store.get(ticker) if ticker else None
+        if record:
+            records[symbol] = record
+    if records:
+        with st.expander("🧠 Latest analyses"):
+            symbol = st.selectbox("Stock", list(records))
+            record = records[symbol]
+            st.caption(
+                f"{record['recommendation'] or 'No verdict'} • analysed "
+                f"{time.strftime('%d %b %H:%M', time.localtime(record['analysed_at']))}"
+            )
+            st.markdown(record.get("analysis") or "")
+else:
+    st.info("Add some stock symbols to the watchlist")
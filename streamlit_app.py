@@ -1,24 +1,28 @@
+from utils.config import check_model_config, load_config
+
+# .env settings must be in the environment before the modules below read them
+load_config()
+
 import streamlit as st
-import asyncio
-from ai.agents.trade_analysis_agent import get_trade_analyst_agent
-from autogen_agentchat.messages import (
-    TextMessage,
-    ToolCallSummaryMessage,
-    ToolCallExecutionEvent,
-)
-from ai.teams.trade_recommendation_team import trade_recommendation_team
-import json
+import os
 import time
-import ast
-import re
-from utils.number_formatter import format_large_number, format_data_for_console
-from utils.cost_tracker import start_tracking, get_session_summary, format_cost_summary
-from utils.autogen_tracker import (
-    track_autogen_result,
-    get_team_summary,
-    format_team_summary,
-    parse_stock_data_for_tracking,
-)
+from utils.cost_tracker import format_cost_summary
+from utils.autogen_tracker import format_team_summary, parse_stock_data_for_tracking
+from utils.job_runner import CANCELLED, DONE, JobRunner, report_progress
+from utils.tracing import span, traced, flush_traces
+from utils.profiling import profiled, profiler, recent_profiles
+from utils.metrics import start_exporters_from_env
+from utils.ttl_cache import TTLCache, clear_all_caches
+from ai.tools.snapshot_warmer import snapshot_warmer
+
+# Metrics exporters are process-wide and only start once per server
+start_exporters_from_env()
+
+# Finished analyses are reused per ticker for this long
+ANALYSIS_CACHE_TTL_SECONDS = int(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", "900"))
+
+# Rows per page of the statement and holder tables
+TABLE_PAGE_SIZE = int(os.getenv("TABLE_PAGE_SIZE", "25"))
 
 # Configure Streamlit page
 st.set_page_config(
@@ -100,6 +104,11 @@ st.markdown(
     "### Get comprehensive stock analysis with AI agents specializing in Indian stock market"
 )
 
+# Handle sample stock selection (sidebar buttons below trigger a rerun)
+sample_selected = "stock_input" in st.session_state
+if sample_selected:
+    st.session_state.stock_name_input = st.session_state.pop("stock_input")
+
 # Main input section
 col1, col2 = st.columns([3, 1])
 
@@ -108,6 +117,7 @@ with col1:
         "🏢 Enter Stock Name or Symbol",
         placeholder="e.g., TCS, HDFC Bank, CDSL, INFY",
         help="Enter Indian stock name or symbol (NSE/BSE)",
+        key="stock_name_input",
     )
 
 with col2:
@@ -115,112 +125,162 @@ with col2:
     analyze_button = st.button(
         "🔍 Analyze Stock", type="primary", use_container_width=True
     )
+    analyze_button = analyze_button or sample_selected
+
+
+@st.cache_resource
+def get_team_pool():
+    """Process-wide pool of teams and the model clients inside them"""
+    # The agent stack (autogen, OpenAI SDK) loads with the first analysis
+    from ai.teams.team_pool import TeamPool
+
+    return TeamPool()
+
+
+@st.cache_resource
+def get_job_runner():
+    """Process-wide background runner; analyses of every session run on its loop"""
+    return JobRunner()
+
+
+@st.cache_resource
+def get_analysis_cache():
+    """Finished analyses per ticker, shared by every session"""
+    return TTLCache("analysis", ANALYSIS_CACHE_TTL_SECONDS, maxsize=64)
 
 
 # Function to run the analysis
-async def run_analysis(stock_symbol):
-    """Run the stock analysis using the agent team"""
-    # Start cost tracking session
-    session_id = start_tracking(f"streamlit_analysis_{stock_symbol}")
-
-    task = TextMessage(content=f"stock name : {stock_symbol}", source="user")
-    team = trade_recommendation_team()
-    result = await team.run(task=task)
-
-    # Track AutoGen team conversation
-    track_autogen_result(result)
-
-    # Extract data from messages
-    trade_final_analysis = None
-    trade_data_collection = None
-
-    for i, message in enumerate(result.messages):
-        # Get the final analysis from TradeAnalysisAgent
-        if isinstance(message, TextMessage) and message.source == "TradeAnalysisAgent":
-            trade_final_analysis = message.content
-        # Get the tool execution result (stock data)
-        elif (
-            isinstance(message, ToolCallExecutionEvent)
-            and message.source == "TradedataCollectionAgent"
-        ):
-            if message.content and len(message.content) > 0:
-                trade_data_collection = message.content[0].content
-        elif (
-            isinstance(message, ToolCallSummaryMessage)
-            and message.source == "TradedataCollectionAgent"
-        ):
-            trade_data_collection = message.content
-
-    # Get cost summary for return
-    session_summary = get_session_summary()
-    team_summary = get_team_summary()
-
-    return trade_final_analysis, trade_data_collection, session_summary, team_summary
-
-
-# Function to safely parse data from string
-def safe_parse_data(data):
-    """Safely parse data string to dictionary, handling various formats"""
-    if not data:
-        return None
-
-    if not isinstance(data, str):
-        return data
-
-    # Clean the data string first
-    data_str = str(data).strip()
-
-    # Handle pprint format (starts and ends with parentheses)
-    if data_str.startswith("(") and data_str.endswith(")"):
-        data_str = data_str[1:-1].strip()
-
-    # Handle single or double quotes around the entire string
-    if (data_str.startswith("'") and data_str.endswith("'")) or (
-        data_str.startswith('"') and data_str.endswith('"')
-    ):
-        data_str = data_str[1:-1]
-
-    # Try multiple parsing strategies
-    parsing_strategies = [
-        # Strategy 1: Try JSON parsing first
-        lambda d: json.loads(d),
-        # Strategy 2: Try direct eval if it looks like a dict
-        lambda d: (
-            eval(d) if d.strip().startswith("{") and d.strip().endswith("}") else None
-        ),
-        # Strategy 3: Try ast.literal_eval directly
-        lambda d: ast.literal_eval(d),
-        # Strategy 4: Fix leading zeros and try ast.literal_eval
-        lambda d: ast.literal_eval(re.sub(r":\s*0+(\d)", r": \1", d)),
-        # Strategy 5: More aggressive leading zero fix
-        lambda d: ast.literal_eval(re.sub(r"(\W)0+(\d)", r"\1\2", d)),
-        # Strategy 6: Replace problematic numbers with strings and parse
-        lambda d: ast.literal_eval(re.sub(r":\s*0+(\d+)", r': "\1"', d)),
-        # Strategy 7: Handle multiline strings by replacing newlines
-        lambda d: ast.literal_eval(re.sub(r"\n\s*", " ", d)),
-        # Strategy 8: Try to extract just the dictionary part if it's embedded
-        lambda d: (
-            ast.literal_eval(re.search(r"\{.*\}", d, re.DOTALL).group())
-            if re.search(r"\{.*\}", d, re.DOTALL)
-            else None
-        ),
-    ]
+@traced("streamlit.run_analysis")
+@profiled("streamlit.run_analysis")
+async def run_analysis(stock_symbol, team_pool, analysis_cache):
+    """Run the stock analysis using the agent team and cache the result"""
+    from ai.teams.analysis_runner import run_stock_analysis
+
+    result = await run_stock_analysis(
+        stock_symbol,
+        app_type="streamlit",
+        team_pool=team_pool,
+        on_update=report_progress,
+    )
+    if result.stock_data or result.final_analysis:
+        analysis_cache.set(stock_symbol, result)
+    return result
+
+
+def start_analysis(stock_symbol):
+    """Reuse a cached analysis or submit a background job for the ticker"""
+    key = stock_symbol.strip().upper()
+    st.session_state.analysis_symbol = key
+    st.session_state.pop("analysis_result", None)
+    st.session_state.pop("analysis_job_id", None)
+
+    analysis_cache = get_analysis_cache()
+    cached = analysis_cache.get(key)
+    if cached is not None:
+        st.session_state.analysis_result = cached
+        return
 
-    for i, strategy in enumerate(parsing_strategies):
+    # Join a job another session already started for this ticker
+    runner = get_job_runner()
+    job_name = f"analysis:{key}"
+    job_id = next(
+        (
+            job.job_id
+            for job in list(runner.jobs.values())
+            if job.name == job_name and not job.finished
+        ),
+        None,
+    )
+    if job_id is None:
         try:
-            result = strategy(data_str)
-            if result is not None and isinstance(result, dict):
-                return result
-        except Exception as e:
-            continue
+            check_model_config()
+        except ValueError as e:
+            st.error(f"❌ {e}")
+            return
+        team_pool = get_team_pool()
+        job_id = runner.submit(
+            lambda: run_analysis(key, team_pool, analysis_cache), name=job_name
+        )
+    st.session_state.analysis_job_id = job_id
+
+
+@st.fragment(run_every=1.0)
+def show_job_progress(job_id, data_shown):
+    """Poll the background job; rerun the page when data arrives or it finishes"""
+    job = get_job_runner().get(job_id)
+    if job is None or job.finished:
+        st.rerun()
+    if not data_shown and job.progress.get("stock_data"):
+        # Render the data panel now, before the analysis agent has answered
+        st.rerun()
+    symbol = st.session_state.get("analysis_symbol", "")
+    stage = "writing the analysis" if data_shown else "collecting stock data"
+    st.info(
+        f"🔍 Analyzing {symbol}... {job.elapsed_seconds:.0f}s "
+        f"({stage}, tracking token usage)"
+    )
+    if st.button("✖️ Cancel analysis", key=f"cancel_{job_id}"):
+        get_job_runner().cancel(job_id)
+
+
+def get_stock_data_view(data, tables=None):
+    """StockDataView for data, kept across reruns so sections format once"""
+    from utils.stock_data_view import StockDataView
+
+    view = st.session_state.get("stock_data_view")
+    if view is None or view.raw != data or (tables and not view.tables):
+        view = st.session_state.stock_data_view = StockDataView(data, tables)
+    return view
+
+
+def display_table(name, table):
+    """One statement / holder table as a typed, paginated grid"""
+    total_rows = len(table)
+    pages = max(1, -(-total_rows // TABLE_PAGE_SIZE))
+    page = 1
+    if pages > 1:
+        page = st.number_input(
+            "Page", min_value=1, max_value=pages, value=1, key=f"table_page_{name}"
+        )
+    start = (page - 1) * TABLE_PAGE_SIZE
+    rows = table.iloc[start : start + TABLE_PAGE_SIZE]
 
-    # If all parsing fails, return None
-    return None
+    # Numbers stay numeric (sortable); the grid renders them compactly
+    number_columns = {
+        column: st.column_config.NumberColumn(format="compact")
+        for column in rows.select_dtypes("number").columns
+    }
+    st.dataframe(rows, use_container_width=True, column_config=number_columns)
+    if pages > 1:
+        st.caption(f"Rows {start + 1}-{start + len(rows)} of {total_rows}")
+
+
+def display_tables(view):
+    """Statements and holders as tables, falling back to their payload text"""
+    from utils.stock_data_view import TABLE_SECTIONS
+
+    names = [
+        name
+        for names in TABLE_SECTIONS.values()
+        for name in names
+        if name in view.tables or view.table_text(name)
+    ]
+    if not names:
+        return
+
+    st.markdown("### 📑 Statements & Holders")
+    for tab, name in zip(st.tabs(names), names):
+        with tab:
+            if name in view.tables:
+                display_table(name, view.tables[name])
+            else:
+                # Snapshot no longer cached; show the text the agent received
+                st.code(view.table_text(name), language=None)
 
 
 # Function to display stock data in console format
-def display_console_format_data(data):
-    """Display stock data in the same format as console output"""
+def display_console_format_data(data, tables=None):
+    """Display the collected stock data as summaries and typed tables"""
     if not data:
         st.warning("No data available")
         return
@@ -245,46 +305,33 @@ def display_console_format_data(data):
         unsafe_allow_html=True,
     )
 
-    # Display the raw data in a simple text scroller format
+    # Sections are formatted once and shared by everything below
+    view = get_stock_data_view(data, tables)
 
-    # Convert data to string format for display with formatted numbers
-    if data:
+    def raw_data_text():
         try:
-            # Try to format the data first
-            formatted_data = format_data_for_console(data)
-            data_str = str(formatted_data)
-        except:
+            return view.text
+        except Exception:
             # If formatting fails, use original data
-            data_str = str(data)
-    else:
-        data_str = "No data available"
-
-    # Create a simple text area with the raw data for easy reading
-    st.text_area(
-        "Raw Stock Data (Scrollable):",
-        value=data_str,
-        height=400,
-        help="This is the exact data that Agent 1 collected and passed to Agent 2 for analysis",
+            return str(data)
+
+    # The full text dump is only built when the user asks for it
+    st.download_button(
+        "⬇️ Download raw stock data",
+        data=raw_data_text,
+        file_name=f"{view.get('Ticker') or 'stock'}_data.txt",
+        mime="text/plain",
+        help="The exact data that Agent 1 collected and passed to Agent 2 for analysis",
     )
 
     # Also try to parse and display in a cleaner format if possible
     try:
-        data_dict = safe_parse_data(data)
-        if data_dict and isinstance(data_dict, dict):
+        if view.parsed:
             st.markdown("### � Parsed Data Summary")
 
             # Create expandable sections for different data types
             with st.expander("🏷️ Basic Stock Information", expanded=True):
-                basic_info = {
-                    "Ticker": data_dict.get("Ticker", "N/A"),
-                    "Current Price": data_dict.get("Current Price", "N/A"),
-                    "Open": data_dict.get("Open", "N/A"),
-                    "Day High": data_dict.get("Day High", "N/A"),
-                    "Day Low": data_dict.get("Day Low", "N/A"),
-                    "Volume": data_dict.get("Volume", "N/A"),
-                    "52-Week High": data_dict.get("52-Week High", "N/A"),
-                    "52-Week Low": data_dict.get("52-Week Low", "N/A"),
-                }
+                basic_info = view.basic_info
 
                 # Display in columns for better layout
                 col1, col2 = st.columns(2)
@@ -294,122 +341,158 @@ def display_console_format_data(data):
                     else:
                         col2.metric(label=key, value=str(value))
 
-            if "Fundamentals" in data_dict and data_dict["Fundamentals"]:
+            if view.get("Fundamentals"):
                 with st.expander("📊 Financial Fundamentals"):
-                    fundamentals = data_dict["Fundamentals"]
-                    st.json(fundamentals)
+                    st.json(view.section("Fundamentals"))
 
-            if "Company Info" in data_dict and data_dict["Company Info"]:
+            if view.get("Company Info"):
                 with st.expander("🏢 Company Information"):
-                    company_info = data_dict["Company Info"]
-                    st.json(company_info)
+                    st.json(view.section("Company Info"))
+
+            display_tables(view)
+        else:
+            st.code(raw_data_text(), language=None)
 
     except Exception as e:
         st.info(
-            f"Could not parse structured data, showing raw format above. ({str(e)[:100]})"
+            f"Could not parse structured data, use the raw data download above. ({str(e)[:100]})"
         )
 
 
+def display_analysis_results(result):
+    """Render a finished AnalysisResult"""
+    final_analysis = result.final_analysis
+    stock_data = result.stock_data
+    session_summary = result.session_summary
+    team_summary = result.team_summary
+
+    if not (stock_data or final_analysis):
+        st.error("No analysis results received. Please try again.")
+        return
+
+    if time.time() - result.analysed_at > 60:
+        st.caption(
+            f"♻️ Analysis from {time.strftime('%H:%M:%S', time.localtime(result.analysed_at))}"
+            " — clear the caches in the sidebar for fresh data"
+        )
+
+    if stock_data:
+        with span("streamlit.render_data"):
+            display_console_format_data(stock_data, result.tables)
+
+    if final_analysis:
+        with span("streamlit.render_analysis"):
+            st.markdown(
+                """
+                <div class="analysis-section">
+                    <h2 style="margin-top: 0;">🧠 AI Analysis & Investment Recommendation</h2>
+                </div>
+                """,
+                unsafe_allow_html=True,
+            )
+            st.markdown(final_analysis)
+
+    # Display cost and usage summary
+    st.markdown("---")
+    st.markdown(
+        """
+        <div style="
+            background: linear-gradient(135deg, #ff7b7b 0%, #ff8e53 100%);
+            color: white;
+            padding: 1.5rem;
+            border-radius: 1rem;
+            margin: 1.5rem 0;
+            box-shadow: 0 4px 15px rgba(0,0,0,0.1);
+            text-align: center;
+        ">
+            <h2 style="margin: 0; font-family: 'Courier New', monospace;">
+                💰 Token Usage & Cost Summary
+            </h2>
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    # Create two columns for session and team summaries
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.markdown("#### 🔢 Session Overview")
+        if session_summary and session_summary.strip():
+            st.code(session_summary, language=None)
+        else:
+            st.info(
+                "📝 Exact token usage data not available\n(AutoGen doesn't expose token counts)"
+            )
+
+    with col2:
+        st.markdown("#### 🤖 Team Activity")
+        if team_summary and team_summary.get("total_estimated_tokens", 0) > 0:
+            st.code(format_team_summary(team_summary), language=None)
+        else:
+            st.info("No team conversation data tracked")
+
+    # Cost estimation note
+    st.info(
+        "💡 **Note:** Token estimates are based on text length analysis. "
+        "Actual costs may vary based on the specific model's tokenization."
+    )
+
+    # Parse stock data for detailed tracking
+    if stock_data:
+        data_sections = parse_stock_data_for_tracking(stock_data)
+        if data_sections:
+            st.markdown("#### 📊 Data Processing Breakdown")
+            section_cols = st.columns(len(data_sections))
+            for i, (section, tokens) in enumerate(data_sections.items()):
+                section_cols[i].metric(
+                    label=section.replace("_", " ").title(),
+                    value=f"{tokens:,} tokens",
+                )
+
+
 # Main analysis logic
 if analyze_button and stock_name:
     if not stock_name.strip():
         st.error("Please enter a valid stock name or symbol")
     else:
-        # Show loading message
-        with st.spinner(f"🔍 Analyzing {stock_name.upper()}... (tracking token usage)"):
-            try:
-                # Run the analysis
-                final_analysis, stock_data, session_summary, team_summary = asyncio.run(
-                    run_analysis(stock_name.strip())
-                )
-
-                # Display results
-                if stock_data or final_analysis:
-                    if stock_data:
-                        display_console_format_data(stock_data)
-
-                    if final_analysis:
-                        st.markdown(
-                            """
-                            <div class="analysis-section">
-                                <h2 style="margin-top: 0;">🧠 AI Analysis & Investment Recommendation</h2>
-                            </div>
-                            """,
-                            unsafe_allow_html=True,
-                        )
-                        st.markdown(final_analysis)
-
-                    # Display cost and usage summary
-                    st.markdown("---")
-                    st.markdown(
-                        """
-                        <div style="
-                            background: linear-gradient(135deg, #ff7b7b 0%, #ff8e53 100%);
-                            color: white;
-                            padding: 1.5rem;
-                            border-radius: 1rem;
-                            margin: 1.5rem 0;
-                            box-shadow: 0 4px 15px rgba(0,0,0,0.1);
-                            text-align: center;
-                        ">
-                            <h2 style="margin: 0; font-family: 'Courier New', monospace;">
-                                💰 Token Usage & Cost Summary
-                            </h2>
-                        </div>
-                        """,
-                        unsafe_allow_html=True,
-                    )
-
-                    # Create two columns for session and team summaries
-                    col1, col2 = st.columns(2)
-
-                    with col1:
-                        st.markdown("#### 🔢 Session Overview")
-                        if session_summary and session_summary.strip():
-                            st.code(session_summary, language=None)
-                        else:
-                            st.info(
-                                "📝 Exact token usage data not available\n(AutoGen doesn't expose token counts)"
-                            )
-
-                    with col2:
-                        st.markdown("#### 🤖 Team Activity")
-                        if (
-                            team_summary
-                            and team_summary.get("total_estimated_tokens", 0) > 0
-                        ):
-                            st.code(format_team_summary(team_summary), language=None)
-                        else:
-                            st.info("No team conversation data tracked")
-
-                    # Cost estimation note
-                    st.info(
-                        "💡 **Note:** Token estimates are based on text length analysis. "
-                        "Actual costs may vary based on the specific model's tokenization."
-                    )
-
-                    # Parse stock data for detailed tracking
-                    if stock_data:
-                        data_sections = parse_stock_data_for_tracking(stock_data)
-                        if data_sections:
-                            st.markdown("#### 📊 Data Processing Breakdown")
-                            section_cols = st.columns(len(data_sections))
-                            for i, (section, tokens) in enumerate(
-                                data_sections.items()
-                            ):
-                                section_cols[i].metric(
-                                    label=section.replace("_", " ").title(),
-                                    value=f"{tokens:,} tokens",
-                                )
-                else:
-                    st.error("No analysis results received. Please try again.")
-
-            except Exception as e:
-                st.error(f"An error occurred during analysis: {str(e)}")
+        start_analysis(stock_name)
 
 elif analyze_button:
     st.warning("Please enter a stock name or symbol to analyze")
 
+# Results live in session state, so they survive reruns
+job_id = st.session_state.get("analysis_job_id")
+if job_id:
+    job = get_job_runner().get(job_id)
+    if job is None:
+        st.session_state.pop("analysis_job_id")
+        st.warning("The analysis job expired. Please run it again.")
+    elif not job.finished:
+        # Phase one: the collected data renders as soon as the tool returns
+        partial_data = job.progress.get("stock_data")
+        if partial_data:
+            with span("streamlit.render_data"):
+                display_console_format_data(partial_data, job.progress.get("tables"))
+        show_job_progress(job_id, data_shown=bool(partial_data))
+    else:
+        st.session_state.pop("analysis_job_id")
+        if job.status == DONE:
+            st.session_state.analysis_result = job.result
+        elif job.status == CANCELLED:
+            st.warning("Analysis cancelled")
+        else:
+            st.error(f"An error occurred during analysis: {job.error}")
+
+if "analysis_result" in st.session_state:
+    try:
+        display_analysis_results(st.session_state.analysis_result)
+    except Exception as e:
+        st.error(f"An error occurred during analysis: {str(e)}")
+    finally:
+        flush_traces()
+
+
 # Footer
 st.markdown("---")
 st.markdown(
@@ -426,13 +509,37 @@ st.markdown(
 with st.sidebar:
     st.markdown("### 📋 Sample Stocks to Try")
     sample_stocks = ["TCS", "HDFC Bank", "CDSL", "INFY", "RELIANCE", "ITC"]
+    # Their snapshots are kept warm so a click starts from cached data
+    snapshot_warmer.watch(sample_stocks)
+    snapshot_warmer.start()
 
     for stock in sample_stocks:
         if st.button(f"📊 {stock}", key=f"sample_{stock}", use_container_width=True):
             st.session_state.stock_input = stock
             st.rerun()
 
-# Handle sample stock selection
-if "stock_input" in st.session_state:
-    stock_name = st.session_state.stock_input
-    del st.session_state.stock_input
+    st.markdown("### ♻️ Caches")
+    if st.button("🧹 Clear cached analyses & data", use_container_width=True):
+        from ai.tools.statement_store import statement_store
+
+        # Drops finished analyses, stock snapshots and idle teams, and
+        # refetches financial statements on their next use
+        clear_all_caches()
+        get_team_pool().clear()
+        statement_store.invalidate()
+        st.success("Caches cleared")
+
+    if profiler.enabled:
+        st.markdown("### 🔬 Profiles")
+        runs = recent_profiles()
+        if not runs:
+            st.caption(f"Analyses are profiled to {profiler.output_dir}")
+        for run in runs:
+            st.download_button(
+                f"⬇️ {run.title}",
+                data=run.zip_bytes,
+                file_name=f"{os.path.basename(run.files[0]).rsplit('.', 1)[0]}.zip",
+                mime="application/zip",
+                key=f"profile_{run.files[0]}",
+                use_container_width=True,
+            )
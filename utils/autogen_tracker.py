@@ -3,8 +3,11 @@ AutoGen Chat Wrapper with Token Tracking
 Wraps AutoGen functionality to track token consumption and costs
 """
 
+from contextvars import ContextVar
 from typing import Any, Dict, List, Optional
 from utils.cost_tracker import track_usage
+from utils.metrics import team_messages
+from utils.tracing import traced
 import re
 
 
@@ -25,7 +28,7 @@ def track_manual_usage(prompt: str, response: str, model_name: str = "gpt-4o"):
     prompt_tokens = estimate_tokens(prompt)
     completion_tokens = estimate_tokens(response)
 
-    track_usage(model_name, prompt_tokens, completion_tokens)
+    track_usage(model_name, prompt_tokens, completion_tokens, estimated=True)
 
     return {
         "prompt_tokens": prompt_tokens,
@@ -43,20 +46,39 @@ class AutoGenTeamTracker:
         self.conversation_history = []
 
     def track_message(
-        self, agent_name: str, message_content: str, model_name: str = "gpt-4o"
+        self,
+        agent_name: str,
+        message_content: str,
+        model_name: str = "gpt-4o",
+        latency_seconds: float = 0.0,
     ):
         """Track a message in the team conversation"""
 
         # Estimate tokens for the message
         estimated_tokens = estimate_tokens(message_content)
+        team_messages.inc(agent=agent_name)
 
         # For team conversations, we estimate that:
         # - User/input messages count as prompt tokens
         # - Agent responses count as completion tokens
         if agent_name.lower() in ["user", "human", "input"]:
-            track_usage(model_name, estimated_tokens, 0)
+            track_usage(
+                model_name,
+                estimated_tokens,
+                0,
+                stage=agent_name,
+                latency_seconds=latency_seconds,
+                estimated=True,
+            )
         else:
-            track_usage(model_name, 0, estimated_tokens)
+            track_usage(
+                model_name,
+                0,
+                estimated_tokens,
+                stage=agent_name,
+                latency_seconds=latency_seconds,
+                estimated=True,
+            )
 
         # Store conversation history
         self.conversation_history.append(
@@ -71,10 +93,19 @@ class AutoGenTeamTracker:
     def track_conversation_result(self, result, model_name: str = "gpt-4o"):
         """Track the entire conversation result from AutoGen"""
         if hasattr(result, "messages"):
+            previous_created_at = None
             for message in result.messages:
                 agent_name = getattr(message, "source", "unknown")
                 content = str(getattr(message, "content", ""))
-                self.track_message(agent_name, content, model_name)
+                # Stage latency is the gap since the previous message was emitted
+                created_at = getattr(message, "created_at", None)
+                latency_seconds = 0.0
+                if created_at is not None and previous_created_at is not None:
+                    latency_seconds = max(
+                        (created_at - previous_created_at).total_seconds(), 0.0
+                    )
+                previous_created_at = created_at or previous_created_at
+                self.track_message(agent_name, content, model_name, latency_seconds)
         elif isinstance(result, list):
             # Handle list of messages
             for i, message in enumerate(result):
@@ -113,22 +144,30 @@ class AutoGenTeamTracker:
 # Global team tracker
 team_tracker = AutoGenTeamTracker()
 
+# Tracker of the run in the current thread / asyncio task (one per run)
+_current_team_tracker: ContextVar[AutoGenTeamTracker] = ContextVar(
+    "current_team_tracker", default=team_tracker
+)
+
 
 def track_team_message(
     agent_name: str, message_content: str, model_name: str = "gpt-4o"
 ):
     """Convenience function to track team messages"""
-    team_tracker.track_message(agent_name, message_content, model_name)
+    _current_team_tracker.get().track_message(agent_name, message_content, model_name)
 
 
-def track_autogen_result(result, model_name: str = "gpt-4o"):
-    """Track the result from AutoGen team conversation"""
-    team_tracker.track_conversation_result(result, model_name)
+def track_autogen_result(result, model_name: str = "gpt-4o") -> AutoGenTeamTracker:
+    """Track the result from AutoGen team conversation in a fresh per-run tracker"""
+    tracker = AutoGenTeamTracker()
+    tracker.track_conversation_result(result, model_name)
+    _current_team_tracker.set(tracker)
+    return tracker
 
 
 def get_team_summary() -> Dict[str, Any]:
-    """Get team conversation summary"""
-    return team_tracker.get_conversation_summary()
+    """Get team conversation summary of the current run"""
+    return _current_team_tracker.get().get_conversation_summary()
 
 
 def format_team_summary(summary: Dict[str, Any]) -> str:
@@ -155,6 +194,7 @@ Agent Breakdown:
     return result
 
 
+@traced("parse_stock_data_for_tracking")
 def parse_stock_data_for_tracking(stock_data: str) -> Dict[str, int]:
     """
     Parse stock data string to estimate tokens used in data collection
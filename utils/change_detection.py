@@ -0,0 +1,150 @@
+"""
+Material Change Detection
+Decides whether a stored recommendation is still backed by current data,
+so the LLM is only re-run for watchlist rows and analyses whose inputs
+moved materially.
+"""
+
+import math
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+# Relative change of each input that makes a recommendation stale
+MATERIAL_THRESHOLDS = {
+    "Price": float(os.getenv("MATERIAL_PRICE_CHANGE", "0.05")),
+    "Market Cap": 0.10,
+    "Trailing P/E": 0.10,
+    "Price to Book": 0.10,
+    "Dividend Yield": 0.20,
+}
+
+# Thresholds of the analysis gate in front of TradeAnalysisAgent, which reads
+# the full snapshot; cumulative day volume swings far more than price
+_GATE_FUNDAMENTALS_CHANGE = float(os.getenv("GATE_FUNDAMENTALS_CHANGE", "0.10"))
+GATE_THRESHOLDS = {
+    "Price": float(os.getenv("GATE_PRICE_CHANGE", "0.02")),
+    "Volume": float(os.getenv("GATE_VOLUME_CHANGE", "1.0")),
+    "Market Cap": _GATE_FUNDAMENTALS_CHANGE,
+    "Trailing P/E": _GATE_FUNDAMENTALS_CHANGE,
+    "Forward P/E": _GATE_FUNDAMENTALS_CHANGE,
+    "Price to Book": _GATE_FUNDAMENTALS_CHANGE,
+    "Profit Margins": _GATE_FUNDAMENTALS_CHANGE,
+    "Dividend Yield": 2 * _GATE_FUNDAMENTALS_CHANGE,
+}
+
+# Input holding the newest statement period end; any change means new results
+STATEMENTS_KEY = "Latest Statement"
+_DATE = re.compile(r"\b\d{4}-\d{2}-\d{2}\b")
+
+# Recommendations older than this are refreshed regardless of the data
+MAX_RECOMMENDATION_AGE_SECONDS = (
+    float(os.getenv("MAX_RECOMMENDATION_AGE_HOURS", "24")) * 3600
+)
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) else number
+
+
+def latest_statement_period(payload: Dict[str, Any]) -> Optional[str]:
+    """Newest period end among the snapshot's statements (DataFrames or their reprs)"""
+    periods = []
+    for statement in (payload.get("Financials") or {}).values():
+        if isinstance(statement, pd.DataFrame):
+            columns = pd.to_datetime(statement.columns, errors="coerce")
+            periods += [column.strftime("%Y-%m-%d") for column in columns.dropna()]
+        elif statement is not None:
+            # Period ends are the column labels on the repr's first line
+            periods += _DATE.findall(str(statement).lstrip().split("\n", 1)[0])
+    return max(periods) if periods else None
+
+
+def snapshot_inputs(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """The inputs of a get_full_stock_info snapshot that the analysis gate compares"""
+    fundamentals = payload.get("Fundamentals") or {}
+    inputs = {
+        "Price": _number(payload.get("Current Price")),
+        "Volume": _number(payload.get("Volume")),
+    }
+    for key in GATE_THRESHOLDS:
+        if key in fundamentals:
+            inputs[key] = _number(fundamentals[key])
+    inputs[STATEMENTS_KEY] = latest_statement_period(payload)
+    return inputs
+
+
+def analysis_inputs(row: Dict[str, Any]) -> Dict[str, Any]:
+    """The inputs of a watchlist row, in the snapshot_inputs schema the gate records"""
+    fundamentals = {key: row[key] for key in GATE_THRESHOLDS if key in row}
+    return snapshot_inputs(
+        {
+            "Current Price": row.get("Price"),
+            "Volume": row.get("Volume"),
+            "Fundamentals": fundamentals,
+        }
+    )
+
+
+def describe_changes(
+    previous: Dict[str, Any], current: Dict[str, Any], keys=("Price", "Volume")
+) -> str:
+    """Relative change of some inputs as text, like: Price +0.4%, Volume -12.0%"""
+    parts = []
+    for key in keys:
+        before, after = _number(previous.get(key)), _number(current.get(key))
+        if before and after is not None:
+            parts.append(f"{key} {(after - before) / abs(before):+.1%}")
+    return ", ".join(parts)
+
+
+def material_changes(
+    previous: Dict[str, Any],
+    current: Dict[str, Any],
+    thresholds: Dict[str, float] = MATERIAL_THRESHOLDS,
+) -> List[str]:
+    """Names of the inputs whose relative change reaches their threshold"""
+    changed = []
+    for key, threshold in thresholds.items():
+        before, after = _number(previous.get(key)), _number(current.get(key))
+        if after is None:
+            # Missing data now is not evidence of a change
+            continue
+        if before is None:
+            changed.append(key)
+        elif before == 0:
+            if after != 0:
+                changed.append(key)
+        elif abs(after - before) / abs(before) >= threshold:
+            changed.append(key)
+    return changed
+
+
+def reanalysis_reason(
+    record: Optional[Dict[str, Any]],
+    current: Dict[str, Any],
+    max_age_seconds: float = MAX_RECOMMENDATION_AGE_SECONDS,
+    now: Optional[float] = None,
+    thresholds: Dict[str, float] = MATERIAL_THRESHOLDS,
+) -> Optional[str]:
+    """Why a row needs a fresh analysis, or None if its recommendation stands"""
+    if record is None:
+        return "never analysed"
+    now = time.time() if now is None else now
+    if now - record.get("analysed_at", 0) >= max_age_seconds:
+        return "recommendation expired"
+    inputs = record.get("inputs", {})
+    statement = current.get(STATEMENTS_KEY)
+    if statement is not None and statement != inputs.get(STATEMENTS_KEY):
+        return f"new statements ({statement})"
+    changed = material_changes(inputs, current, thresholds)
+    if changed:
+        return "changed: " + ", ".join(changed)
+    return None
@@ -0,0 +1,43 @@
+"""
+Deferred Configuration
+.env is loaded the first time configuration is needed instead of as a side
+effect of importing a module, and a missing API key is reported when a
+model client is built rather than when the package is imported. Entry
+points call load_config() first so module-level os.getenv settings still
+see values from .env.
+"""
+
+import os
+
+_loaded = False
+
+
+def load_config():
+    """Load .env into the environment once (existing variables win)"""
+    global _loaded
+    if _loaded:
+        return
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    _loaded = True
+
+
+def model_provider() -> str:
+    """ "openai", or "stub" for the offline client in ai/models/stub_model_client.py"""
+    load_config()
+    return os.getenv("MODEL_PROVIDER", "openai")
+
+
+def get_openai_api_key() -> str:
+    load_config()
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("Please set the OPENAI_API_KEY environment variable.")
+    return api_key
+
+
+def check_model_config():
+    """Raise ValueError now if analyses would fail for lack of an API key"""
+    if model_provider() != "stub":
+        get_openai_api_key()
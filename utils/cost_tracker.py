@@ -3,12 +3,42 @@ Token and Cost Tracking Utility for AI-Powered Stock Analysis
 Tracks token consumption and costs for AutoGen agents and LLM calls
 """
 
+import os
+import threading
 import time
+from contextvars import ContextVar
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, field
 from datetime import datetime
 import json
 
+from utils.metrics import analyses_finished, analyses_started, llm_cost_usd, llm_tokens
+
+# OpenAI GPT pricing (USD per 1M tokens)
+MODEL_PRICING = {
+    "gpt-4o": {"input": 5.00, "output": 15.00},
+    "gpt-4o-mini": {"input": 0.15, "output": 0.60},
+    "gpt-4-turbo": {"input": 10.00, "output": 30.00},
+    "gpt-4": {"input": 30.00, "output": 60.00},
+    "gpt-3.5-turbo": {"input": 0.50, "output": 1.50},
+    "gpt-3.5-turbo-instruct": {"input": 1.50, "output": 2.00},
+    # Azure OpenAI (similar pricing)
+    "azure-gpt-4": {"input": 30.00, "output": 60.00},
+    "azure-gpt-35-turbo": {"input": 0.50, "output": 1.50},
+    # Default fallback (GPT-4o pricing)
+    "default": {"input": 5.00, "output": 15.00},
+}
+
+# Append-only usage ledger written when a session ends (set to "" to disable)
+DEFAULT_LEDGER_PATH = os.getenv("USAGE_LEDGER_PATH", "usage_ledger.jsonl")
+
+# Smallest prompt worth sending after shrinking the context to fit a budget
+MIN_SHRUNK_PROMPT_TOKENS = 500
+
+
+class BudgetExceededError(Exception):
+    """Raised when a model call cannot fit in the session budget"""
+
 
 @dataclass
 class TokenUsage:
@@ -19,6 +49,10 @@ class TokenUsage:
     total_tokens: int = 0
     model_name: str = ""
     timestamp: datetime = field(default_factory=datetime.now)
+    stage: str = ""  # pipeline stage, usually the agent name
+    latency_seconds: float = 0.0
+    cached_tokens: int = 0  # prompt tokens served from a cache instead of the API
+    estimated: bool = False  # True when counts come from text-length estimation
 
     @property
     def cost_usd(self) -> float:
@@ -27,6 +61,47 @@ class TokenUsage:
             self.model_name, self.prompt_tokens, self.completion_tokens
         )
 
+    @property
+    def cache_savings_usd(self) -> float:
+        """Cost the cached prompt tokens would have incurred at the input rate"""
+        return calculate_cost(self.model_name, self.cached_tokens, 0)
+
+
+@dataclass
+class SessionBudget:
+    """Per-session cost and token limits (None means unlimited)"""
+
+    max_cost_usd: Optional[float] = None
+    max_tokens: Optional[int] = None
+    # Completion size assumed when projecting the cost of a call
+    expected_completion_tokens: int = 800
+
+    @classmethod
+    def from_env(cls) -> Optional["SessionBudget"]:
+        """Build a budget from SESSION_MAX_COST_USD / SESSION_MAX_TOKENS"""
+        max_cost = os.getenv("SESSION_MAX_COST_USD")
+        max_tokens = os.getenv("SESSION_MAX_TOKENS")
+        if not max_cost and not max_tokens:
+            return None
+        return cls(
+            max_cost_usd=float(max_cost) if max_cost else None,
+            max_tokens=int(max_tokens) if max_tokens else None,
+        )
+
+
+@dataclass
+class BudgetDecision:
+    """Outcome of a pre-call budget check"""
+
+    action: str  # "allow", "downgrade", "shrink" or "abort"
+    model_name: str
+    stage: str = ""
+    prompt_tokens: int = 0
+    target_prompt_tokens: int = 0
+    projected_cost_usd: float = 0.0
+    reason: str = ""
+    timestamp: datetime = field(default_factory=datetime.now)
+
 
 @dataclass
 class SessionCosts:
@@ -38,6 +113,8 @@ class SessionCosts:
     token_usages: List[TokenUsage] = field(default_factory=list)
     stock_symbol: str = ""
     app_type: str = ""  # "console" or "streamlit"
+    budget: Optional[SessionBudget] = None
+    budget_decisions: List[BudgetDecision] = field(default_factory=list)
 
     @property
     def total_prompt_tokens(self) -> int:
@@ -65,11 +142,30 @@ class SessionCosts:
 class CostTracker:
     """Main cost tracking class"""
 
-    def __init__(self):
-        self.current_session: Optional[SessionCosts] = None
+    def __init__(self, ledger_path: Optional[str] = DEFAULT_LEDGER_PATH):
+        # The session is per thread / asyncio task, so concurrent analyses
+        # (e.g. background jobs of several Streamlit users) stay separate
+        self._current_session: ContextVar[Optional[SessionCosts]] = ContextVar(
+            f"cost_session_{id(self)}", default=None
+        )
         self.all_sessions: List[SessionCosts] = []
+        self.ledger_path = ledger_path
+        self._lock = threading.Lock()
 
-    def start_session(self, stock_symbol: str, app_type: str = "console") -> str:
+    @property
+    def current_session(self) -> Optional[SessionCosts]:
+        return self._current_session.get()
+
+    @current_session.setter
+    def current_session(self, session: Optional[SessionCosts]):
+        self._current_session.set(session)
+
+    def start_session(
+        self,
+        stock_symbol: str,
+        app_type: str = "console",
+        budget: Optional[SessionBudget] = None,
+    ) -> str:
         """Start a new tracking session"""
         session_id = f"{app_type}_{stock_symbol}_{int(time.time())}"
         self.current_session = SessionCosts(
@@ -77,30 +173,162 @@ class CostTracker:
             start_time=datetime.now(),
             stock_symbol=stock_symbol,
             app_type=app_type,
+            budget=budget or SessionBudget.from_env(),
         )
+        analyses_started.inc(app_type=app_type)
         return session_id
 
     def end_session(self):
         """End the current session"""
-        if self.current_session:
-            self.current_session.end_time = datetime.now()
-            self.all_sessions.append(self.current_session)
+        session = self.current_session
+        if session:
+            session.end_time = datetime.now()
+            analyses_finished.inc(app_type=session.app_type)
+            with self._lock:
+                self.all_sessions.append(session)
+                if self.ledger_path:
+                    append_usage_ledger(session, self.ledger_path)
             self.current_session = None
 
-    def track_tokens(self, model_name: str, prompt_tokens: int, completion_tokens: int):
+    def track_tokens(
+        self,
+        model_name: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        stage: str = "",
+        latency_seconds: float = 0.0,
+        cached_tokens: int = 0,
+        estimated: bool = False,
+    ):
         """Track token usage for the current session"""
         if not self.current_session:
             return
 
+        # Text-length estimates only fill in when no exact usage was captured
+        if estimated and any(
+            not usage.estimated for usage in self.current_session.token_usages
+        ):
+            return
+
         usage = TokenUsage(
             prompt_tokens=prompt_tokens,
             completion_tokens=completion_tokens,
             total_tokens=prompt_tokens + completion_tokens,
             model_name=model_name,
             timestamp=datetime.now(),
+            stage=stage,
+            latency_seconds=latency_seconds,
+            cached_tokens=cached_tokens,
+            estimated=estimated,
         )
         self.current_session.token_usages.append(usage)
 
+        labels = {
+            "model": model_name,
+            "agent": stage,
+            "estimated": str(estimated).lower(),
+        }
+        llm_tokens.inc(prompt_tokens, kind="prompt", **labels)
+        llm_tokens.inc(completion_tokens, kind="completion", **labels)
+        llm_cost_usd.inc(usage.cost_usd, model=model_name, agent=stage)
+
+    def check_budget(
+        self,
+        model_name: str,
+        prompt_tokens: int,
+        stage: str = "",
+        fallback_model: Optional[str] = None,
+    ) -> BudgetDecision:
+        """
+        Decide whether a model call fits the session budget
+        Tries the requested model, then the fallback model, then a shrunk
+        prompt, and aborts when nothing fits. Every decision is logged.
+        """
+        session = self.current_session
+        budget = session.budget if session else None
+        if not budget:
+            return BudgetDecision(
+                "allow", model_name, stage, prompt_tokens, prompt_tokens
+            )
+
+        spent_cost = session.total_cost_usd
+        spent_tokens = session.total_tokens
+        completion = budget.expected_completion_tokens
+
+        def fits(model: str, tokens: int) -> bool:
+            projected = spent_cost + calculate_cost(model, tokens, completion)
+            if budget.max_cost_usd is not None and projected > budget.max_cost_usd:
+                return False
+            if (
+                budget.max_tokens is not None
+                and spent_tokens + tokens + completion > budget.max_tokens
+            ):
+                return False
+            return True
+
+        def max_prompt_tokens(model: str) -> int:
+            limits = []
+            if budget.max_cost_usd is not None:
+                rate = calculate_cost(model, 1_000_000, 0) / 1_000_000
+                remaining = budget.max_cost_usd - spent_cost
+                remaining -= calculate_cost(model, 0, completion)
+                limits.append(int(remaining / rate) if rate else prompt_tokens)
+            if budget.max_tokens is not None:
+                limits.append(budget.max_tokens - spent_tokens - completion)
+            return min(limits) if limits else prompt_tokens
+
+        if fits(model_name, prompt_tokens):
+            decision = BudgetDecision(
+                "allow",
+                model_name,
+                stage,
+                prompt_tokens,
+                prompt_tokens,
+                reason="within budget",
+            )
+        elif (
+            fallback_model
+            and fallback_model != model_name
+            and fits(fallback_model, prompt_tokens)
+        ):
+            decision = BudgetDecision(
+                "downgrade",
+                fallback_model,
+                stage,
+                prompt_tokens,
+                prompt_tokens,
+                reason=f"{model_name} would exceed the session budget",
+            )
+        else:
+            model = fallback_model or model_name
+            target = max_prompt_tokens(model)
+            if target >= MIN_SHRUNK_PROMPT_TOKENS:
+                decision = BudgetDecision(
+                    "shrink",
+                    model,
+                    stage,
+                    prompt_tokens,
+                    target,
+                    reason=f"prompt shrunk from {prompt_tokens:,} to {target:,} tokens",
+                )
+            else:
+                decision = BudgetDecision(
+                    "abort",
+                    model,
+                    stage,
+                    prompt_tokens,
+                    0,
+                    reason="no model or context size fits the remaining budget",
+                )
+
+        decision.projected_cost_usd = spent_cost + calculate_cost(
+            decision.model_name,
+            decision.target_prompt_tokens or prompt_tokens,
+            completion,
+        )
+        session.budget_decisions.append(decision)
+        return decision
+
     def get_session_summary(self) -> Dict[str, Any]:
         """Get summary of current session"""
         if not self.current_session:
@@ -119,6 +347,17 @@ class CostTracker:
             "models_used": list(
                 set(usage.model_name for usage in self.current_session.token_usages)
             ),
+            "budget_decisions": [
+                {
+                    "action": decision.action,
+                    "model_name": decision.model_name,
+                    "stage": decision.stage,
+                    "reason": decision.reason,
+                    "projected_cost_usd": decision.projected_cost_usd,
+                }
+                for decision in self.current_session.budget_decisions
+                if decision.action != "allow"
+            ],
         }
 
     def get_all_sessions_summary(self) -> Dict[str, Any]:
@@ -158,21 +397,7 @@ def calculate_cost(
     Calculate cost based on model pricing (as of 2024)
     Prices are per 1M tokens
     """
-
-    # OpenAI GPT pricing (USD per 1M tokens)
-    pricing = {
-        "gpt-4o": {"input": 5.00, "output": 15.00},
-        "gpt-4o-mini": {"input": 0.15, "output": 0.60},
-        "gpt-4-turbo": {"input": 10.00, "output": 30.00},
-        "gpt-4": {"input": 30.00, "output": 60.00},
-        "gpt-3.5-turbo": {"input": 0.50, "output": 1.50},
-        "gpt-3.5-turbo-instruct": {"input": 1.50, "output": 2.00},
-        # Azure OpenAI (similar pricing)
-        "azure-gpt-4": {"input": 30.00, "output": 60.00},
-        "azure-gpt-35-turbo": {"input": 0.50, "output": 1.50},
-        # Default fallback (GPT-4o pricing)
-        "default": {"input": 5.00, "output": 15.00},
-    }
+    pricing = MODEL_PRICING
 
     # Normalize model name
     model_key = model_name.lower()
@@ -191,6 +416,14 @@ def format_cost_summary(summary: Dict[str, Any]) -> str:
     if not summary:
         return "No usage data available."
 
+    budget_lines = ""
+    if summary.get("budget_decisions"):
+        budget_lines = "\n🛡️ Budget Decisions:\n" + "".join(
+            f"   • {d['stage'] or 'model call'}: {d['action'].upper()} → "
+            f"{d['model_name']} ({d['reason']}, projected ${d['projected_cost_usd']:.4f})\n"
+            for d in summary["budget_decisions"]
+        )
+
     return f"""
 💰 TOKEN USAGE & COST SUMMARY
 {'='*50}
@@ -213,7 +446,7 @@ def format_cost_summary(summary: Dict[str, Any]) -> str:
 📈 Efficiency Metrics:
    • Tokens per Second: {(summary.get('total_tokens', 0) / max(summary.get('duration_seconds', 1), 1)):.1f}
    • Cost per Second: ${(summary.get('total_cost_usd', 0) / max(summary.get('duration_seconds', 1), 1)):.4f} USD
-{'='*50}
+{budget_lines}{'='*50}
 """
 
 
@@ -248,9 +481,13 @@ def format_all_sessions_summary(summary: Dict[str, Any]) -> str:
 cost_tracker = CostTracker()
 
 
-def start_tracking(stock_symbol: str, app_type: str = "console") -> str:
+def start_tracking(
+    stock_symbol: str,
+    app_type: str = "console",
+    budget: Optional[SessionBudget] = None,
+) -> str:
     """Convenience function to start tracking"""
-    return cost_tracker.start_session(stock_symbol, app_type)
+    return cost_tracker.start_session(stock_symbol, app_type, budget)
 
 
 def end_tracking():
@@ -258,9 +495,35 @@ def end_tracking():
     cost_tracker.end_session()
 
 
-def track_usage(model_name: str, prompt_tokens: int, completion_tokens: int):
+def track_usage(
+    model_name: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    stage: str = "",
+    latency_seconds: float = 0.0,
+    cached_tokens: int = 0,
+    estimated: bool = False,
+):
     """Convenience function to track token usage"""
-    cost_tracker.track_tokens(model_name, prompt_tokens, completion_tokens)
+    cost_tracker.track_tokens(
+        model_name,
+        prompt_tokens,
+        completion_tokens,
+        stage=stage,
+        latency_seconds=latency_seconds,
+        cached_tokens=cached_tokens,
+        estimated=estimated,
+    )
+
+
+def check_budget(
+    model_name: str,
+    prompt_tokens: int,
+    stage: str = "",
+    fallback_model: Optional[str] = None,
+) -> BudgetDecision:
+    """Convenience function to check a model call against the session budget"""
+    return cost_tracker.check_budget(model_name, prompt_tokens, stage, fallback_model)
 
 
 def get_session_summary() -> str:
@@ -291,6 +554,19 @@ def save_session_data(filepath: str = "session_costs.json"):
                     "total_cost_usd": session.total_cost_usd,
                     "total_tokens": session.total_tokens,
                     "duration_seconds": session.duration_seconds,
+                    "budget_decisions": [
+                        {
+                            "action": decision.action,
+                            "model_name": decision.model_name,
+                            "stage": decision.stage,
+                            "prompt_tokens": decision.prompt_tokens,
+                            "target_prompt_tokens": decision.target_prompt_tokens,
+                            "projected_cost_usd": decision.projected_cost_usd,
+                            "reason": decision.reason,
+                            "timestamp": decision.timestamp.isoformat(),
+                        }
+                        for decision in session.budget_decisions
+                    ],
                     "token_usages": [
                         {
                             "model_name": usage.model_name,
@@ -299,6 +575,10 @@ def save_session_data(filepath: str = "session_costs.json"):
                             "total_tokens": usage.total_tokens,
                             "cost_usd": usage.cost_usd,
                             "timestamp": usage.timestamp.isoformat(),
+                            "stage": usage.stage,
+                            "latency_seconds": usage.latency_seconds,
+                            "cached_tokens": usage.cached_tokens,
+                            "estimated": usage.estimated,
                         }
                         for usage in session.token_usages
                     ],
@@ -313,3 +593,30 @@ def save_session_data(filepath: str = "session_costs.json"):
         return f"Session data saved to {filepath}"
     except Exception as e:
         return f"Error saving session data: {str(e)}"
+
+
+def append_usage_ledger(session: SessionCosts, filepath: str = DEFAULT_LEDGER_PATH):
+    """Append one flat JSON line per token usage of a session to the ledger"""
+    try:
+        with open(filepath, "a") as f:
+            for usage in session.token_usages:
+                row = {
+                    "session_id": session.session_id,
+                    "app_type": session.app_type,
+                    "stock_symbol": session.stock_symbol,
+                    "stage": usage.stage,
+                    "model_name": usage.model_name,
+                    "prompt_tokens": usage.prompt_tokens,
+                    "completion_tokens": usage.completion_tokens,
+                    "total_tokens": usage.total_tokens,
+                    "cached_tokens": usage.cached_tokens,
+                    "cost_usd": usage.cost_usd,
+                    "cache_savings_usd": usage.cache_savings_usd,
+                    "latency_seconds": usage.latency_seconds,
+                    "estimated": usage.estimated,
+                    "timestamp": usage.timestamp.isoformat(),
+                }
+                f.write(json.dumps(row) + "\n")
+    except OSError:
+        # The ledger is best-effort; never fail an analysis because of it
+        pass
@@ -0,0 +1,173 @@
+"""
+Background Job Runner
+Runs coroutines as jobs on one persistent event loop thread so that the
+Streamlit script thread never blocks on a multi-second team conversation.
+Jobs have IDs the UI can poll, and finished jobs are kept for a while so
+their results survive reruns.
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from utils.metrics import analysis_jobs, jobs_in_flight
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", "8"))
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+
+
+# Job whose coroutine is running in the current asyncio task
+_current_job: contextvars.ContextVar[Optional["Job"]] = contextvars.ContextVar(
+    "current_job", default=None
+)
+
+
+@dataclass
+class Job:
+    """A submitted coroutine and its outcome"""
+
+    job_id: str
+    name: str
+    status: str = PENDING
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+    # Partial outputs a running job publishes with report_progress()
+    progress: Dict[str, Any] = field(default_factory=dict)
+    _future: Optional["asyncio.Future"] = field(default=None, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    @property
+    def elapsed_seconds(self) -> float:
+        start = self.started_at or self.submitted_at
+        return (self.finished_at or time.time()) - start
+
+
+class JobRunner:
+    """Persistent event loop thread that runs submitted coroutines as jobs"""
+
+    def __init__(
+        self,
+        max_concurrent: int = MAX_CONCURRENT_JOBS,
+        retention_seconds: float = JOB_RETENTION_SECONDS,
+    ):
+        self.max_concurrent = max_concurrent
+        self.retention_seconds = retention_seconds
+        self.jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self.loop = asyncio.new_event_loop()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._thread = threading.Thread(
+            target=self._run_loop, name="job-runner", daemon=True
+        )
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self.loop.run_forever()
+
+    async def _run_job(self, job: Job, coroutine_factory: Callable[[], Awaitable]):
+        _current_job.set(job)
+        try:
+            async with self._semaphore:
+                job.status = RUNNING
+                job.started_at = time.time()
+                job.result = await coroutine_factory()
+                job.status = DONE
+        except asyncio.CancelledError:
+            job.status = CANCELLED
+            raise
+        except Exception as e:
+            job.status = FAILED
+            job.error = f"{type(e).__name__}: {e}"
+        finally:
+            job.finished_at = time.time()
+            jobs_in_flight.dec()
+            analysis_jobs.inc(status=job.status)
+
+    def submit(
+        self,
+        coroutine_factory: Callable[[], Awaitable],
+        name: str = "",
+        job_id: Optional[str] = None,
+    ) -> str:
+        """
+        Schedule coroutine_factory() on the runner loop and return the job ID
+        The job runs in a copy of the caller's context (tracing, routing tier)
+        """
+        self._prune()
+        job = Job(job_id=job_id or uuid.uuid4().hex, name=name)
+        context = contextvars.copy_context()
+        with self._lock:
+            self.jobs[job.job_id] = job
+        jobs_in_flight.inc()
+
+        def schedule():
+            job._future = self.loop.create_task(
+                self._run_job(job, coroutine_factory), context=context
+            )
+
+        self.loop.call_soon_threadsafe(schedule)
+        return job.job_id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Request cancellation of a pending or running job"""
+        job = self.jobs.get(job_id)
+        if job is None or job.finished:
+            return False
+        self.loop.call_soon_threadsafe(
+            lambda: job._future is not None and job._future.cancel()
+        )
+        return True
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Job:
+        """Block the calling thread until the job finishes (or timeout)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        job = self.jobs[job_id]
+        while not job.finished:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(0.05)
+        return job
+
+    def run_sync(self, coroutine: Awaitable, timeout: Optional[float] = None) -> Any:
+        """Run one coroutine on the runner loop and return its result"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            for job_id in [
+                job_id
+                for job_id, job in self.jobs.items()
+                if job.finished and job.finished_at < cutoff
+            ]:
+                del self.jobs[job_id]
+
+
+def report_progress(**values):
+    """Publish partial outputs of the job running in this task (no-op outside jobs)"""
+    job = _current_job.get()
+    if job is not None:
+        job.progress.update(values)
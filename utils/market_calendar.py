@@ -0,0 +1,103 @@
+"""
+NSE Trading Calendar
+Trading days and session phases of the National Stock Exchange of India,
+used to schedule background refreshes. Times are IST, which has no
+daylight saving. Exchange holidays come from config/nse_holidays.json
+(NSE_HOLIDAYS_PATH) and need to be updated from NSE's yearly holiday
+circular; without the file, only weekends are closed.
+"""
+
+import json
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from typing import FrozenSet, Optional
+
+IST = timezone(timedelta(hours=5, minutes=30), "IST")
+
+# Pre-open call auction, then the continuous session
+PRE_OPEN = time(9, 0)
+MARKET_OPEN = time(9, 15)
+MARKET_CLOSE = time(15, 30)
+
+DEFAULT_HOLIDAYS_PATH = os.getenv(
+    "NSE_HOLIDAYS_PATH",
+    os.path.join(os.path.dirname(__file__), "..", "config", "nse_holidays.json"),
+)
+
+# Session phases
+PHASE_PRE_OPEN = "pre_open"
+PHASE_OPEN = "open"
+PHASE_CLOSED = "closed"
+
+
+def load_holidays(filepath: str = DEFAULT_HOLIDAYS_PATH) -> FrozenSet[date]:
+    """Exchange holidays, empty if the file is missing"""
+    try:
+        with open(filepath) as f:
+            holidays = json.load(f).get("holidays", {})
+    except FileNotFoundError:
+        return frozenset()
+    return frozenset(date.fromisoformat(day) for day in holidays)
+
+
+class MarketCalendar:
+    """Trading days and session phases of NSE"""
+
+    def __init__(self, holidays_path: str = DEFAULT_HOLIDAYS_PATH):
+        self.holidays_path = holidays_path
+        self._holidays: Optional[FrozenSet[date]] = None
+
+    @property
+    def holidays(self) -> FrozenSet[date]:
+        if self._holidays is None:
+            self._holidays = load_holidays(self.holidays_path)
+        return self._holidays
+
+    @staticmethod
+    def now() -> datetime:
+        return datetime.now(IST)
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() < 5 and day not in self.holidays
+
+    def next_trading_day(self, day: date) -> date:
+        """First trading day after day"""
+        day += timedelta(days=1)
+        while not self.is_trading_day(day):
+            day += timedelta(days=1)
+        return day
+
+    def phase(self, now: Optional[datetime] = None) -> str:
+        now = (now or self.now()).astimezone(IST)
+        if not self.is_trading_day(now.date()):
+            return PHASE_CLOSED
+        if PRE_OPEN <= now.time() < MARKET_OPEN:
+            return PHASE_PRE_OPEN
+        if MARKET_OPEN <= now.time() < MARKET_CLOSE:
+            return PHASE_OPEN
+        return PHASE_CLOSED
+
+    def next_change(self, now: Optional[datetime] = None) -> datetime:
+        """When the phase after now begins"""
+        now = (now or self.now()).astimezone(IST)
+        day = now.date()
+        if self.is_trading_day(day):
+            for boundary in (PRE_OPEN, MARKET_OPEN, MARKET_CLOSE):
+                at = datetime.combine(day, boundary, IST)
+                if now < at:
+                    return at
+        return datetime.combine(self.next_trading_day(day), PRE_OPEN, IST)
+
+    def last_close(self, now: Optional[datetime] = None) -> datetime:
+        """The latest close at or before now"""
+        now = (now or self.now()).astimezone(IST)
+        day = now.date()
+        while not (
+            self.is_trading_day(day) and datetime.combine(day, MARKET_CLOSE, IST) <= now
+        ):
+            day -= timedelta(days=1)
+        return datetime.combine(day, MARKET_CLOSE, IST)
+
+
+# Global calendar used by the snapshot warmer
+market_calendar = MarketCalendar()
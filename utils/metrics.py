@@ -0,0 +1,346 @@
+"""
+In-Process Metrics Registry with Prometheus Text Exposition
+Always-on counters and histograms that the trackers, tools and caches
+publish into. Expose them over HTTP (METRICS_PORT) or dump them to a file
+periodically (METRICS_DUMP_PATH) for a local scraper.
+"""
+
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: Sequence[str], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonically increasing value per label set"""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        return self._values.get(key, 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value:g}"
+            for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    metric_type = "gauge"
+
+    def set(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    """Bucketed distribution of observations per label set"""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, **labels) -> int:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        series = self._values.get(key)
+        return int(sum(series[:-1])) if series else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._values.items()]
+        lines = []
+        for key, series in items:
+            cumulative = 0.0
+            for bound, bucket_count in zip(self.buckets, series):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{bound:g}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative:g}")
+            cumulative += series[len(self.buckets)]
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative:g}")
+            plain = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{plain} {series[-1]:g}")
+            lines.append(f"{self.name}_count{plain} {cumulative:g}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric and renders the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric_class, name: str, *args, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = metric_class(name, *args, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames=(),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets)
+
+    def render_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+# Global registry and the metrics the app publishes
+registry = MetricsRegistry()
+
+analyses_started = registry.counter(
+    "analyses_started_total", "Analysis sessions started", ["app_type"]
+)
+analyses_finished = registry.counter(
+    "analyses_finished_total", "Analysis sessions finished", ["app_type"]
+)
+cache_requests = registry.counter(
+    "cache_requests_total", "Cache lookups by layer and result", ["layer", "result"]
+)
+prefetches_started = registry.counter(
+    "prefetches_started_total", "Speculative snapshot prefetches started"
+)
+prefetch_requests = registry.counter(
+    "prefetch_requests_total",
+    "Tool fetches by speculative prefetch outcome (hit/joined/miss)",
+    ["result"],
+)
+prefetch_wasted = registry.counter(
+    "prefetch_wasted_total",
+    "Speculative prefetches never claimed (cancelled/unused/failed)",
+    ["reason"],
+)
+warm_refreshes = registry.counter(
+    "snapshot_warm_refreshes_total",
+    "Snapshot warmer refresh rounds by kind (full/quotes/failed)",
+    ["kind"],
+)
+warm_fetches = registry.counter(
+    "snapshot_warm_fetches_total",
+    "Warm snapshots by outcome (fetched/patched/skipped/failed)",
+    ["result"],
+)
+warm_yields = registry.counter(
+    "snapshot_warm_yields_total",
+    "Times the snapshot warmer waited for interactive fetches",
+)
+analysis_gate_decisions = registry.counter(
+    "analysis_gate_decisions_total",
+    "Analyses the change gate reused or sent to the model",
+    ["decision"],
+)
+yfinance_calls = registry.counter(
+    "yfinance_calls_total", "yfinance data calls", ["call"]
+)
+yfinance_failures = registry.counter(
+    "yfinance_failures_total", "yfinance data calls that raised", ["call"]
+)
+llm_tokens = registry.counter(
+    "llm_tokens_total",
+    "Tokens by model, agent and kind (prompt/completion)",
+    ["model", "agent", "kind", "estimated"],
+)
+llm_cost_usd = registry.counter(
+    "llm_cost_usd_total", "Model spend in USD", ["model", "agent"]
+)
+team_messages = registry.counter(
+    "team_messages_total", "Messages in team conversations", ["agent"]
+)
+analysis_jobs = registry.counter(
+    "analysis_jobs_total", "Background jobs by final status", ["status"]
+)
+jobs_in_flight = registry.gauge(
+    "analysis_jobs_in_flight", "Background jobs queued or running"
+)
+api_queue_depth = registry.gauge(
+    "api_queue_depth", "Analyses waiting for an API worker"
+)
+api_rejections = registry.counter(
+    "api_rejections_total", "API requests rejected because the queue was full"
+)
+stage_latency = registry.histogram(
+    "stage_latency_seconds", "Latency of pipeline stages", ["stage"]
+)
+stage_errors = registry.counter(
+    "stage_errors_total", "Pipeline stages that raised", ["stage"]
+)
+
+
+def record_cache_lookup(layer: str, hit: bool):
+    """Convenience function for cache layers to report hits and misses"""
+    cache_requests.inc(layer=layer, result="hit" if hit else "miss")
+
+
+def render_prometheus() -> str:
+    """Prometheus text for the global registry"""
+    return registry.render_prometheus()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes are frequent; keep them out of the console
+        pass
+
+
+_metrics_server: Optional[ThreadingHTTPServer] = None
+_dump_thread: Optional[threading.Thread] = None
+_exporter_lock = threading.Lock()
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread (idempotent per process)"""
+    global _metrics_server
+    with _exporter_lock:
+        if _metrics_server is None:
+            _metrics_server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(
+                target=_metrics_server.serve_forever, name="metrics-http", daemon=True
+            ).start()
+        return _metrics_server
+
+
+def dump_metrics(filepath: str):
+    """Atomically write the current metrics to a file"""
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, filepath)
+
+
+def start_metrics_dump(filepath: str, interval_seconds: float = 15.0):
+    """Dump metrics to a file every interval from a daemon thread (idempotent)"""
+    global _dump_thread
+
+    def loop():
+        while True:
+            try:
+                dump_metrics(filepath)
+            except OSError:
+                pass
+            time.sleep(interval_seconds)
+
+    with _exporter_lock:
+        if _dump_thread is None:
+            _dump_thread = threading.Thread(
+                target=loop, name="metrics-dump", daemon=True
+            )
+            _dump_thread.start()
+
+
+def start_exporters_from_env():
+    """Start the exporters configured by METRICS_PORT / METRICS_DUMP_PATH"""
+    port = os.getenv("METRICS_PORT")
+    if port:
+        try:
+            start_metrics_server(int(port), os.getenv("METRICS_HOST", "127.0.0.1"))
+        except OSError:
+            # Another worker in this host already serves the port
+            pass
+    dump_path = os.getenv("METRICS_DUMP_PATH")
+    if dump_path:
+        start_metrics_dump(dump_path, float(os.getenv("METRICS_DUMP_INTERVAL", "15")))
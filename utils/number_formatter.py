@@ -2,8 +2,27 @@
 Utility functions for formatting numbers in readable format
 """
 
-import ast
+import re
+from typing import Iterable, Iterator, TextIO
+
+import numpy as np
 import pandas as pd
+from utils.payload_parser import DataFrameRepr, parse_payload
+from utils.tracing import traced
+
+# Divisor and suffix for each magnitude bucket at or above one million
+LARGE_NUMBER_SCALES = ((1e12, "T"), (1e9, "B"), (1e6, "M"))
+
+# Scientific notation numbers (e.g., 1.705100e+07, 2.530000e-01)
+SCIENTIFIC_PATTERN = re.compile(r"(-?\d+\.?\d*e[+-]\d+)")
+
+# Characters a number can end a chunk with; held back until the next chunk
+_NUMBER_CHARS = "-+.0123456789e"
+
+# Trailing zeros of \0-separated "%.2f" / "%.6f" renderings
+_TRAILING_DECIMAL_ZEROS = re.compile(r"\.00\0|(\.\d)0\0")
+_ZERO_FRACTION = re.compile(r"\.0{6}\0")
+_TRAILING_FRACTION_ZEROS = re.compile(r"(\.\d{3}\d*?)0+\0")
 
 
 def format_large_number(value):
@@ -47,111 +66,197 @@ def format_large_number(value):
         return value  # Return original value if any error occurs
 
 
+def format_large_number_array(values: np.ndarray):
+    """
+    Vectorized format_large_number for values with magnitude >= 1 million
+    Returns (mask, strings): strings holds the formatted text where mask is True
+    """
+    values = np.asarray(values, dtype="float64")
+    magnitude = np.abs(values)
+    # NaN compares False everywhere and falls through to the default bucket
+    bucket = np.select(
+        [magnitude >= 1e12, magnitude >= 1e9, magnitude >= 1e6], [0, 1, 2], default=-1
+    )
+    strings = np.empty(values.shape, dtype=object)
+    flat_bucket = bucket.ravel()
+    flat_values = values.ravel()
+    flat_strings = strings.reshape(-1)
+    for index, (divisor, suffix) in enumerate(LARGE_NUMBER_SCALES):
+        positions = np.flatnonzero(flat_bucket == index)
+        if positions.size:
+            # One C-level %-format call per bucket instead of one per value
+            scaled = (flat_values[positions] / divisor).tolist()
+            template = ("%.2f" + suffix + "\0") * positions.size
+            flat_strings[positions] = (template % tuple(scaled)).split("\0")[:-1]
+    return bucket >= 0, strings
+
+
+def format_dataframe_numbers(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Format numeric columns with M/B/T suffixes for values >= 1 million
+    Only columns that contain such values are rebuilt; the rest are shared
+    with the input frame rather than copied
+    """
+    positions = [
+        i for i, dtype in enumerate(df.dtypes) if dtype in ["float64", "int64"]
+    ]
+    if not positions:
+        return df.copy(deep=False)
+
+    block = df.iloc[:, positions].to_numpy(dtype="float64")
+    mask, strings = format_large_number_array(block)
+    touched = mask.any(axis=0)
+
+    if len(positions) == df.shape[1] and touched.all():
+        # Financial statements: every column changes, so build one object block
+        formatted = df.to_numpy(dtype=object)
+        formatted[mask] = strings[mask]
+        return pd.DataFrame(formatted, index=df.index, columns=df.columns)
+
+    formatted_df = df.copy(deep=False)
+    for j in np.flatnonzero(touched):
+        column_mask = mask[:, j]
+        column = df.iloc[:, positions[j]].to_numpy(dtype=object, copy=True)
+        column[column_mask] = strings[column_mask, j]
+        formatted_df.isetitem(positions[j], column)
+    return formatted_df
+
+
+@traced("format_data_for_console")
 def format_data_for_console(data):
     """Format data with readable numbers for console display"""
+    return _format_data_for_console(data)
+
+
+def format_value_for_console(value):
+    """Format one value of a data dictionary for console display"""
+    if isinstance(value, (dict, pd.DataFrame, DataFrameRepr)):
+        return _format_data_for_console(value)
+    elif isinstance(value, (int, float)) and abs(value) >= 1e6:
+        return format_large_number(value)
+    elif isinstance(value, str):
+        try:
+            # Check if string represents a large number
+            num_value = float(value)
+            if abs(num_value) >= 1e6:
+                return format_large_number(num_value)
+            return value
+        except ValueError:
+            # Try to format numbers within the string
+            return format_numbers_in_string(value)
+    return value
+
+
+def _format_data_for_console(data):
     if isinstance(data, dict):
-        formatted_dict = {}
-        for key, value in data.items():
-            if isinstance(value, dict):
-                formatted_dict[key] = format_data_for_console(value)
-            elif isinstance(value, pd.DataFrame):
-                # Format DataFrame by applying number formatting to numeric columns
-                formatted_df = value.copy()
-                for col in formatted_df.columns:
-                    if formatted_df[col].dtype in ["float64", "int64"]:
-                        formatted_df[col] = formatted_df[col].apply(
-                            lambda x: (
-                                format_large_number(x)
-                                if pd.notna(x) and abs(x) >= 1e6
-                                else x
-                            )
-                        )
-                formatted_dict[key] = formatted_df
-            elif isinstance(value, (int, float)) and abs(value) >= 1e6:
-                formatted_dict[key] = format_large_number(value)
-            elif isinstance(value, str):
-                try:
-                    # Check if string represents a large number
-                    num_value = float(value)
-                    if abs(num_value) >= 1e6:
-                        formatted_dict[key] = format_large_number(num_value)
-                    else:
-                        formatted_dict[key] = value
-                except ValueError:
-                    # Try to format numbers within the string
-                    formatted_dict[key] = format_numbers_in_string(value)
-            else:
-                formatted_dict[key] = value
-        return formatted_dict
+        return {key: format_value_for_console(value) for key, value in data.items()}
     elif isinstance(data, pd.DataFrame):
         # Format DataFrame by applying number formatting to numeric columns
-        formatted_df = data.copy()
-        for col in formatted_df.columns:
-            if formatted_df[col].dtype in ["float64", "int64"]:
-                formatted_df[col] = formatted_df[col].apply(
-                    lambda x: (
-                        format_large_number(x) if pd.notna(x) and abs(x) >= 1e6 else x
-                    )
-                )
-        return formatted_df
+        return format_dataframe_numbers(data)
+    elif isinstance(data, DataFrameRepr):
+        # Raw DataFrame text from a parsed tool payload
+        return DataFrameRepr(format_numbers_in_string(data))
     elif isinstance(data, str):
-        # Try to parse the string as a dictionary
-        try:
-            # Handle various string formats that might contain a dictionary
-            data_str = str(data).strip()
-
-            # Handle pprint format
-            if data_str.startswith("(") and data_str.endswith(")"):
-                data_str = data_str[1:-1].strip()
-
-            if (data_str.startswith("'") and data_str.endswith("'")) or (
-                data_str.startswith('"') and data_str.endswith('"')
-            ):
-                data_str = data_str[1:-1]
-
-            # Try to parse as dictionary
-            if data_str.strip().startswith("{") and data_str.strip().endswith("}"):
-                parsed_data = ast.literal_eval(data_str)
-                return format_data_for_console(parsed_data)
-            else:
-                # If it's just a string, try to format numbers within it
-                return format_numbers_in_string(data_str)
-        except:
-            # If parsing fails, try to format numbers within the string
-            return format_numbers_in_string(data)
+        # Tool payloads arrive as str() of a dict with embedded DataFrame reprs
+        parsed_data = parse_payload(data)
+        if isinstance(parsed_data, dict):
+            return _format_data_for_console(parsed_data)
+        # If it's just a string, try to format numbers within it
+        return format_numbers_in_string(data)
 
     return data
 
 
+def _format_scientific(token: str) -> str:
+    """Readable form of one scientific-notation token"""
+    try:
+        num = float(token)
+        if abs(num) >= 1e6:
+            # Format large numbers with M/B/T
+            return format_large_number(num)
+        else:
+            # For smaller numbers, convert to regular decimal format
+            if abs(num) >= 1:
+                # For numbers >= 1, use appropriate decimal places
+                return f"{num:,.2f}".rstrip("0").rstrip(".")
+            else:
+                # For numbers < 1, show more precision
+                formatted = f"{num:.6f}".rstrip("0").rstrip(".")
+                # If it's a very small number, keep at least 3 decimal places
+                if "." in formatted and len(formatted.split(".")[1]) < 3:
+                    formatted = f"{num:.3f}"
+                return formatted
+    except:
+        return token
+
+
+def format_scientific_tokens(tokens):
+    """
+    Vectorized _format_scientific for a list of scientific-notation tokens
+    Each magnitude range is rendered with one C-level format call
+    """
+    try:
+        values = np.array(tokens, dtype="float64")
+    except ValueError:
+        return [_format_scientific(token) for token in tokens]
+
+    large, strings = format_large_number_array(values)
+    magnitude = np.abs(values)
+    for selected, render in (
+        ((magnitude >= 1) & ~large, _render_decimals),
+        (magnitude < 1, _render_fractions),
+    ):
+        positions = np.flatnonzero(selected)
+        if positions.size:
+            strings[positions] = render(values[positions].tolist())
+    return strings.tolist()
+
+
+def _render_decimals(values):
+    # f"{num:,.2f}".rstrip("0").rstrip(".") for every value
+    text = ("{:,.2f}\0" * len(values)).format(*values)
+    return _TRAILING_DECIMAL_ZEROS.sub(r"\1\0", text).split("\0")[:-1]
+
+
+def _render_fractions(values):
+    # "%.6f" without trailing zeros, keeping at least 3 decimals unless all are zero
+    text = ("%.6f\0" * len(values)) % tuple(values)
+    text = _ZERO_FRACTION.sub("\0", text)
+    return _TRAILING_FRACTION_ZEROS.sub(r"\1\0", text).split("\0")[:-1]
+
+
 def format_numbers_in_string(text):
     """Format large numbers found within a string"""
-    import re
+    # re.split with one capture group alternates [text, number, text, ...],
+    # so every number in the string is converted in one batch
+    parts = SCIENTIFIC_PATTERN.split(str(text))
+    if len(parts) > 1:
+        parts[1::2] = format_scientific_tokens(parts[1::2])
+    return "".join(parts)
 
-    # Pattern to match scientific notation numbers (e.g., 1.705100e+07, 2.530000e-01)
-    scientific_pattern = r"(-?\d+\.?\d*e[+-]\d+)"
 
-    def replace_scientific(match):
-        try:
-            num = float(match.group(1))
-            if abs(num) >= 1e6:
-                # Format large numbers with M/B/T
-                return format_large_number(num)
-            else:
-                # For smaller numbers, convert to regular decimal format
-                if abs(num) >= 1:
-                    # For numbers >= 1, use appropriate decimal places
-                    return f"{num:,.2f}".rstrip("0").rstrip(".")
-                else:
-                    # For numbers < 1, show more precision
-                    formatted = f"{num:.6f}".rstrip("0").rstrip(".")
-                    # If it's a very small number, keep at least 3 decimal places
-                    if "." in formatted and len(formatted.split(".")[1]) < 3:
-                        formatted = f"{num:.3f}"
-                    return formatted
-        except:
-            return match.group(1)
-
-    # Replace scientific notation numbers
-    formatted_text = re.sub(scientific_pattern, replace_scientific, str(text))
-
-    return formatted_text
+def iter_format_numbers(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Incrementally format numbers over a stream of text chunks
+    A trailing run of number characters is held back until the next chunk,
+    so a token split across chunk boundaries is still formatted correctly
+    """
+    carry = ""
+    for chunk in chunks:
+        buffer = carry + chunk
+        cut = len(buffer.rstrip(_NUMBER_CHARS))
+        carry = buffer[cut:]
+        if cut:
+            yield format_numbers_in_string(buffer[:cut])
+    if carry:
+        yield format_numbers_in_string(carry)
+
+
+def format_numbers_in_stream(source: TextIO, target: TextIO, chunk_size: int = 1 << 16):
+    """Format numbers from one text file object into another, chunk by chunk"""
+    chunks = iter(lambda: source.read(chunk_size), "")
+    written = 0
+    for piece in iter_format_numbers(chunks):
+        target.write(piece)
+        written += len(piece)
+    return written
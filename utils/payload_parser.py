@@ -0,0 +1,246 @@
+"""
+Tolerant Parser for Stock Data Tool Payloads
+The data collection agent hands over str() of the get_full_stock_info dict,
+which embeds DataFrame reprs that no literal parser accepts. This parses
+that shape (and JSON / plain Python literals) in a single pass, keeping
+non-literal values such as DataFrame reprs as their raw text.
+"""
+
+import ast
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from utils.metrics import record_cache_lookup
+
+# Parsed payloads kept per content hash (tool payloads are a few hundred KB)
+MAX_CACHED_PAYLOADS = 32
+
+_WHITESPACE = re.compile(r"\s*")
+_STRING = re.compile(r"""'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*\"""")
+_NUMBER = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_NAME = re.compile(r"[-+]?[A-Za-z_][\w.]*")
+# End of a value that is not a literal: the next "'key': " entry or the
+# closing brace of the dict it sits in
+_RAW_VALUE_END = re.compile(
+    r"""(?:,\s*(?=(?:'[^'\n]*'|"[^"\n]*")\s*:)|\s*\}(?=\s*(?:[,}\])]|\Z)))"""
+)
+
+_CONSTANTS = {
+    "None": None,
+    "null": None,
+    "True": True,
+    "true": True,
+    "False": False,
+    "false": False,
+    "nan": float("nan"),
+    "NaN": float("nan"),
+    "inf": float("inf"),
+    "-inf": float("-inf"),
+    "Infinity": float("inf"),
+    "-Infinity": float("-inf"),
+}
+_CLOSERS = {"{": "}", "[": "]", "(": ")"}
+
+
+class PayloadParseError(ValueError):
+    """Raised when text does not have the shape of a payload"""
+
+
+class DataFrameRepr(str):
+    """
+    Raw text of a value that was not a literal (usually a DataFrame repr)
+    repr() returns the text itself, so str() of a parsed payload reads like
+    the original tool output
+    """
+
+    def __repr__(self):
+        return str(self)
+
+
+class _PayloadParser:
+    """Recursive-descent parser over one payload string"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+
+    def fail(self, message: str):
+        raise PayloadParseError(f"{message} at position {self.pos}")
+
+    def skip_whitespace(self):
+        self.pos = _WHITESPACE.match(self.text, self.pos).end()
+
+    def peek(self) -> str:
+        return self.text[self.pos : self.pos + 1]
+
+    def parse(self) -> Any:
+        self.skip_whitespace()
+        value = self.value()
+        self.skip_whitespace()
+        if self.pos != len(self.text):
+            self.fail("Unexpected trailing text")
+        return value
+
+    def value(self) -> Any:
+        char = self.peek()
+        if char in _CLOSERS:
+            return self.container(char)
+        match = _STRING.match(self.text, self.pos)
+        if match:
+            self.pos = match.end()
+            return self.string(match.group())
+        match = _NUMBER.match(self.text, self.pos)
+        if match and not _NAME.match(self.text, match.end()):
+            self.pos = match.end()
+            token = match.group()
+            if token.lstrip("+-").isdigit():
+                return int(token)
+            return float(token)
+        match = _NAME.match(self.text, self.pos)
+        if match:
+            self.pos = match.end()
+            name = match.group()
+            if name in _CONSTANTS:
+                return _CONSTANTS[name]
+            if self.peek() == "(":
+                # np.float64(1.5), Timestamp('2025-03-31'): keep the argument
+                arguments = self.container("(")
+                if len(arguments) == 1:
+                    return arguments[0]
+                return arguments
+        self.fail("Expected a value")
+
+    def string(self, token: str) -> str:
+        if "\\" not in token:
+            return token[1:-1]
+        return ast.literal_eval(token)
+
+    def container(self, opener: str):
+        closer = _CLOSERS[opener]
+        is_dict = opener == "{"
+        items = {} if is_dict else []
+        self.pos += 1
+        self.skip_whitespace()
+        if self.peek() == closer:
+            self.pos += 1
+            return items if opener != "(" else tuple(items)
+        while True:
+            self.skip_whitespace()
+            if is_dict:
+                key = self.value()
+                self.skip_whitespace()
+                if self.peek() != ":":
+                    self.fail("Expected ':'")
+                self.pos += 1
+                if self.peek() == " ":
+                    self.pos += 1
+                items[key] = self.dict_value()
+            else:
+                items.append(self.value())
+            self.skip_whitespace()
+            char = self.peek()
+            if char == closer:
+                self.pos += 1
+                return items if opener != "(" else tuple(items)
+            if char != ",":
+                self.fail(f"Expected ',' or '{closer}'")
+            self.pos += 1
+            self.skip_whitespace()
+            if self.peek() == closer:
+                # Trailing comma
+                self.pos += 1
+                return items if opener != "(" else tuple(items)
+
+    def dict_value(self) -> Any:
+        start = self.pos
+        try:
+            self.skip_whitespace()
+            value = self.value()
+            end = self.pos
+            self.skip_whitespace()
+            if self.peek() in (",", "}"):
+                self.pos = end
+                return value
+        except PayloadParseError:
+            pass
+        # Not a literal: take the raw text up to the next entry of this dict
+        match = _RAW_VALUE_END.search(self.text, start)
+        if not match:
+            self.pos = start
+            self.fail("Unterminated value")
+        self.pos = match.start()
+        return DataFrameRepr(self.text[start : match.start()])
+
+
+def _strip_wrappers(text: str) -> str:
+    text = text.strip()
+    # Handle pprint format (starts and ends with parentheses)
+    if text.startswith("(") and text.endswith(")"):
+        text = text[1:-1].strip()
+    # Handle single or double quotes around the entire string
+    if len(text) > 1 and text[0] == text[-1] and text[0] in "'\"":
+        text = text[1:-1]
+    return text
+
+
+def parse_payload_text(text: str) -> Any:
+    """
+    Parse payload text without caching
+    Raises PayloadParseError when the text is not a payload
+    """
+    text = _strip_wrappers(text)
+    try:
+        return _PayloadParser(text).parse()
+    except PayloadParseError:
+        # The dictionary may be embedded in surrounding prose
+        start, end = text.find("{"), text.rfind("}")
+        if start <= 0 or end <= start:
+            raise
+        return _PayloadParser(text[start : end + 1]).parse()
+
+
+_cache: "OrderedDict[bytes, Any]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def parse_payload(data: Any) -> Optional[dict]:
+    """
+    Parse a stock data payload into a dictionary, or None if it isn't one
+    Results are memoized by content hash; treat returned dicts as read-only
+    """
+    if not data:
+        return None
+    if not isinstance(data, str):
+        return data
+
+    key = hashlib.blake2b(
+        data.encode("utf-8", "surrogatepass"), digest_size=16
+    ).digest()
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            record_cache_lookup("payload_parse", True)
+            return _cache[key]
+    record_cache_lookup("payload_parse", False)
+
+    try:
+        result = parse_payload_text(data)
+    except (PayloadParseError, ValueError, SyntaxError):
+        result = None
+    if not isinstance(result, dict):
+        result = None
+
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > MAX_CACHED_PAYLOADS:
+            _cache.popitem(last=False)
+    return result
+
+
+def clear_payload_cache():
+    """Drop every memoized parse result"""
+    with _cache_lock:
+        _cache.clear()
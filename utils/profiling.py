@@ -0,0 +1,288 @@
+"""
+Opt-In CPU and Memory Profiling
+Set PROFILE_DIR (or pass --profile DIR to main.py) to profile every run of a
+@profiled function: cProfile on the calling thread, or with
+PROFILE_MODE=sample a wall-clock stack sampler covering every thread (the
+data tool runs on executor threads), plus tracemalloc. Each run writes its
+own files to PROFILE_DIR:
+  <run>.prof / <run>.folded   raw profile (snakeviz, pstats / speedscope)
+  <run>-cpu.txt               top PROFILE_TOP_N functions
+  <run>-memory.txt            peak traced memory and top allocation sites
+Profilers are process-wide, so a run that starts while another is being
+profiled runs unprofiled. With profiling off the wrapper is one attribute
+check and nothing is imported or started.
+"""
+
+import functools
+import inspect
+import io
+import os
+import re
+import sys
+import threading
+import time
+import zipfile
+from collections import Counter, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Deque, List, Optional
+
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", "25"))
+# Seconds between stack samples in sample mode
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+# Profiled runs remembered for listing (e.g. Streamlit download links)
+MAX_RECENT_PROFILES = 20
+
+PROFILE_MODES = ("cprofile", "sample")
+
+
+@dataclass
+class ProfileRun:
+    """Files written for one profiled run"""
+
+    name: str
+    label: str
+    started_at: float = field(default_factory=time.time)
+    duration_seconds: float = 0.0
+    files: List[str] = field(default_factory=list)
+
+    @property
+    def title(self) -> str:
+        started = datetime.fromtimestamp(self.started_at).strftime("%H:%M:%S")
+        label = f" {self.label}" if self.label else ""
+        return f"{self.name}{label} at {started} ({self.duration_seconds:.1f}s)"
+
+    def zip_bytes(self) -> bytes:
+        """Every file of the run in one zip archive"""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for path in self.files:
+                if os.path.exists(path):
+                    archive.write(path, os.path.basename(path))
+        return buffer.getvalue()
+
+
+class StackSampler:
+    """Counts the stacks of every other thread, sampled on a daemon thread"""
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="profile-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(
+                        f"{code.co_name} "
+                        f"({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                    )
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write_folded(self, path: str):
+        """Collapsed stacks, one `frame;frame;frame count` line each"""
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def summary(self, top_n: int) -> str:
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        lines = [
+            f"{self.samples} samples every {self.interval * 1000:.1f} ms "
+            "(wall clock, all threads, idle waits included)",
+            "",
+            f"{'samples':>8} {'share':>7}  function (innermost frame)",
+        ]
+        for leaf, count in leaves.most_common(top_n):
+            lines.append(f"{count:>8} {count / total:>7.1%}  {leaf}")
+        return "\n".join(lines) + "\n"
+
+
+def _memory_summary(snapshot, peak_bytes: int, top_n: int) -> str:
+    import tracemalloc
+
+    snapshot = snapshot.filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            # The sampler's own stack counts
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        )
+    )
+    lines = [
+        f"Peak traced memory: {peak_bytes / 1024 / 1024:.1f} MB",
+        "",
+        f"Top {top_n} allocation sites still held at the end of the run:",
+    ]
+    for stat in snapshot.statistics("lineno")[:top_n]:
+        frame = stat.traceback[0]
+        lines.append(
+            f"{stat.size / 1024:>10.1f} KiB {stat.count:>8} blocks  "
+            f"{frame.filename}:{frame.lineno}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+class Profiler:
+    """Profiles one run at a time and keeps the recent runs' files"""
+
+    def __init__(self, output_dir: Optional[str] = None, mode: str = ""):
+        self.output_dir = output_dir
+        self.mode = mode or "cprofile"
+        self.enabled = bool(output_dir)
+        self.top_n = PROFILE_TOP_N
+        self.runs: Deque[ProfileRun] = deque(maxlen=MAX_RECENT_PROFILES)
+        self._active = threading.Lock()
+
+    def _base_path(self, run: ProfileRun) -> str:
+        stamp = datetime.fromtimestamp(run.started_at).strftime("%Y%m%d-%H%M%S")
+        label = re.sub(r"[^A-Za-z0-9_.-]+", "_", run.label)
+        name = "-".join(part for part in (run.name, label, stamp) if part)
+        return os.path.join(self.output_dir, f"{name}-{os.getpid()}")
+
+    @contextmanager
+    def profile(self, name: str, label: str = ""):
+        """Profile the block; yields the ProfileRun, or None when not profiling"""
+        if not self.enabled or not self._active.acquire(blocking=False):
+            yield None
+            return
+        try:
+            import tracemalloc
+
+            run = ProfileRun(name, label)
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            else:
+                tracemalloc.reset_peak()
+            if self.mode == "sample":
+                cpu = StackSampler()
+                cpu.start()
+            else:
+                import cProfile
+
+                cpu = cProfile.Profile()
+                cpu.enable()
+            started = time.perf_counter()
+            try:
+                yield run
+            finally:
+                run.duration_seconds = time.perf_counter() - started
+                if self.mode == "sample":
+                    cpu.stop()
+                else:
+                    cpu.disable()
+                snapshot = tracemalloc.take_snapshot()
+                peak = tracemalloc.get_traced_memory()[1]
+                if started_tracing:
+                    tracemalloc.stop()
+                self._write(run, cpu, snapshot, peak)
+        finally:
+            self._active.release()
+
+    def _write(self, run: ProfileRun, cpu, snapshot, peak: int):
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = self._base_path(run)
+        if isinstance(cpu, StackSampler):
+            cpu.write_folded(f"{base}.folded")
+            cpu_summary = cpu.summary(self.top_n)
+            run.files.append(f"{base}.folded")
+        else:
+            import pstats
+
+            cpu.dump_stats(f"{base}.prof")
+            text = io.StringIO()
+            stats = pstats.Stats(cpu, stream=text).sort_stats("cumulative")
+            stats.print_stats(self.top_n)
+            cpu_summary = text.getvalue()
+            run.files.append(f"{base}.prof")
+
+        for suffix, content in (
+            ("cpu", cpu_summary),
+            ("memory", _memory_summary(snapshot, peak, self.top_n)),
+        ):
+            path = f"{base}-{suffix}.txt"
+            with open(path, "w") as f:
+                f.write(f"# {run.title}\n{content}")
+            run.files.append(path)
+        self.runs.append(run)
+        print(f"🔬 Profile written to {base}.*", file=sys.stderr)
+
+
+# Global profiler, configured from PROFILE_DIR / PROFILE_MODE
+profiler = Profiler(os.getenv("PROFILE_DIR"), os.getenv("PROFILE_MODE", ""))
+
+
+def _label(args) -> str:
+    # The ticker: every profiled entry point takes it as its first argument
+    return args[0] if args and isinstance(args[0], str) else ""
+
+
+def profiled(name: Optional[str] = None):
+    """Decorator that profiles each call of a sync or async function"""
+
+    def decorator(func):
+        profile_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not profiler.enabled:
+                    return await func(*args, **kwargs)
+                with profiler.profile(profile_name, _label(args)):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            with profiler.profile(profile_name, _label(args)):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def enable_profiling(output_dir: str, mode: str = ""):
+    """Turn profiling on at runtime (e.g. from a CLI flag)"""
+    if mode and mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode '{mode}': {', '.join(PROFILE_MODES)}")
+    profiler.output_dir = output_dir
+    profiler.mode = mode or profiler.mode
+    profiler.enabled = True
+
+
+def recent_profiles() -> List[ProfileRun]:
+    """Profiled runs of this process, newest first"""
+    return list(reversed(profiler.runs))
@@ -0,0 +1,93 @@
+"""
+Recommendation Store
+Last recommendation per stock together with the inputs it was based on,
+kept in a small JSON file so watchlist rows survive restarts and change
+detection can compare against the data the LLM actually saw.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+DEFAULT_STORE_PATH = os.getenv("RECOMMENDATION_STORE_PATH", "recommendations.json")
+
+_RECOMMENDATION = re.compile(r"\b(MUST BUY|BUY|SELL|HOLD)\b")
+
+
+def extract_recommendation(analysis: Optional[str]) -> Optional[str]:
+    """Final BUY / SELL / HOLD verdict of an analysis (its last mention)"""
+    matches = _RECOMMENDATION.findall(analysis or "")
+    return matches[-1] if matches else None
+
+
+class RecommendationStore:
+    """Thread-safe symbol -> latest recommendation record, persisted as JSON"""
+
+    def __init__(self, filepath: Optional[str] = DEFAULT_STORE_PATH):
+        self.filepath = filepath
+        self._lock = threading.Lock()
+        self._records: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.filepath or not os.path.exists(self.filepath):
+            return {}
+        try:
+            with open(self.filepath) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        if not self.filepath:
+            return
+        try:
+            # Write then rename so a crash never leaves a truncated file
+            temp_path = f"{self.filepath}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(self._records, f, indent=2)
+            os.replace(temp_path, self.filepath)
+        except OSError:
+            # Persistence is best-effort; the records stay in memory
+            pass
+
+    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        return self._records.get(symbol.strip().upper())
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return dict(self._records)
+
+    def record(
+        self,
+        symbol: str,
+        recommendation: Optional[str],
+        inputs: Dict[str, Any],
+        analysis: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Store the outcome of an analysis and the inputs it was based on"""
+        record = {
+            "recommendation": recommendation,
+            "inputs": inputs,
+            "analysed_at": time.time(),
+            "analysis": analysis,
+        }
+        with self._lock:
+            self._records[symbol.strip().upper()] = record
+            self._save()
+        return record
+
+
+_default_store: Optional[RecommendationStore] = None
+_default_store_lock = threading.Lock()
+
+
+def default_store() -> RecommendationStore:
+    """Process-wide store at RECOMMENDATION_STORE_PATH, loaded on first use"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = RecommendationStore()
+        return _default_store
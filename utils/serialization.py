@@ -0,0 +1,44 @@
+"""
+JSON Serialization of Analysis Data
+Converts stock snapshots and analysis records (DataFrames, numpy scalars,
+timestamps, NaN) into values json.dumps accepts, for JSONL output and
+the HTTP API.
+"""
+
+import math
+from datetime import date, datetime
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+
+def to_jsonable(value: Any) -> Any:
+    """
+    Copy of value that json.dumps accepts
+    DataFrames become {"index", "columns", "data"}, NaN / inf become None,
+    and anything else unknown becomes its str().
+    """
+    if isinstance(value, dict):
+        return {str(key): to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(item) for item in value]
+    if isinstance(value, pd.DataFrame):
+        return {
+            "index": [to_jsonable(label) for label in value.index],
+            "columns": [to_jsonable(label) for label in value.columns],
+            "data": to_jsonable(value.to_numpy().tolist()),
+        }
+    if isinstance(value, pd.Series):
+        return {str(to_jsonable(key)): to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if value is None or isinstance(value, (str, int, bool)):
+        return value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if value is pd.NaT:
+        return None
+    return str(value)
@@ -0,0 +1,135 @@
+"""
+Lazy Formatted View over Stock Data
+Wraps the data collection payload and formats / serializes each section
+only when it is first accessed, caching the result for later reads.
+Statements and holders are also exposed as typed DataFrames for table
+rendering when the fetched snapshot is available.
+"""
+
+from functools import cached_property
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from utils.number_formatter import format_data_for_console, format_value_for_console
+from utils.payload_parser import parse_payload
+from utils.tracing import span
+
+# Top-level keys shown as the basic stock information
+BASIC_INFO_KEYS = (
+    "Ticker",
+    "Current Price",
+    "Open",
+    "Day High",
+    "Day Low",
+    "Volume",
+    "52-Week High",
+    "52-Week Low",
+)
+
+# Nested sections holding statement / holder tables
+TABLE_SECTIONS = {
+    "Financials": ("Income Statement", "Balance Sheet", "Cash Flow"),
+    "Holders": ("Institutional Holders", "Mutual Fund Holders", "Major Holders"),
+}
+
+
+def as_display_table(frame: pd.DataFrame) -> pd.DataFrame:
+    """Copy of a statement / holder frame with date column labels and typed values"""
+    table = frame.infer_objects()
+    if isinstance(table.columns, pd.DatetimeIndex):
+        table = table.set_axis(table.columns.strftime("%Y-%m-%d"), axis=1)
+    else:
+        table = table.set_axis([str(column) for column in table.columns], axis=1)
+    return table
+
+
+def extract_tables(payload: Optional[dict]) -> Dict[str, pd.DataFrame]:
+    """Non-empty statement and holder DataFrames of a fetched snapshot by name"""
+    tables = {}
+    for group, names in TABLE_SECTIONS.items():
+        section = (payload or {}).get(group)
+        if not isinstance(section, dict):
+            continue
+        for name in names:
+            frame = section.get(name)
+            if isinstance(frame, pd.DataFrame) and not frame.empty:
+                tables[name] = as_display_table(frame)
+    return tables
+
+
+class StockDataView:
+    """Read-only view of a stock data payload with per-section formatting"""
+
+    def __init__(self, data: Any, tables: Optional[Dict[str, pd.DataFrame]] = None):
+        self.raw = data
+        self._tables = tables
+        self._sections: Dict[str, Any] = {}
+        self._section_texts: Dict[str, str] = {}
+
+    @cached_property
+    def parsed(self) -> Optional[dict]:
+        """Payload as a dictionary, or None if it isn't one"""
+        if isinstance(self.raw, dict):
+            return self.raw
+        if isinstance(self.raw, str):
+            return parse_payload(self.raw)
+        return None
+
+    def keys(self) -> List[str]:
+        return list(self.parsed or {})
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Unformatted value of a top-level section"""
+        return (self.parsed or {}).get(key, default)
+
+    @property
+    def basic_info(self) -> Dict[str, Any]:
+        return {key: self.get(key, "N/A") for key in BASIC_INFO_KEYS}
+
+    @cached_property
+    def tables(self) -> Dict[str, pd.DataFrame]:
+        """Statement and holder tables (given, or taken from a dict payload)"""
+        if self._tables is not None:
+            return self._tables
+        return extract_tables(self.parsed)
+
+    def table_text(self, name: str) -> Optional[str]:
+        """Text of a statement / holder table as it appears in the payload"""
+        for group, names in TABLE_SECTIONS.items():
+            section = self.get(group)
+            if name in names and isinstance(section, dict):
+                value = section.get(name)
+                return None if value is None else str(value)
+        return None
+
+    def section(self, key: str) -> Any:
+        """Formatted value of a top-level section (formatted on first access)"""
+        if key not in self._sections:
+            with span("stock_data_view.format", section=key):
+                self._sections[key] = format_value_for_console(self.get(key))
+        return self._sections[key]
+
+    def section_text(self, key: str) -> str:
+        """Formatted section serialized the way str() of the payload shows it"""
+        if key not in self._section_texts:
+            self._section_texts[key] = repr(self.section(key))
+        return self._section_texts[key]
+
+    @cached_property
+    def formatted(self) -> Any:
+        """Fully formatted payload (every section)"""
+        if self.parsed is None:
+            return format_data_for_console(self.raw)
+        return {key: self.section(key) for key in self.keys()}
+
+    @cached_property
+    def text(self) -> str:
+        """str() of the fully formatted payload, assembled from cached sections"""
+        if self.parsed is None:
+            return str(self.formatted)
+        return (
+            "{"
+            + ", ".join(f"{key!r}: {self.section_text(key)}" for key in self.keys())
+            + "}"
+        )
@@ -0,0 +1,260 @@
+"""
+Lightweight Stage-Level Latency Tracing
+Spans are recorded only when TRACE_OUTPUT is set and written as a Chrome
+trace (chrome://tracing, Perfetto) or OTLP-JSON file. When tracing is
+disabled span() only times the stage for the always-on stage latency
+histogram in utils.metrics, so the overhead is about a microsecond.
+Long-running processes keep only the newest TRACE_MAX_SPANS spans.
+"""
+
+import atexit
+import collections
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional
+
+from utils.metrics import stage_errors, stage_latency
+
+# Finished spans kept for the trace file; older ones are dropped first
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "50000"))
+
+
+class _MetricSpan:
+    """Span used while tracing is disabled: feeds the latency histogram only"""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        stage_latency.observe(time.perf_counter() - self.start, stage=self.name)
+        if exc_type is not None:
+            stage_errors.inc(stage=self.name)
+        return False
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+
+# Innermost open span of the current thread / asyncio task
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """A timed stage; use as a context manager"""
+
+    __slots__ = (
+        "tracer",
+        "name",
+        "attributes",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "start_ns",
+        "end_ns",
+        "thread_id",
+        "_token",
+    )
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = None
+        self.trace_id = None
+        self.start_ns = 0
+        self.end_ns = 0
+        self.thread_id = 0
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        parent = _current_span.get()
+        if parent is not None:
+            self.parent_id = parent.span_id
+            self.trace_id = parent.trace_id
+        else:
+            self.trace_id = os.urandom(16).hex()
+        self.thread_id = threading.get_ident()
+        self._token = _current_span.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        _current_span.reset(self._token)
+        stage_latency.observe((self.end_ns - self.start_ns) / 1e9, stage=self.name)
+        if exc_type is not None:
+            self.attributes["error"] = f"{exc_type.__name__}: {exc}"
+            stage_errors.inc(stage=self.name)
+        self.tracer.record(self)
+        return False
+
+
+class Tracer:
+    """Collects finished spans and writes them to the trace file"""
+
+    def __init__(
+        self,
+        output_path: Optional[str] = None,
+        trace_format: str = "",
+        max_spans: int = TRACE_MAX_SPANS,
+    ):
+        self.output_path = output_path
+        self.trace_format = trace_format or (
+            "otlp" if output_path and output_path.endswith(".otlp.json") else "chrome"
+        )
+        self.enabled = bool(output_path)
+        self.spans: Deque[Span] = collections.deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **attributes):
+        """Start a span (metrics-only when tracing is disabled)"""
+        if not self.enabled:
+            return _MetricSpan(name)
+        return Span(self, name, attributes)
+
+    def record(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def _snapshot(self) -> List[Span]:
+        with self._lock:
+            return list(self.spans)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        pid = os.getpid()
+        events = [
+            {
+                "name": span.name,
+                "cat": span.name.split(".")[0],
+                "ph": "X",
+                "ts": span.start_ns / 1000,
+                "dur": (span.end_ns - span.start_ns) / 1000,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": {k: str(v) for k, v in span.attributes.items()},
+            }
+            for span in self._snapshot()
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def to_otlp_json(self) -> Dict[str, Any]:
+        spans = []
+        for span in self._snapshot():
+            otlp_span = {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": [
+                    {"key": k, "value": {"stringValue": str(v)}}
+                    for k, v in span.attributes.items()
+                ],
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = span.parent_id
+            spans.append(otlp_span)
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": {"stringValue": "trade-analysis-gtp"},
+                            }
+                        ]
+                    },
+                    "scopeSpans": [
+                        {"scope": {"name": "utils.tracing"}, "spans": spans}
+                    ],
+                }
+            ]
+        }
+
+    def flush(self, output_path: Optional[str] = None) -> Optional[str]:
+        """Write the spans kept so far to the trace file"""
+        path = output_path or self.output_path
+        if not path or not self.spans:
+            return None
+        # Each export copies the buffer under the lock and builds the JSON outside it
+        data = (
+            self.to_otlp_json()
+            if self.trace_format == "otlp"
+            else self.to_chrome_trace()
+        )
+        with open(path, "w") as f:
+            json.dump(data, f)
+        return path
+
+
+# Global tracer, configured from TRACE_OUTPUT / TRACE_FORMAT ("chrome" or "otlp")
+tracer = Tracer(os.getenv("TRACE_OUTPUT"), os.getenv("TRACE_FORMAT", ""))
+if tracer.enabled:
+    atexit.register(tracer.flush)
+
+
+def span(name: str, **attributes):
+    """Convenience function to time a stage: `with span("stage", key=value):`"""
+    if not tracer.enabled:
+        return _MetricSpan(name)
+    return Span(tracer, name, attributes)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator that wraps a sync or async function in a span"""
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def enable_tracing(output_path: str, trace_format: str = ""):
+    """Turn tracing on at runtime (e.g. from a CLI flag)"""
+    tracer.output_path = output_path
+    tracer.trace_format = trace_format or (
+        "otlp" if output_path.endswith(".otlp.json") else "chrome"
+    )
+    if not tracer.enabled:
+        tracer.enabled = True
+        atexit.register(tracer.flush)
+
+
+def flush_traces() -> Optional[str]:
+    """Write the trace file now; returns its path when anything was written"""
+    if not tracer.enabled:
+        return None
+    return tracer.flush()
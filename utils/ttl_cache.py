@@ -0,0 +1,94 @@
+"""
+In-Process TTL Cache
+Small thread-safe cache with per-entry expiry, used for fetched stock
+snapshots and other data that is safe to reuse for a few minutes. Every
+lookup is published to the cache_requests metric under the cache's name.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional, Tuple
+
+from utils.metrics import record_cache_lookup
+
+_MISSING = object()
+
+# Every TTLCache created in this process, for clear_all_caches()
+_caches: List["TTLCache"] = []
+
+
+class TTLCache:
+    """Least-recently-used cache whose entries expire after ttl_seconds"""
+
+    def __init__(self, name: str, ttl_seconds: float, maxsize: int = 128):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        # key -> (expires_at, value)
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        _caches.append(self)
+
+    def _lookup(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                value = entry[1]
+            else:
+                if entry is not None:
+                    del self._entries[key]
+                value = _MISSING
+        record_cache_lookup(self.name, value is not _MISSING)
+        return value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        expires_at = time.monotonic() + (
+            self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        )
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Cached value for key, computing and storing it on a miss"""
+        value = self._lookup(key)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Value for key without touching recency or the lookup metrics"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return default
+        return entry[1]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.peek(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def clear_all_caches():
+    """Drop the entries of every TTL cache"""
+    for cache in _caches:
+        cache.clear()
@@ -0,0 +1,318 @@
+"""
+Cost and Latency Analytics over the Usage Ledger
+Loads the usage history into pandas and computes vectorized percentile,
+throughput and cache-savings reports per ticker, model and pipeline stage
+"""
+
+import argparse
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.cost_tracker import DEFAULT_LEDGER_PATH, MODEL_PRICING
+
+PERCENTILES = [0.50, 0.95, 0.99]
+
+# Report dimensions: report name -> ledger column
+GROUPINGS = {
+    "ticker": "stock_symbol",
+    "model": "model_name",
+    "stage": "stage",
+}
+
+LEDGER_COLUMNS = {
+    "session_id": "category",
+    "app_type": "category",
+    "stock_symbol": "category",
+    "stage": "category",
+    "model_name": "category",
+    "prompt_tokens": "int64",
+    "completion_tokens": "int64",
+    "total_tokens": "int64",
+    "cached_tokens": "int64",
+    "latency_seconds": "float64",
+}
+
+
+def load_usage_frame(filepath: str = DEFAULT_LEDGER_PATH) -> pd.DataFrame:
+    """
+    Load usage history into a DataFrame with one row per model request
+    Supports the JSONL ledger, save_session_data() JSON, CSV and Parquet
+    """
+    if filepath.endswith(".parquet"):
+        df = pd.read_parquet(filepath)
+    elif filepath.endswith(".csv"):
+        df = pd.read_csv(filepath)
+    elif filepath.endswith(".jsonl"):
+        df = pd.read_json(filepath, lines=True, convert_dates=False)
+    else:
+        # Nested session file written by cost_tracker.save_session_data()
+        with open(filepath) as f:
+            sessions = json.load(f).get("sessions", [])
+        df = pd.json_normalize(
+            sessions,
+            record_path="token_usages",
+            meta=["session_id", "app_type", "stock_symbol"],
+        )
+    return normalize_usage_frame(df)
+
+
+def normalize_usage_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Fill missing ledger columns, fix dtypes and recompute costs vectorized"""
+    df = df.copy(deep=False)
+    for column, dtype in LEDGER_COLUMNS.items():
+        if column not in df.columns:
+            df[column] = "" if dtype == "category" else 0
+        if dtype == "category":
+            # Dimension columns are low-cardinality; categoricals keep string
+            # work proportional to the number of distinct values, not rows
+            df[column] = df[column].astype("category")
+        else:
+            df[column] = df[column].fillna(0).astype(dtype)
+
+    # Upper-case tickers on the categories and remap codes for merged values
+    symbols = df["stock_symbol"]
+    upper = pd.Index(symbols.cat.categories.astype(str).str.upper())
+    unique_upper = upper.unique()
+    remap = unique_upper.get_indexer(upper)
+    symbol_codes = symbols.cat.codes.to_numpy()
+    df["stock_symbol"] = pd.Categorical.from_codes(
+        np.where(symbol_codes >= 0, remap[symbol_codes], -1), categories=unique_upper
+    )
+
+    timestamps = df["timestamp"] if "timestamp" in df.columns else pd.NaT
+    # isoformat() drops zero microseconds, so formats vary within one ledger
+    df["timestamp"] = pd.to_datetime(timestamps, errors="coerce", format="ISO8601")
+
+    # Price lookup by model category, unknown models use the default rate
+    categories = df["model_name"].cat.categories
+    model_keys = [
+        name.lower() if name.lower() in MODEL_PRICING else "default"
+        for name in categories.astype(str)
+    ]
+    codes = df["model_name"].cat.codes.to_numpy()
+    input_rate = np.array([MODEL_PRICING[k]["input"] for k in model_keys] + [0.0])
+    output_rate = np.array([MODEL_PRICING[k]["output"] for k in model_keys] + [0.0])
+    if (codes == -1).any():
+        # Missing model names (code -1) index the trailing default slot
+        input_rate[-1] = MODEL_PRICING["default"]["input"]
+        output_rate[-1] = MODEL_PRICING["default"]["output"]
+
+    df["cost_usd"] = (
+        df["prompt_tokens"].to_numpy() * input_rate[codes]
+        + df["completion_tokens"].to_numpy() * output_rate[codes]
+    ) / 1_000_000
+    df["cache_savings_usd"] = (
+        df["cached_tokens"].to_numpy() * input_rate[codes] / 1_000_000
+    )
+    return df
+
+
+def _group_quantiles(
+    codes: np.ndarray, values: np.ndarray, n_groups: int
+) -> np.ndarray:
+    """Quantiles of values per group code using one stable sort of the codes"""
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(n_groups + 1))
+    sorted_values = values[order]
+    result = np.full((n_groups, len(PERCENTILES)), np.nan)
+    for group in range(n_groups):
+        chunk = sorted_values[bounds[group] : bounds[group + 1]]
+        if chunk.size:
+            result[group] = np.quantile(chunk, PERCENTILES)
+    return result
+
+
+def percentile_report(df: pd.DataFrame, by: str) -> pd.DataFrame:
+    """p50/p95/p99 latency and cost plus totals for each value of a column"""
+    dimension = df[by].astype("category")
+    categories = dimension.cat.categories
+    codes = dimension.cat.codes.to_numpy()
+    valid = codes >= 0
+    codes = codes[valid]
+    n_groups = len(categories)
+
+    report = pd.DataFrame(
+        {
+            "requests": np.bincount(codes, minlength=n_groups),
+            "total_tokens": np.bincount(
+                codes, df["total_tokens"].to_numpy()[valid], minlength=n_groups
+            ).astype("int64"),
+            "total_cost_usd": np.bincount(
+                codes, df["cost_usd"].to_numpy()[valid], minlength=n_groups
+            ),
+        },
+        index=pd.Index(categories, name=by),
+    )
+    for prefix, column in (("latency", "latency_seconds"), ("cost", "cost_usd")):
+        quantiles = _group_quantiles(codes, df[column].to_numpy()[valid], n_groups)
+        for i, q in enumerate(PERCENTILES):
+            report[f"{prefix}_p{int(q * 100)}"] = quantiles[:, i]
+
+    report = report[report["requests"] > 0]
+    return report.sort_values("total_cost_usd", ascending=False)
+
+
+def _hour_buckets(df: pd.DataFrame):
+    """Hour bucket codes and labels without sorting the whole frame"""
+    timestamps = df["timestamp"].to_numpy()
+    valid = ~np.isnat(timestamps)
+    hours = timestamps[valid].astype("datetime64[h]").astype("int64")
+    if hours.size == 0:
+        return valid, hours, pd.DatetimeIndex([], name="timestamp")
+    first = hours.min()
+    buckets = hours - first
+    labels = pd.DatetimeIndex(
+        (np.arange(buckets.max() + 1) + first).astype("datetime64[h]"),
+        name="timestamp",
+    )
+    return valid, buckets, labels
+
+
+def hourly_throughput(df: pd.DataFrame) -> pd.DataFrame:
+    """Requests, sessions and tokens per hour"""
+    valid, buckets, labels = _hour_buckets(df)
+    columns = ["requests", "sessions", "total_tokens", "tokens_per_second"]
+    if buckets.size == 0:
+        return pd.DataFrame(columns=columns)
+
+    n_hours = len(labels)
+    total_tokens = np.bincount(
+        buckets, df["total_tokens"].to_numpy()[valid], minlength=n_hours
+    )
+    # Distinct sessions per hour from unique (hour, session) code pairs
+    session_codes = df["session_id"].astype("category").cat.codes.to_numpy()[valid]
+    pairs = np.unique(buckets * (int(session_codes.max()) + 2) + session_codes + 1)
+    sessions = np.bincount(pairs // (int(session_codes.max()) + 2), minlength=n_hours)
+
+    hourly = pd.DataFrame(
+        {
+            "requests": np.bincount(buckets, minlength=n_hours),
+            "sessions": sessions,
+            "total_tokens": total_tokens.astype("int64"),
+            "tokens_per_second": total_tokens / 3600.0,
+        },
+        index=labels,
+    )
+    return hourly[columns]
+
+
+def cache_savings_over_time(df: pd.DataFrame) -> pd.DataFrame:
+    """Hourly and cumulative savings from tokens served out of caches"""
+    valid, buckets, labels = _hour_buckets(df)
+    columns = ["cached_tokens", "cache_savings_usd", "cumulative_savings_usd"]
+    if buckets.size == 0:
+        return pd.DataFrame(columns=columns)
+
+    n_hours = len(labels)
+    savings = np.bincount(
+        buckets, df["cache_savings_usd"].to_numpy()[valid], minlength=n_hours
+    )
+    return pd.DataFrame(
+        {
+            "cached_tokens": np.bincount(
+                buckets, df["cached_tokens"].to_numpy()[valid], minlength=n_hours
+            ).astype("int64"),
+            "cache_savings_usd": savings,
+            "cumulative_savings_usd": np.cumsum(savings),
+        },
+        index=labels,
+    )
+
+
+def most_requested(
+    df: pd.DataFrame, since: Optional[pd.Timestamp] = None, n: int = 10
+) -> List[str]:
+    """Tickers analysed in the most sessions since a time, most requested first"""
+    if since is not None:
+        df = df[df["timestamp"] >= since]
+    sessions = df.drop_duplicates(["session_id", "stock_symbol"])["stock_symbol"]
+    counts = sessions.astype(str).value_counts(sort=False)
+    counts = counts[counts.index != ""]
+    # Ties keep alphabetical order so the ranking is stable
+    counts = counts.sort_index().sort_values(ascending=False, kind="stable")
+    return list(counts.index[:n])
+
+
+def build_analytics_report(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Compute every analytics table from a normalized usage frame"""
+    report = {
+        f"by_{name}": percentile_report(df, column)
+        for name, column in GROUPINGS.items()
+    }
+    report["hourly_throughput"] = hourly_throughput(df)
+    report["cache_savings"] = cache_savings_over_time(df)
+    return report
+
+
+def format_analytics_report(report: Dict[str, pd.DataFrame], max_rows: int = 20) -> str:
+    """Format the analytics tables for terminal display"""
+    if not report:
+        return "No usage data available."
+
+    sections = [f"\n📊 COST & LATENCY ANALYTICS\n{'='*50}"]
+    for name, table in report.items():
+        title = name.replace("_", " ").title()
+        if table.empty:
+            body = "   (no data)"
+        else:
+            body = table.head(max_rows).to_string(float_format=lambda v: f"{v:,.4f}")
+        sections.append(f"\n📈 {title}:\n{body}")
+    sections.append("=" * 50)
+    return "\n".join(sections)
+
+
+def export_analytics_report(
+    report: Dict[str, pd.DataFrame],
+    output_dir: str,
+    formats: tuple = ("csv",),
+) -> Dict[str, str]:
+    """Write each analytics table as CSV and/or Parquet, returning the paths"""
+    os.makedirs(output_dir, exist_ok=True)
+    written = {}
+    for name, table in report.items():
+        for fmt in formats:
+            path = os.path.join(output_dir, f"{name}.{fmt}")
+            if fmt == "parquet":
+                table.to_parquet(path)
+            else:
+                table.to_csv(path)
+            written[f"{name}.{fmt}"] = path
+    return written
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(
+        description="Cost and latency analytics over the usage ledger"
+    )
+    parser.add_argument(
+        "ledger",
+        nargs="?",
+        default=DEFAULT_LEDGER_PATH,
+        help="Usage ledger (.jsonl), session file (.json), .csv or .parquet",
+    )
+    parser.add_argument("--output-dir", help="Directory for exported tables")
+    parser.add_argument(
+        "--format",
+        choices=["csv", "parquet", "both"],
+        default="csv",
+        help="Export format for --output-dir",
+    )
+    parser.add_argument("--max-rows", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    df = load_usage_frame(args.ledger)
+    report = build_analytics_report(df)
+    print(format_analytics_report(report, max_rows=args.max_rows))
+
+    if args.output_dir:
+        formats = ("csv", "parquet") if args.format == "both" else (args.format,)
+        for path in export_analytics_report(report, args.output_dir, formats).values():
+            print(f"💾 Saved {path}")
+
+
+if __name__ == "__main__":
+    main()